@@ -0,0 +1,345 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import re
+import httpx
+from submission_store import submission_store
+from problem_catalog import problem_catalog
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_API_URL = os.environ.get("EXECUTION_API_URL", "http://localhost:8000")
+# Submissions graded at once; also the size of the keep-alive connection pool to the execution API
+GRADING_CONCURRENCY = int(os.environ.get("GRADING_CONCURRENCY", "8"))
+GRADING_MAX_ATTEMPTS = 3
+GRADING_RETRY_DELAY = 1.0  # Seconds before the first retry, doubled for each further attempt
+GRADING_REQUEST_TIMEOUT = 120
+MAX_REPORTED_ERROR = 2000
+
+# Time limits derived from the reference solution's runtime on each test
+TIME_LIMIT_MULTIPLIER = 3.0
+TIME_LIMIT_MARGIN = 0.5  # Seconds added on top, for interpreter start-up jitter
+MIN_TIME_LIMIT = 1.0
+MAX_TIME_LIMIT = 30.0  # The execution API's own ceiling
+# Judge specs get a limit per case; the run as a whole also has to start the interpreter and load the
+# submission, which can import heavy libraries (numpy, torch) the reference solution does not need
+JUDGE_LOAD_ALLOWANCE = 10.0
+# Part of every reference cache key; bumped when the way runtimes are measured changes
+REFERENCE_FORMAT = 3
+
+class RetryableGradingError(Exception):
+    pass
+
+class ExecutionApiBusy(Exception):
+    """The execution API shed the request; retry after the delay it asked for"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Execution API is overloaded; retrying in {retry_after:g} seconds")
+        self.retry_after = retry_after
+
+class CalibrationError(Exception):
+    pass
+
+class GradingRejected(Exception):
+    """The execution API refused a grading request; retrying it unchanged can not succeed"""
+
+def time_limit(reference_seconds):
+    """Time limit for a test the reference solution finished in reference_seconds"""
+    seconds = reference_seconds * TIME_LIMIT_MULTIPLIER + TIME_LIMIT_MARGIN
+    return round(min(MAX_TIME_LIMIT, max(MIN_TIME_LIMIT, seconds)), 3)
+
+def judge_timeout(case_limits):
+    """Time limit for a whole judge run: loading the submission plus every case using up its limit"""
+    return round(min(MAX_TIME_LIMIT, JUDGE_LOAD_ALLOWANCE + sum(case_limits)), 3)
+
+def reference_key(problem, payload):
+    """Cache key for a reference run; changes whenever the reference solution or the test input does"""
+    spec = [REFERENCE_FORMAT, problem.language, problem.reference, payload]
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+def environment_name(slug):
+    """Execution API assignment name used to grade a catalog problem"""
+    return "grading_" + re.sub(r"[^A-Za-z0-9_]", "_", slug)
+
+def _raise_if_rejected(response, path):
+    if 400 <= response.status_code < 500:
+        try:
+            detail = response.json().get("detail")
+        except (ValueError, AttributeError):
+            detail = response.text
+        raise GradingRejected(f"Execution API rejected {path} ({response.status_code}): {detail}")
+
+class Grader:
+    """Runs queued submissions against their problem's tests on the code execution API"""
+
+    def __init__(self, store, catalog, base_url=EXECUTION_API_URL, concurrency=GRADING_CONCURRENCY):
+        self.store = store
+        self.catalog = catalog
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.queue = None
+        self.client = None
+        self.workers = []
+        self.environments = {}  # execution API assignment name -> language it was created with
+        self.environment_lock = None
+        self.calibrations = {}  # reference cache key -> task computing it, so each is run only once
+        self.stats = {"graded": 0, "failed": 0, "retries": 0, "deferred": 0, "reference_runs": 0}
+
+    async def start(self):
+        """Open the connection pool, start the workers and re-queue submissions left ungraded"""
+        if self.workers:
+            return
+        self.queue = asyncio.Queue()
+        self.environment_lock = asyncio.Lock()
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=GRADING_REQUEST_TIMEOUT,
+            # Grading is batch work: the execution API holds it back first when the host is busy
+            headers={"X-Execution-Priority": "batch"},
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        )
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        pending = await asyncio.to_thread(self.store.pending_grades)
+        for submission in pending:
+            self.queue.put_nowait(submission)
+        if pending:
+            logger.info(f"Re-queued {len(pending)} ungraded submissions")
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+        if self.client is not None:
+            await self.client.aclose()
+
+    def enqueue(self, submission_id, assignment, code):
+        """Queue a stored submission for grading"""
+        self.queue.put_nowait((submission_id, assignment, code))
+
+    def get_stats(self):
+        return dict(self.stats, queued=self.queue.qsize() if self.queue else 0, concurrency=self.concurrency)
+
+    async def _worker(self):
+        while True:
+            submission_id, assignment, code = await self.queue.get()
+            try:
+                await self._grade(submission_id, assignment, code)
+            except Exception as e:
+                logger.error(f"Grading submission {submission_id} failed: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    async def _grade(self, submission_id, assignment, code):
+        problem = self.catalog.get(assignment)
+        if problem is None or not problem.gradable:
+            await asyncio.wrap_future(self.store.record_grade(submission_id, "failed"))
+            self.stats["failed"] += 1
+            return
+
+        attempt = 1
+        while True:
+            try:
+                results = await self._run_tests(problem, code)
+                break
+            except ExecutionApiBusy as e:
+                # Load shedding is not a failure, so it does not use up an attempt
+                self.stats["deferred"] += 1
+                await asyncio.sleep(e.retry_after)
+            except CalibrationError as e:
+                logger.error(f"Cannot grade submission {submission_id}: {str(e)}")
+                await asyncio.wrap_future(self.store.record_grade(
+                    submission_id, "failed", results=[{"error": str(e)}], attempts=attempt
+                ))
+                self.stats["failed"] += 1
+                return
+            except (RetryableGradingError, httpx.TransportError) as e:
+                if attempt == GRADING_MAX_ATTEMPTS:
+                    logger.error(f"Giving up on submission {submission_id} after {attempt} attempts: {str(e)}")
+                    await asyncio.wrap_future(self.store.record_grade(
+                        submission_id, "failed", results=[{"error": str(e) or type(e).__name__}], attempts=attempt
+                    ))
+                    self.stats["failed"] += 1
+                    return
+                self.stats["retries"] += 1
+                await asyncio.sleep(GRADING_RETRY_DELAY * 2 ** (attempt - 1))
+                attempt += 1
+            except Exception as e:
+                # Rejected requests and unexpected responses fail the same way every time; record them
+                # instead of leaving the grade pending (and re-queued on every restart)
+                message = f"{type(e).__name__}: {str(e)}"[:MAX_REPORTED_ERROR]
+                logger.error(f"Cannot grade submission {submission_id}: {message}")
+                await asyncio.wrap_future(self.store.record_grade(
+                    submission_id, "failed", results=[{"error": message}], attempts=attempt
+                ))
+                self.stats["failed"] += 1
+                return
+
+        passed = sum(result["passed"] for result in results)
+        await asyncio.wrap_future(self.store.record_grade(
+            submission_id, "graded", score=passed / len(results), passed=passed, total=len(results),
+            results=results, attempts=attempt
+        ))
+        self.stats["graded"] += 1
+
+    async def _run_tests(self, problem, code):
+        name, tests = await self.calibrate(problem)
+        if problem.judge:
+            return await self._run_judge(name, code, tests)
+        return await asyncio.gather(*(self._run_test(name, code, test) for test in tests))
+
+    async def calibrate(self, problem, refresh=False):
+        """Return (environment name, tests) with expected results and time limits filled in.
+        
+        Missing expected results come from the problem's reference solution, as do time limits
+        not set explicitly. Reference runs are cached, so each is computed once per test; with
+        refresh=True they are all run again and the cache is replaced.
+        """
+        name = await self._ensure_environment(problem)
+        if problem.judge:
+            return name, await self._calibrate_judge(name, problem, refresh)
+        tests = []
+        for index, test in enumerate(problem.tests):
+            if problem.reference is None:
+                if "expected_output" not in test:
+                    raise CalibrationError(f"Test {index + 1} of '{problem.slug}' has no expected_output "
+                                           f"and the problem has no reference solution")
+                tests.append(test)
+                continue
+            output, execution_time = await self._reference_result(
+                problem, ["stdin", test.get("stdin") or ""], lambda test=test: self._run_reference(name, problem, test),
+                refresh
+            )
+            tests.append(dict(test, expected_output=test.get("expected_output", output),
+                              time_limit=test.get("time_limit") or time_limit(execution_time)))
+        return name, tests
+
+    async def _calibrate_judge(self, name, problem, refresh=False):
+        judge = problem.judge
+        if problem.reference is None:
+            if any("expected" not in case for case in judge["cases"]):
+                raise CalibrationError(f"'{problem.slug}' has judge cases without expected values "
+                                       f"and no reference solution")
+            return judge
+        payload = ["judge", judge["function"], [case["args"] for case in judge["cases"]]]
+        reference, _ = await self._reference_result(
+            problem, payload, lambda: self._run_reference_judge(name, problem), refresh
+        )
+        cases = []
+        for case, value, seconds in zip(judge["cases"], reference["values"], reference["times"]):
+            cases.append(dict(case, expected=case.get("expected", value),
+                              time_limit=case.get("time_limit") or time_limit(seconds)))
+        return dict(judge, cases=cases,
+                    timeout=judge.get("timeout") or judge_timeout(case["time_limit"] for case in cases))
+
+    async def _reference_result(self, problem, payload, run, refresh=False):
+        key = reference_key(problem, payload)
+        if not refresh:
+            cached = await asyncio.to_thread(self.store.get_reference, key)
+            if cached is not None:
+                return cached
+        task = self.calibrations.get(key)
+        if task is None:
+            task = self.calibrations[key] = asyncio.ensure_future(self._store_reference(key, run))
+            task.add_done_callback(lambda _: self.calibrations.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _store_reference(self, key, run):
+        result, execution_time = await run()
+        await asyncio.wrap_future(self.store.record_reference(key, result, execution_time))
+        self.stats["reference_runs"] += 1
+        return result, execution_time
+
+    async def _run_reference(self, name, problem, test):
+        data = await self._post(name, "/execute/code", {
+            "assignment_name": name,
+            "code": problem.reference,
+            "stdin": test.get("stdin") or None
+        })
+        # Judged like a submission: warnings or logging on stderr are fine, a crash or timeout is not
+        if data.get("exit_code") != 0:
+            message = data["error"] or f"Exited with code {data.get('exit_code')}"
+            raise CalibrationError(f"Reference solution of '{problem.slug}' failed: {message[:MAX_REPORTED_ERROR]}")
+        # The program's own runtime; compiling does not count against the time limit
+        return data["output"], max(0.0, data["execution_time"] - (data.get("compile_time") or 0.0))
+
+    async def _run_reference_judge(self, name, problem):
+        data = await self._post(name, "/judge/function", {
+            "assignment_name": name,
+            "code": problem.reference,
+            "function": problem.judge["function"],
+            "cases": [{"args": case["args"]} for case in problem.judge["cases"]]
+        })
+        errors = [result["error"] for result in data["results"] if result["error"]]
+        if data["error"] or errors or not data["results"]:
+            message = data["error"] or (errors[0] if errors else "no results")
+            raise CalibrationError(f"Reference solution of '{problem.slug}' failed: {message[:MAX_REPORTED_ERROR]}")
+        # Time spent in each case, measured by the harness: queueing for admission or a pool slot,
+        # interpreter start-up and loading the code are left out (JUDGE_LOAD_ALLOWANCE covers those)
+        times = [result["time"] for result in data["results"]]
+        return {"values": [result["actual"] for result in data["results"]], "times": times}, sum(times)
+
+    async def _post(self, name, path, payload):
+        response = await self.client.post(path, json=payload)
+        if response.status_code == 404:
+            # The environment was deleted behind our back; recreate it on the next attempt
+            self.environments.pop(name, None)
+            raise RetryableGradingError(f"Execution environment '{name}' not found")
+        if response.status_code == 503 and "Retry-After" in response.headers:
+            raise ExecutionApiBusy(float(response.headers["Retry-After"]))
+        if response.status_code >= 500:
+            raise RetryableGradingError(f"Execution API returned {response.status_code}")
+        _raise_if_rejected(response, path)
+        return response.json()
+
+    async def _run_judge(self, name, code, judge):
+        # One request and one process for all cases; return values are compared by the execution API
+        data = await self._post(name, "/judge/function", dict(judge, assignment_name=name, code=code))
+        if not data["results"]:
+            raise RetryableGradingError(data["error"])
+        return [{
+            "passed": result["passed"],
+            "execution_time": result["time"],
+            "error": (result["error"] or "")[:MAX_REPORTED_ERROR]
+        } for result in data["results"]]
+
+    async def _run_test(self, name, code, test):
+        # The execution API compares output as it streams and stops the program at the first wrong line
+        data = await self._post(name, "/execute/code", {
+            "assignment_name": name,
+            "code": code,
+            "stdin": test.get("stdin") or None,
+            "expected_output": test["expected_output"],
+            "comparison": test.get("comparison", "whitespace"),
+            "timeout": test.get("time_limit")
+        })
+        comparison = data.get("comparison") or {}
+        # stderr alone (warnings, logging) does not fail a test; a crash or timeout does
+        exit_code = data.get("exit_code")
+        error = data["error"]
+        if exit_code not in (0, None) and not comparison.get("terminated_early"):
+            error = f"{error}\nExited with code {exit_code}".lstrip("\n")
+        return {
+            "passed": exit_code == 0 and comparison.get("passed", False),
+            "execution_time": data["execution_time"],
+            "error": error[:MAX_REPORTED_ERROR],
+            "first_difference": comparison.get("first_difference")
+        }
+
+    async def _ensure_environment(self, problem):
+        name = environment_name(problem.slug)
+        async with self.environment_lock:
+            if self.environments.get(name) != problem.language:
+                # Idempotent on the execution API: returns at once if the environment is up to date
+                response = await self.client.post("/create/assignment", json={
+                    "assignment_name": name,
+                    "language": problem.language
+                })
+                if response.status_code >= 500:
+                    raise RetryableGradingError(f"Could not create execution environment '{name}'")
+                _raise_if_rejected(response, "/create/assignment")
+                self.environments[name] = problem.language
+        return name
+
+grader = Grader(submission_store, problem_catalog)
@@ -1,5 +1,13 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Response, HTTPException
+from typing import Optional
+import asyncio
+import json
 import logging
+import httpx
+from submission_store import submission_store, content_hash
+from problem_catalog import problem_catalog, TemplateMismatch
+from grader import grader, CalibrationError, GradingRejected, RetryableGradingError, ExecutionApiBusy
+from similarity import similarity_index, signature_for
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -7,54 +15,174 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/api/assignment/prefix-sum")
-async def get_prefix_sum_assignment():
-    """Return the code template for the Prefix Sum problem"""
-    code = '''
-from typing import List
-
-class Solution:
-    def prefixSum(self, nums: List[int]) -> List[int]:
-        """
-        Given a list of integers, return a list where each element at index i
-        is the sum of all elements in the original list from index 0 to i.
-        """
-        <editable>
-        prefix = []
-        total = 0
-        for num in nums:
-            total += num
-            prefix.append(total)
-        return prefix
-        </editable>
-# Driver code for testing the solution
-if __name__ == "__main__":
-    # Test cases
-    solution = Solution()
-
-    # Test case 1
-    nums1 = [1, 2, 3, 4]
-    print(f"Prefix Sum of {nums1}: {solution.prefixSum(nums1)}")  # Expected output: [1, 3, 6, 10]
-
-    # Test case 2
-    nums2 = [5, 7, 2, 1]
-    print(f"Prefix Sum of {nums2}: {solution.prefixSum(nums2)}")  # Expected output: [5, 12, 14, 15]
-'''
-    return {"code": code}
-
-@router.get("/api/assignment/prefix-sum-problem")
-async def get_prefix_sum_problem_assignment():
-    """Alias for the prefix sum problem for compatibility"""
-    return await get_prefix_sum_assignment()
+services_started = False
+
+# Registered on the router so apps that include it via routes_connector start them too
+@router.on_event("startup")
+async def start_services():
+    global services_started
+    if services_started:
+        return  # Some FastAPI versions run an included router's startup handlers twice
+    services_started = True
+    submission_store.start()
+    problem_catalog.start()
+    await asyncio.to_thread(similarity_index.load, submission_store.signatures())
+    await grader.start()
+
+@router.on_event("shutdown")
+async def stop_services():
+    await grader.stop()
+
+@router.get("/api/problems")
+async def list_problems():
+    """List the problems in the catalog"""
+    return {"problems": problem_catalog.list()}
+
+@router.get("/api/assignment/{slug}")
+async def get_assignment(slug: str, request: Request):
+    """Return the code template for a problem (e.g. prefix-sum, or its alias prefix-sum-problem)"""
+    problem = problem_catalog.get(slug)
+    if problem is None:
+        raise HTTPException(status_code=404, detail=f"Problem '{slug}' not found")
+    
+    # Bodies, their gzip encoding and ETags are computed when the template is loaded
+    headers = {"ETag": problem.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if problem.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(problem.gzip_body, media_type="application/json",
+                        headers=dict(headers, **{"Content-Encoding": "gzip"}))
+    return Response(problem.body, media_type="application/json", headers=headers)
+
+def index_submission(submission_id, assignment, student_id, code, language, regions):
+    """Fingerprint a stored submission and add it to the similarity index"""
+    try:
+        signature = signature_for(code, language, regions)
+        submission_store.record_signature(submission_id, assignment, student_id, signature.tobytes())
+        matches = similarity_index.add(assignment, submission_id, student_id, signature)
+        if matches:
+            logger.info(f"Submission {submission_id} from {student_id} nearly duplicates {sorted(matches)}")
+    except Exception as e:
+        logger.error(f"Could not index submission {submission_id} for similarity: {str(e)}")
 
 @router.post("/api/submit-assignment")
 async def submit_assignment(request: Request):
-    """Submit the completed assignment"""
+    """Submit the completed assignment.
+    
+    For catalog problems, clients may send just the editable regions
+    ({"assignment", "template_version", "regions": [...]}) instead of the whole program;
+    the server splices them into the template. Full programs are checked against the
+    template so only editable code can change.
+    """
     data = await request.json()
     code = data.get("code", "")
+    student_id = str(data.get("student_id") or "anonymous")
+    assignment = str(data.get("assignment") or "prefix-sum")
+    regions = data.get("regions")
+    template_version = data.get("template_version")
+    regions_hash = None
+    if not isinstance(code, str):
+        raise HTTPException(status_code=400, detail="code must be a string")
+    
+    problem = problem_catalog.get_version(assignment, template_version)
+    if problem is None and (regions is not None or template_version is not None):
+        raise HTTPException(status_code=409 if problem_catalog.get(assignment) else 404,
+                            detail=f"Template version '{template_version}' of '{assignment}' is not available")
+    
+    if problem is not None:
+        try:
+            if regions is not None:
+                if not isinstance(regions, list) or not all(isinstance(region, str) for region in regions):
+                    raise HTTPException(status_code=400, detail="regions must be a list of strings")
+                code = problem.splice(regions)
+            else:
+                regions = problem.extract_regions(code)
+        except TemplateMismatch as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        assignment = problem.slug
+        # Identifies the student-authored part alone, e.g. as a cache key for grading results
+        regions_hash = content_hash(json.dumps(regions))
     
-    # In a real application, you would save this to a database
-    # For now, we'll just log it and return a success message
-    logger.info(f"Received assignment submission: {code}")
+    # Persisted by the store's writer thread, which commits queued submissions in batches
+    grade = problem is not None and problem.gradable
+    try:
+        future = submission_store.submit(student_id, assignment, code, grade=grade)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    submission = await asyncio.wrap_future(future)
+    logger.info(f"Stored submission {submission['id']} from {student_id} for {assignment} ({len(code)} bytes)")
+    if grade:
+        grader.enqueue(submission["id"], assignment, code)
+    # Fingerprinting for near-duplicate detection happens off the request path
+    asyncio.get_running_loop().run_in_executor(
+        None, index_submission, submission["id"], assignment, student_id, code,
+        problem.language if problem else "python", regions if problem else None
+    )
     
-    return {"message": "Assignment submitted successfully", "received_code": code} 
\ No newline at end of file
+    return {"message": "Assignment submitted successfully", "regions_hash": regions_hash,
+            "grading": "pending" if grade else None, **submission}
+
+@router.get("/api/submissions")
+async def list_submissions(student_id: Optional[str] = None, assignment: Optional[str] = None,
+                           before_id: Optional[int] = None, limit: int = 50):
+    """List submissions newest first; pass next_before_id back as before_id for the next page"""
+    return await asyncio.to_thread(submission_store.list, student_id, assignment, before_id, limit)
+
+@router.get("/api/submissions/{submission_id}")
+async def get_submission(submission_id: int):
+    """Return a stored submission including its code"""
+    submission = await asyncio.to_thread(submission_store.get, submission_id)
+    if submission is None:
+        raise HTTPException(status_code=404, detail=f"Submission {submission_id} not found")
+    return submission
+
+@router.get("/api/submissions/{submission_id}/grade")
+async def get_submission_grade(submission_id: int):
+    """Return the auto-grading status and score of a submission"""
+    grade = await asyncio.to_thread(submission_store.get_grade, submission_id)
+    if grade is None:
+        raise HTTPException(status_code=404, detail=f"Submission {submission_id} is not auto-graded")
+    return grade
+
+@router.get("/api/grading/stats")
+async def grading_stats():
+    """Report the grading queue depth and counters"""
+    return grader.get_stats()
+
+@router.post("/api/problems/{slug}/calibrate")
+async def calibrate_problem(slug: str, refresh: bool = False):
+    """Run a problem's reference solution if needed and return the resulting expected outputs and time limits.
+    
+    With refresh=true every reference run is repeated, replacing the cached results.
+    """
+    problem = problem_catalog.get(slug)
+    if problem is None or not problem.gradable:
+        raise HTTPException(status_code=404, detail=f"Problem '{slug}' has no tests")
+    try:
+        _, tests = await grader.calibrate(problem, refresh)
+    except (CalibrationError, GradingRejected) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except (RetryableGradingError, ExecutionApiBusy, httpx.TransportError) as e:
+        raise HTTPException(status_code=503, detail=f"Execution API unavailable: {str(e)}")
+    return {"slug": slug, "version": problem.version, "tests": tests}
+
+@router.get("/api/submissions/{submission_id}/similar")
+async def get_similar_submissions(submission_id: int):
+    """List submissions by other students that nearly duplicate this one"""
+    submission = await asyncio.to_thread(submission_store.get, submission_id)
+    if submission is None:
+        raise HTTPException(status_code=404, detail=f"Submission {submission_id} not found")
+    matches = similarity_index.similar(submission["assignment"], submission_id)
+    return {"submission_id": submission_id,
+            "similar": [{"submission_id": other, "similarity": similarity}
+                        for other, similarity in sorted(matches.items(), key=lambda item: -item[1])]}
+
+@router.get("/api/similarity/{assignment}")
+async def get_similarity_clusters(assignment: str):
+    """Group an assignment's submissions into clusters of near-duplicates from different students"""
+    problem = problem_catalog.get(assignment)
+    if problem is not None:
+        assignment = problem.slug
+    return {"assignment": assignment,
+            "indexed_submissions": similarity_index.size(assignment),
+            "clusters": similarity_index.clusters(assignment)}
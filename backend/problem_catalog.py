@@ -0,0 +1,209 @@
+import os
+import re
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+PROBLEMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "problems")
+RELOAD_INTERVAL = 2  # Seconds between checks of the problems directory for changes
+PREVIOUS_VERSIONS = 4  # Superseded versions kept per problem so in-flight delta submissions still splice
+
+LANGUAGES = {".py": "python", ".js": "javascript", ".cpp": "cpp"}
+TESTS_SUFFIX = ".tests.json"  # Optional hidden test cases next to a template, used for auto-grading
+REFERENCE_SUFFIX = ".reference"  # Optional reference solution, e.g. prefix-sum.reference.py
+EDITABLE_PATTERN = re.compile(r"<editable>(.*?)</editable>", re.DOTALL)
+
+class TemplateMismatch(ValueError):
+    pass
+
+def parse_template(code):
+    """Locate <editable> regions as offsets into the template with the tags removed"""
+    regions = []
+    stripped = []
+    position = 0  # Offset into the stripped code
+    last_end = 0
+    for match in EDITABLE_PATTERN.finditer(code):
+        stripped.append(code[last_end:match.start()])
+        position += match.start() - last_end
+        content = match.group(1)
+        start_line = "".join(stripped).count("\n") + 1
+        regions.append({
+            "start": position,
+            "end": position + len(content),
+            "start_line": start_line,
+            "end_line": start_line + content.count("\n")
+        })
+        stripped.append(content)
+        position += len(content)
+        last_end = match.end()
+    stripped.append(code[last_end:])
+    return "".join(stripped), regions
+
+class Problem:
+    """A template loaded from disk, with its response body pre-encoded"""
+
+    def __init__(self, slug, path, code, mtime, tests=None, reference=None):
+        self.slug = slug
+        self.path = path
+        self.mtime = mtime
+        self.reference = reference  # Full reference program; expected outputs and time limits derive from it
+        # Never sent to clients. Either a list of whole-program tests [{"stdin", "expected_output"}]
+        # or a function-level judge spec {"function", "cases": [{"args", "expected"}], ...}
+        self.judge = tests if isinstance(tests, dict) else None
+        self.tests = tests if isinstance(tests, list) else []
+        self.language = LANGUAGES.get(os.path.splitext(path)[1], "python")
+        self.code = code
+        self.starter_code, self.editable_regions = parse_template(code)
+        # The fixed code around the editable regions: len(editable_regions) + 1 segments
+        self.fixed_segments = []
+        position = 0
+        for region in self.editable_regions:
+            self.fixed_segments.append(self.starter_code[position:region["start"]])
+            position = region["end"]
+        self.fixed_segments.append(self.starter_code[position:])
+        self.version = hashlib.sha256(code.encode("utf-8")).hexdigest()[:16]
+        self.body = json.dumps({
+            "code": code,
+            "slug": slug,
+            "language": self.language,
+            "version": self.version,
+            "editable_regions": self.editable_regions
+        }).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, mtime=0)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+    def splice(self, regions):
+        """Build the program from the contents of each editable region"""
+        if len(regions) != len(self.editable_regions):
+            raise TemplateMismatch(f"Problem '{self.slug}' has {len(self.editable_regions)} editable regions, "
+                                   f"got {len(regions)}")
+        parts = [self.fixed_segments[0]]
+        for content, fixed in zip(regions, self.fixed_segments[1:]):
+            parts.append(content)
+            parts.append(fixed)
+        return "".join(parts)
+
+    def extract_regions(self, code):
+        """Split a full program into its editable region contents, checking the fixed code is untouched"""
+        code = code.replace("<editable>", "").replace("</editable>", "")
+        first, *middle, last = self.fixed_segments
+        if not code.startswith(first) or not code.endswith(last) or len(code) < len(first) + len(last):
+            raise TemplateMismatch(f"Code outside the editable regions of '{self.slug}' was modified")
+        regions = []
+        position = len(first)
+        end = len(code) - len(last)
+        for fixed in middle:
+            found = code.find(fixed, position, end)
+            if found < 0:
+                raise TemplateMismatch(f"Code outside the editable regions of '{self.slug}' was modified")
+            regions.append(code[position:found])
+            position = found + len(fixed)
+        regions.append(code[position:end])
+        return regions
+
+    def summary(self):
+        return {"slug": self.slug, "language": self.language, "version": self.version,
+                "editable_regions": len(self.editable_regions),
+                "tests": len(self.judge["cases"]) if self.judge else len(self.tests)}
+
+    @property
+    def gradable(self):
+        return bool(self.tests or self.judge)
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+class ProblemCatalog:
+    """All problem templates in a directory, re-read only when a file changes"""
+
+    def __init__(self, problems_dir=PROBLEMS_DIR):
+        self.problems_dir = problems_dir
+        self.problems = {}  # slug -> Problem; replaced wholesale on reload
+        self.previous = {}  # slug -> superseded Problems, newest last
+        self.reload_lock = threading.Lock()
+        self.watcher = None
+
+    def reload(self):
+        """Re-parse added or modified templates and drop deleted ones"""
+        with self.reload_lock:
+            current = self.problems
+            problems = {}
+            for entry in os.scandir(self.problems_dir):
+                slug, extension = os.path.splitext(entry.name)
+                if not entry.is_file() or extension not in LANGUAGES or entry.name.startswith(".") or \
+                        slug.endswith(REFERENCE_SUFFIX):
+                    continue
+                tests_path = os.path.join(self.problems_dir, slug + TESTS_SUFFIX)
+                reference_path = os.path.join(self.problems_dir, slug + REFERENCE_SUFFIX + extension)
+                mtime = (entry.stat().st_mtime_ns, _mtime(tests_path), _mtime(reference_path))
+                existing = current.get(slug)
+                if existing is not None and existing.path == entry.path and existing.mtime == mtime:
+                    problems[slug] = existing
+                    continue
+                try:
+                    tests = reference = None
+                    if mtime[1] is not None:
+                        with open(tests_path, "r", encoding="utf-8") as f:
+                            tests = json.load(f)
+                    if mtime[2] is not None:
+                        with open(reference_path, "r", encoding="utf-8") as f:
+                            reference = f.read()
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        problems[slug] = Problem(slug, entry.path, f.read(), mtime, tests, reference)
+                    if existing is not None and existing.version != problems[slug].version:
+                        self.previous[slug] = (self.previous.get(slug, []) + [existing])[-PREVIOUS_VERSIONS:]
+                except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+                    logger.error(f"Could not load problem template {entry.path}: {str(e)}")
+                    if existing is not None:
+                        problems[slug] = existing
+                    continue
+                logger.info(f"Loaded problem template '{slug}'")
+            for slug in current.keys() - problems.keys():
+                self.previous.pop(slug, None)
+                logger.info(f"Removed problem template '{slug}'")
+            self.problems = problems
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(RELOAD_INTERVAL)
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Problem catalog reload failed: {str(e)}")
+
+    def start(self):
+        """Load every template and start watching the directory for changes"""
+        self.reload()
+        if self.watcher is None:
+            self.watcher = threading.Thread(target=self._watch_loop, name="problem-catalog", daemon=True)
+            self.watcher.start()
+
+    def get(self, slug):
+        """Look up a problem by slug, accepting the legacy '<slug>-problem' alias"""
+        problem = self.problems.get(slug)
+        if problem is None and slug.endswith("-problem"):
+            problem = self.problems.get(slug[:-len("-problem")])
+        return problem
+
+    def get_version(self, slug, version=None):
+        """Look up a specific version of a problem (the current one if version is None)"""
+        problem = self.get(slug)
+        if problem is None or version is None or problem.version == version:
+            return problem
+        for previous in self.previous.get(problem.slug, []):
+            if previous.version == version:
+                return previous
+        return None
+
+    def list(self):
+        return [problem.summary() for _, problem in sorted(self.problems.items())]
+
+problem_catalog = ProblemCatalog(os.environ.get("PROBLEMS_DIR", PROBLEMS_DIR))
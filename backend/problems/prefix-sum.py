@@ -0,0 +1,29 @@
+
+from typing import List
+
+class Solution:
+    def prefixSum(self, nums: List[int]) -> List[int]:
+        """
+        Given a list of integers, return a list where each element at index i
+        is the sum of all elements in the original list from index 0 to i.
+        """
+        <editable>
+        prefix = []
+        total = 0
+        for num in nums:
+            total += num
+            prefix.append(total)
+        return prefix
+        </editable>
+# Driver code for testing the solution
+if __name__ == "__main__":
+    # Test cases
+    solution = Solution()
+
+    # Test case 1
+    nums1 = [1, 2, 3, 4]
+    print(f"Prefix Sum of {nums1}: {solution.prefixSum(nums1)}")  # Expected output: [1, 3, 6, 10]
+
+    # Test case 2
+    nums2 = [5, 7, 2, 1]
+    print(f"Prefix Sum of {nums2}: {solution.prefixSum(nums2)}")  # Expected output: [5, 12, 14, 15]
@@ -0,0 +1,6 @@
+from itertools import accumulate
+from typing import List
+
+class Solution:
+    def prefixSum(self, nums: List[int]) -> List[int]:
+        return list(accumulate(nums))
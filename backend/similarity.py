@@ -0,0 +1,212 @@
+import io
+import re
+import random
+import keyword
+import hashlib
+import logging
+import tokenize
+import textwrap
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5  # Tokens per shingle
+NUM_PERMUTATIONS = 128
+# 32 bands of 4 rows make pairs with Jaccard similarity above ~0.45 likely to share a bucket;
+# candidates are then confirmed against SIMILARITY_THRESHOLD using the full signatures
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SIMILARITY_THRESHOLD = 0.7
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures are persisted and must stay comparable across restarts
+_random = random.Random(1729)
+PERMUTATIONS = [(_random.randrange(1, MERSENNE_PRIME), _random.randrange(0, MERSENNE_PRIME))
+                for _ in range(NUM_PERMUTATIONS)]
+
+C_LIKE_TOKEN = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+  | (?P<number>\d[\w.]*|\.\d[\w.]*)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<operator>>>>=|<<=|>>=|===|!==|\.\.\.|->|::|&&|\|\||\+\+|--|[-+*/%&|^!=<>]=?|[{}()\[\];,.?:~#])
+""", re.VERBOSE | re.DOTALL)
+
+C_LIKE_KEYWORDS = frozenset("""
+    auto break case catch class const constexpr continue default delete do else enum export extends false
+    finally for function if import in include instanceof let namespace new nullptr of private protected
+    public return static struct switch template this throw true try typedef typename typeof using var
+    virtual void while yield int long short char bool double float unsigned signed
+""".split())
+
+def _python_tokens(code):
+    tokens = []
+    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+        if token.type in (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.ENCODING,
+                          tokenize.ENDMARKER):
+            continue
+        if token.type == tokenize.NAME:
+            tokens.append(token.string if keyword.iskeyword(token.string) else "ID")
+        elif token.type == tokenize.NUMBER:
+            tokens.append("NUM")
+        elif token.type == tokenize.STRING:
+            tokens.append("STR")
+        elif token.type in (tokenize.INDENT, tokenize.DEDENT):
+            tokens.append(tokenize.tok_name[token.type])
+        else:
+            tokens.append(token.string)
+    return tokens
+
+def _c_like_tokens(code):
+    tokens = []
+    for match in C_LIKE_TOKEN.finditer(code):
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        if kind == "name":
+            tokens.append(match.group() if match.group() in C_LIKE_KEYWORDS else "ID")
+        elif kind == "number":
+            tokens.append("NUM")
+        elif kind == "string":
+            tokens.append("STR")
+        else:
+            tokens.append(match.group())
+    return tokens
+
+def normalize_tokens(code, language):
+    """Tokenize code with identifiers, literals and comments normalized away, so renaming
+    variables or reformatting does not hide copying"""
+    if language == "python":
+        try:
+            return _python_tokens(code)
+        except (tokenize.TokenError, IndentationError, SyntaxError):
+            pass  # Unfinished code still gets a best-effort signature
+    return _c_like_tokens(code)
+
+def shingles(tokens):
+    """Hash every run of SHINGLE_SIZE consecutive tokens to a 32-bit integer"""
+    if len(tokens) < SHINGLE_SIZE:
+        tokens = tokens + [""] * (SHINGLE_SIZE - len(tokens))
+    return {
+        int.from_bytes(hashlib.blake2b("\x00".join(tokens[i:i + SHINGLE_SIZE]).encode("utf-8"),
+                                       digest_size=4).digest(), "little")
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+
+def minhash(code, language):
+    """Return the MinHash signature of code as an array of NUM_PERMUTATIONS 32-bit values"""
+    values = shingles(normalize_tokens(code, language))
+    return array("I", (min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in values)
+                       for a, b in PERMUTATIONS))
+
+def signature_for(code, language, regions=None):
+    """Signature of the student-authored part: the editable regions if known, else the whole program.
+    
+    Shared template code would otherwise make every pair of submissions look alike.
+    """
+    if regions is not None:
+        code = "\n".join(textwrap.dedent(region) for region in regions)
+    return minhash(code, language)
+
+def estimated_similarity(first, second):
+    """Estimate the Jaccard similarity of two shingle sets from their signatures"""
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERMUTATIONS
+
+class SimilarityIndex:
+    """Per-assignment LSH index over submission signatures, updated one submission at a time"""
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.assignments = {}  # assignment -> {"buckets", "signatures", "matches", "parents"}
+
+    def _assignment(self, assignment):
+        index = self.assignments.get(assignment)
+        if index is None:
+            index = self.assignments[assignment] = {
+                "buckets": {},  # (band, band values) -> submission ids
+                "signatures": {},  # submission id -> (student_id, signature)
+                "matches": {},  # submission id -> {matching submission id: similarity}
+                "parents": {}  # union-find forest over matching submissions
+            }
+        return index
+
+    def _find(self, parents, node):
+        while parents.get(node, node) != node:
+            parents[node] = parents.get(parents[node], parents[node])
+            node = parents[node]
+        return node
+
+    def add(self, assignment, submission_id, student_id, signature):
+        """Index a submission and return the earlier submissions by other students it nearly duplicates"""
+        with self.lock:
+            index = self._assignment(assignment)
+            signatures = index["signatures"]
+            candidates = set()
+            for band in range(LSH_BANDS):
+                key = (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())
+                bucket = index["buckets"].setdefault(key, [])
+                candidates.update(bucket)
+                bucket.append(submission_id)
+            signatures[submission_id] = (student_id, signature)
+
+            matches = {}
+            for candidate in candidates:
+                candidate_student, candidate_signature = signatures[candidate]
+                if candidate_student == student_id:
+                    continue  # Resubmissions by the same student are not copying
+                similarity = estimated_similarity(signature, candidate_signature)
+                if similarity >= self.threshold:
+                    matches[candidate] = similarity
+            for candidate, similarity in matches.items():
+                index["matches"].setdefault(candidate, {})[submission_id] = similarity
+                parents = index["parents"]
+                parents[self._find(parents, submission_id)] = self._find(parents, candidate)
+            index["matches"][submission_id] = matches
+            return matches
+
+    def similar(self, assignment, submission_id):
+        """Return {submission id: similarity} for a submission's near-duplicates"""
+        with self.lock:
+            index = self.assignments.get(assignment)
+            if index is None:
+                return {}
+            return dict(index["matches"].get(submission_id, {}))
+
+    def clusters(self, assignment):
+        """Group an assignment's near-duplicate submissions, largest clusters first"""
+        with self.lock:
+            index = self.assignments.get(assignment)
+            if index is None:
+                return []
+            groups = {}
+            for submission_id, matches in index["matches"].items():
+                if matches:
+                    groups.setdefault(self._find(index["parents"], submission_id), []).append(submission_id)
+            clusters = []
+            for members in groups.values():
+                members.sort()
+                clusters.append({
+                    "submission_ids": members,
+                    "students": sorted({index["signatures"][member][0] for member in members}),
+                    "max_similarity": max(max(index["matches"][member].values()) for member in members)
+                })
+            clusters.sort(key=lambda cluster: (-len(cluster["students"]), -cluster["max_similarity"]))
+            return clusters
+
+    def load(self, rows):
+        """Rebuild the index from stored (id, assignment, student_id, signature bytes) rows"""
+        count = 0
+        for submission_id, assignment, student_id, signature in rows:
+            self.add(assignment, submission_id, student_id, array("I", bytes(signature)))
+            count += 1
+        logger.info(f"Loaded {count} submission signatures into the similarity index")
+
+    def size(self, assignment):
+        with self.lock:
+            index = self.assignments.get(assignment)
+            return len(index["signatures"]) if index else 0
+
+similarity_index = SimilarityIndex()
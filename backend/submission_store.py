@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "submissions.db")
+
+# Group commit: the writer drains up to this many queued writes into one transaction
+MAX_BATCH_SIZE = 512
+MAX_PAGE_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submission_contents (
+    content_hash TEXT PRIMARY KEY,
+    code TEXT NOT NULL,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    assignment TEXT NOT NULL,
+    content_hash TEXT NOT NULL REFERENCES submission_contents(content_hash),
+    submitted_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS submissions_by_student ON submissions (student_id, assignment, id);
+CREATE INDEX IF NOT EXISTS submissions_by_assignment ON submissions (assignment, id);
+
+CREATE TABLE IF NOT EXISTS grades (
+    submission_id INTEGER PRIMARY KEY REFERENCES submissions(id),
+    status TEXT NOT NULL,  -- pending, graded or failed
+    score REAL,
+    passed INTEGER,
+    total INTEGER,
+    results TEXT,  -- JSON list of per-test results
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS grades_pending ON grades (status) WHERE status = 'pending';
+
+CREATE TABLE IF NOT EXISTS submission_signatures (
+    submission_id INTEGER PRIMARY KEY REFERENCES submissions(id),
+    assignment TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    signature BLOB NOT NULL  -- MinHash signature of the student-authored code
+);
+
+CREATE TABLE IF NOT EXISTS reference_outputs (
+    cache_key TEXT PRIMARY KEY,  -- Hash of the problem's reference solution, language and test input
+    result TEXT NOT NULL,  -- JSON: expected output (or return values) of the reference solution
+    execution_time REAL NOT NULL,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+def content_hash(code):
+    """Return the SHA-256 hex digest identifying a submission's code"""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+def _insert_submission(connection, student_id, assignment, code, digest, submitted_at, grade):
+    inserted = connection.execute(
+        "INSERT OR IGNORE INTO submission_contents (content_hash, code, size) VALUES (?, ?, ?)",
+        (digest, code, len(code))
+    ).rowcount
+    cursor = connection.execute(
+        "INSERT INTO submissions (student_id, assignment, content_hash, submitted_at) VALUES (?, ?, ?, ?)",
+        (student_id, assignment, digest, submitted_at)
+    )
+    if grade:
+        connection.execute("INSERT INTO grades (submission_id, status, updated_at) VALUES (?, 'pending', ?)",
+                           (cursor.lastrowid, submitted_at))
+    return {
+        "id": cursor.lastrowid,
+        "student_id": student_id,
+        "assignment": assignment,
+        "content_hash": digest,
+        "submitted_at": submitted_at,
+        "duplicate": inserted == 0
+    }
+
+def _update_grade(connection, submission_id, status, score, passed, total, results, attempts):
+    connection.execute(
+        """UPDATE grades SET status = ?, score = ?, passed = ?, total = ?, results = ?, attempts = ?, updated_at = ?
+           WHERE submission_id = ?""",
+        (status, score, passed, total, json.dumps(results) if results is not None else None, attempts,
+         time.time(), submission_id)
+    )
+
+def _insert_signature(connection, submission_id, assignment, student_id, signature):
+    connection.execute(
+        "INSERT OR REPLACE INTO submission_signatures (submission_id, assignment, student_id, signature) VALUES (?, ?, ?, ?)",
+        (submission_id, assignment, student_id, signature)
+    )
+
+def _insert_reference(connection, cache_key, result, execution_time):
+    connection.execute(
+        "INSERT OR REPLACE INTO reference_outputs (cache_key, result, execution_time, created_at) VALUES (?, ?, ?, ?)",
+        (cache_key, json.dumps(result), execution_time, time.time())
+    )
+
+class SubmissionStore:
+    """SQLite-backed submission log written by a single group-committing writer thread"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.pending = queue.Queue()
+        self.local = threading.local()
+        self.writer = None
+        self.start_lock = threading.Lock()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only fsyncs at checkpoints; a committed batch survives a process crash
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+
+    def start(self):
+        """Create the database if needed and start the writer thread"""
+        with self.start_lock:
+            if self.writer is not None:
+                return
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            connection = self._connect()
+            connection.executescript(SCHEMA)
+            self.writer = threading.Thread(target=self._write_loop, args=(connection,),
+                                           name="submission-writer", daemon=True)
+            self.writer.start()
+
+    def _enqueue(self, operation, *args):
+        """Run operation(connection, *args) in the writer's next transaction; returns a Future"""
+        self.start()
+        future = Future()
+        self.pending.put((operation, args, future))
+        return future
+
+    def submit(self, student_id, assignment, code, grade=False):
+        """Queue a submission; the returned Future resolves to its stored record.
+        
+        With grade=True a pending grade is recorded in the same transaction. Raises ValueError
+        at once for code that can not be stored (not a string, or not encodable as UTF-8).
+        """
+        if not isinstance(code, str):
+            raise ValueError("code must be a string")
+        try:
+            digest = content_hash(code)
+        except UnicodeEncodeError as e:
+            raise ValueError(f"code is not valid Unicode text: {str(e)}")
+        return self._enqueue(_insert_submission, student_id, assignment, code, digest, time.time(), grade)
+
+    def record_grade(self, submission_id, status, score=None, passed=None, total=None, results=None, attempts=0):
+        """Queue an update of a submission's grade; returns a Future"""
+        return self._enqueue(_update_grade, submission_id, status, score, passed, total, results, attempts)
+
+    def record_signature(self, submission_id, assignment, student_id, signature):
+        """Queue storing a submission's similarity signature (bytes); returns a Future"""
+        return self._enqueue(_insert_signature, submission_id, assignment, student_id, signature)
+
+    def record_reference(self, cache_key, result, execution_time):
+        """Queue caching a reference solution's result for one test; returns a Future"""
+        return self._enqueue(_insert_reference, cache_key, result, execution_time)
+
+    def _write_loop(self, connection):
+        while True:
+            batch = [self.pending.get()]
+            while len(batch) < MAX_BATCH_SIZE:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            # Each operation runs under its own savepoint, so one that fails is rolled back alone
+            # and the rest of the batch still commits
+            succeeded = []
+            try:
+                connection.execute("BEGIN")
+                for operation, args, future in batch:
+                    connection.execute("SAVEPOINT operation")
+                    try:
+                        result = operation(connection, *args)
+                    except Exception as e:
+                        connection.execute("ROLLBACK TO operation")
+                        connection.execute("RELEASE operation")
+                        logger.error(f"Failed to write {operation.__name__}: {str(e)}")
+                        future.set_exception(e)
+                        continue
+                    connection.execute("RELEASE operation")
+                    succeeded.append((future, result))
+                connection.commit()
+            except Exception as e:
+                logger.error(f"Failed to commit a batch of {len(batch)} operations: {str(e)}")
+                try:
+                    connection.rollback()
+                except sqlite3.Error:
+                    pass
+                for future, _ in succeeded:
+                    future.set_exception(e)
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for future, result in succeeded:
+                future.set_result(result)
+
+    def _reader(self):
+        # Readers get one connection per thread; WAL lets them run alongside the writer
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            self.start()
+            connection = self.local.connection = self._connect()
+        return connection
+
+    def list(self, student_id=None, assignment=None, before_id=None, limit=50):
+        """Return one page of submissions (newest first, without code) and the cursor for the next"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if student_id is not None:
+            clauses.append("s.student_id = ?")
+            params.append(student_id)
+        if assignment is not None:
+            clauses.append("s.assignment = ?")
+            params.append(assignment)
+        if before_id is not None:
+            clauses.append("s.id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._reader().execute(
+            f"""SELECT s.id, s.student_id, s.assignment, s.content_hash, s.submitted_at, c.size
+                FROM submissions s JOIN submission_contents c ON c.content_hash = s.content_hash
+                {where} ORDER BY s.id DESC LIMIT ?""",
+            params + [limit + 1]
+        ).fetchall()
+        submissions = [dict(row) for row in rows[:limit]]
+        next_before_id = submissions[-1]["id"] if len(rows) > limit else None
+        return {"submissions": submissions, "next_before_id": next_before_id}
+
+    def get(self, submission_id):
+        """Return a submission including its code, or None if it does not exist"""
+        row = self._reader().execute(
+            """SELECT s.id, s.student_id, s.assignment, s.content_hash, s.submitted_at, c.size, c.code
+               FROM submissions s JOIN submission_contents c ON c.content_hash = s.content_hash
+               WHERE s.id = ?""",
+            (submission_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get_grade(self, submission_id):
+        """Return a submission's grade, or None if it is not graded automatically"""
+        row = self._reader().execute("SELECT * FROM grades WHERE submission_id = ?", (submission_id,)).fetchone()
+        if row is None:
+            return None
+        grade = dict(row)
+        grade["results"] = json.loads(grade["results"]) if grade["results"] else None
+        return grade
+
+    def pending_grades(self):
+        """Return (id, assignment, code) for every submission still waiting to be graded"""
+        return [tuple(row) for row in self._reader().execute(
+            """SELECT s.id, s.assignment, c.code FROM grades g
+               JOIN submissions s ON s.id = g.submission_id
+               JOIN submission_contents c ON c.content_hash = s.content_hash
+               WHERE g.status = 'pending' ORDER BY s.id"""
+        )]
+
+    def get_reference(self, cache_key):
+        """Return (result, execution_time) cached for a reference run, or None"""
+        row = self._reader().execute(
+            "SELECT result, execution_time FROM reference_outputs WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        return (json.loads(row["result"]), row["execution_time"]) if row else None
+
+    def signatures(self):
+        """Yield (id, assignment, student_id, signature) for every indexed submission, oldest first"""
+        yield from self._reader().execute(
+            "SELECT submission_id, assignment, student_id, signature FROM submission_signatures ORDER BY submission_id"
+        )
+
+submission_store = SubmissionStore(os.environ.get("SUBMISSION_DB_PATH", DEFAULT_DB_PATH))
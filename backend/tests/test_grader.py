@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import grader as grader_module
+from grader import CalibrationError, Grader, judge_timeout, time_limit
+from problem_catalog import Problem
+from submission_store import SubmissionStore
+
+TEMPLATE = "def solve(n):\n    <editable>pass</editable>\n"
+REFERENCE = "def solve(n):\n    return n * 2\n"
+
+class FakeExecutionApi:
+    """Answers the grader's requests with canned responses and records what it was sent.
+
+    execute may also be a list of responses, served in order; the last one repeats.
+    """
+
+    def __init__(self, execute=None, judge=None):
+        self.execute = execute
+        self.judge = judge
+        self.requests = []
+
+    def __call__(self, request):
+        payload = json.loads(request.content)
+        self.requests.append((request.url.path, payload))
+        if request.url.path == "/create/assignment":
+            return httpx.Response(200, json={"status": "ready"})
+        response = self.judge if request.url.path == "/judge/function" else self.execute
+        if isinstance(response, list):
+            response = response.pop(0) if len(response) > 1 else response[0]
+        if isinstance(response, httpx.Response):
+            return response
+        return httpx.Response(200, json=response)
+
+def run_with_grader(api, tmp_path, scenario, catalog=None):
+    async def run():
+        grader = Grader(SubmissionStore(str(tmp_path / "submissions.db")), catalog)
+        grader.environment_lock = asyncio.Lock()
+        grader.client = httpx.AsyncClient(base_url="http://execution-api", transport=httpx.MockTransport(api))
+        try:
+            return await scenario(grader)
+        finally:
+            await grader.client.aclose()
+    return asyncio.run(run())
+
+def test_time_limits():
+    assert time_limit(0.01) == grader_module.MIN_TIME_LIMIT
+    assert time_limit(1.0) == 3.5
+    assert time_limit(100) == grader_module.MAX_TIME_LIMIT
+    assert judge_timeout([1.0, 1.0]) == grader_module.JUDGE_LOAD_ALLOWANCE + 2
+    assert judge_timeout([1.0] * 100) == grader_module.MAX_TIME_LIMIT
+
+def test_reference_output_on_stderr_does_not_fail_calibration(tmp_path):
+    problem = Problem("double", "/problems/double.py", TEMPLATE, 0, [{"stdin": "2\n"}], reference=REFERENCE)
+    api = FakeExecutionApi(execute={"output": "4\n", "error": "DeprecationWarning: ...", "exit_code": 0,
+                                    "execution_time": 0.2})
+    _, tests = run_with_grader(api, tmp_path, lambda grader: grader.calibrate(problem))
+    assert tests == [{"stdin": "2\n", "expected_output": "4\n", "time_limit": time_limit(0.2)}]
+
+def test_a_crashing_reference_fails_calibration(tmp_path):
+    problem = Problem("double", "/problems/double.py", TEMPLATE, 0, [{"stdin": "2\n"}], reference=REFERENCE)
+    api = FakeExecutionApi(execute={"output": "", "error": "", "exit_code": 1, "execution_time": 0.1})
+    with pytest.raises(CalibrationError, match="Exited with code 1"):
+        run_with_grader(api, tmp_path, lambda grader: grader.calibrate(problem))
+
+def test_judge_specs_get_a_limit_per_case(tmp_path):
+    spec = {"function": "solve", "cases": [{"args": [1]}, {"args": [2], "time_limit": 5.0}]}
+    problem = Problem("double", "/problems/double.py", TEMPLATE, 0, spec, reference=REFERENCE)
+    api = FakeExecutionApi(judge={"error": "", "results": [
+        {"actual": 2, "error": None, "time": 0.001},
+        {"actual": 4, "error": None, "time": 2.0}
+    ]})
+    _, judge = run_with_grader(api, tmp_path, lambda grader: grader.calibrate(problem))
+    assert judge["cases"] == [{"args": [1], "expected": 2, "time_limit": grader_module.MIN_TIME_LIMIT},
+                              {"args": [2], "expected": 4, "time_limit": 5.0}]
+    # Loading the submission is not squeezed into the cases' own limits
+    assert judge["timeout"] == grader_module.JUDGE_LOAD_ALLOWANCE + grader_module.MIN_TIME_LIMIT + 5.0
+
+def test_judge_calibration_is_cached(tmp_path):
+    spec = {"function": "solve", "cases": [{"args": [1]}]}
+    problem = Problem("double", "/problems/double.py", TEMPLATE, 0, spec, reference=REFERENCE)
+    api = FakeExecutionApi(judge={"error": "", "results": [{"actual": 2, "error": None, "time": 0.5}]})
+    async def calibrate_twice(grader):
+        first = await grader.calibrate(problem)
+        second = await grader.calibrate(problem)
+        return first, second, grader.stats["reference_runs"]
+    first, second, reference_runs = run_with_grader(api, tmp_path, calibrate_twice)
+    assert first == second and reference_runs == 1
+    assert [path for path, _ in api.requests].count("/judge/function") == 1
+
+PASSING = {"output": "4\n", "error": "", "exit_code": 0, "execution_time": 0.1,
+           "comparison": {"passed": True, "terminated_early": False}}
+
+def grade(api, tmp_path, tests):
+    problem = Problem("double", "/problems/double.py", TEMPLATE, 0, tests)
+    async def scenario(grader):
+        submission_id = (await asyncio.wrap_future(grader.store.submit("alice", "double", "code", grade=True)))["id"]
+        await grader._grade(submission_id, "double", "code")
+        return grader.store.get_grade(submission_id), grader.stats
+    return run_with_grader(api, tmp_path, scenario, catalog={"double": problem})
+
+def test_grades_record_the_fraction_of_passed_tests(tmp_path):
+    failing = dict(PASSING, comparison={"passed": False, "terminated_early": True})
+    api = FakeExecutionApi(execute=[PASSING, failing])
+    record, stats = grade(api, tmp_path, [{"stdin": "2\n", "expected_output": "4\n"},
+                                          {"stdin": "3\n", "expected_output": "6\n"}])
+    assert (record["status"], record["score"], record["passed"], record["total"]) == ("graded", 0.5, 1, 2)
+    assert stats["graded"] == 1
+
+def test_transient_failures_are_retried_and_shedding_is_not_an_attempt(tmp_path, monkeypatch):
+    monkeypatch.setattr(grader_module, "GRADING_RETRY_DELAY", 0)
+    shed = httpx.Response(503, headers={"Retry-After": "0"}, json={"detail": "overloaded"})
+    api = FakeExecutionApi(execute=[shed, shed, httpx.Response(500), PASSING])
+    record, stats = grade(api, tmp_path, [{"stdin": "2\n", "expected_output": "4\n"}])
+    assert record["status"] == "graded" and record["attempts"] == 2
+    assert (stats["deferred"], stats["retries"]) == (2, 1)
+
+def test_persistent_failures_fail_the_grade(tmp_path, monkeypatch):
+    monkeypatch.setattr(grader_module, "GRADING_RETRY_DELAY", 0)
+    record, _ = grade(FakeExecutionApi(execute=[httpx.Response(500)]), tmp_path,
+                      [{"stdin": "2\n", "expected_output": "4\n"}])
+    assert record["status"] == "failed" and record["attempts"] == grader_module.GRADING_MAX_ATTEMPTS
+    rejected = httpx.Response(422, json={"detail": "code is too large"})
+    record, _ = grade(FakeExecutionApi(execute=[rejected]), tmp_path / "rejected",
+                      [{"stdin": "2\n", "expected_output": "4\n"}])
+    assert record["status"] == "failed" and record["attempts"] == 1
+    assert "code is too large" in record["results"][0]["error"]
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from problem_catalog import Problem, ProblemCatalog, TemplateMismatch, parse_template
+
+TEMPLATE = """def prefix_sum(values):
+    <editable>pass</editable>
+
+def main():
+<editable>    print(prefix_sum([1, 2, 3]))
+</editable>
+main()
+"""
+
+def make_problem(code=TEMPLATE, tests=None):
+    return Problem("prefix-sum", "/problems/prefix-sum.py", code, 0, tests)
+
+def test_parse_template_strips_tags_and_records_regions():
+    starter, regions = parse_template(TEMPLATE)
+    assert "<editable>" not in starter
+    assert [starter[r["start"]:r["end"]] for r in regions] == ["pass", "    print(prefix_sum([1, 2, 3]))\n"]
+    assert [(r["start_line"], r["end_line"]) for r in regions] == [(2, 2), (5, 6)]
+
+def test_splice_and_extract_round_trip():
+    problem = make_problem()
+    regions = ["return [sum(values[:i + 1]) for i in range(len(values))]", "    print(prefix_sum([4]))\n"]
+    code = problem.splice(regions)
+    assert code.startswith("def prefix_sum(values):\n    return [")
+    assert problem.extract_regions(code) == regions
+    assert problem.extract_regions(problem.starter_code) == ["pass", "    print(prefix_sum([1, 2, 3]))\n"]
+
+def test_extract_accepts_the_template_with_tags_left_in():
+    problem = make_problem()
+    assert problem.extract_regions(TEMPLATE) == ["pass", "    print(prefix_sum([1, 2, 3]))\n"]
+
+def test_edits_outside_the_regions_are_rejected():
+    problem = make_problem()
+    with pytest.raises(TemplateMismatch):
+        problem.extract_regions(problem.starter_code.replace("def main", "def start"))
+    with pytest.raises(TemplateMismatch):
+        problem.extract_regions(problem.starter_code + "print('extra')\n")
+    with pytest.raises(TemplateMismatch):
+        problem.splice(["only one region"])
+
+def test_tests_are_split_into_stdin_tests_and_judge_specs():
+    stdin_tests = [{"stdin": "1\n", "expected_output": "1\n"}]
+    judge = {"function": "prefix_sum", "cases": [{"args": [[1]], "expected": [1]}]}
+    assert make_problem(tests=stdin_tests).summary()["tests"] == 1
+    judged = make_problem(tests=judge)
+    assert judged.judge == judge and judged.tests == [] and judged.gradable
+    assert not make_problem().gradable
+
+def test_catalog_reloads_changed_templates_and_keeps_previous_versions(tmp_path):
+    (tmp_path / "prefix-sum.py").write_text(TEMPLATE)
+    (tmp_path / "prefix-sum.tests.json").write_text(json.dumps([{"stdin": "", "expected_output": "6\n"}]))
+    (tmp_path / "prefix-sum.reference.py").write_text("print(6)\n")
+    catalog = ProblemCatalog(str(tmp_path))
+    catalog.reload()
+    first = catalog.get("prefix-sum")
+    assert first.reference == "print(6)\n" and len(first.tests) == 1
+    assert catalog.get("prefix-sum-problem") is first  # Legacy alias
+    assert set(catalog.problems) == {"prefix-sum"}  # The reference solution is not a problem
+
+    catalog.reload()
+    assert catalog.get("prefix-sum") is first  # Unchanged files are not re-parsed
+
+    (tmp_path / "prefix-sum.py").write_text(TEMPLATE.replace("main()\n", "main()  # run\n"))
+    catalog.reload()
+    second = catalog.get("prefix-sum")
+    assert second.version != first.version
+    assert catalog.get_version("prefix-sum", first.version) is first
+    assert catalog.get_version("prefix-sum", second.version) is second
+
+    (tmp_path / "prefix-sum.py").unlink()
+    catalog.reload()
+    assert catalog.get("prefix-sum") is None
@@ -0,0 +1,96 @@
+from array import array
+
+from similarity import (NUM_PERMUTATIONS, SimilarityIndex, estimated_similarity, minhash, normalize_tokens,
+                        signature_for)
+
+SOLUTION = """
+def prefix_sum(values):
+    total = 0
+    result = []
+    for value in values:
+        total += value
+        result.append(total)
+    return result
+
+def main():
+    numbers = [int(x) for x in input().split()]
+    print(" ".join(str(x) for x in prefix_sum(numbers)))
+"""
+
+# The same program with renamed identifiers, new comments and different formatting
+RENAMED = """
+def prefix_sum(xs):  # running totals
+    acc = 0
+    out = []
+    for x in xs:
+        acc += x
+        out.append(acc)
+    return out
+
+
+def main():
+    nums = [int(t) for t in input().split()]
+    print(" ".join(str(t) for t in prefix_sum(nums)))
+"""
+
+UNRELATED = """
+import heapq
+
+def dijkstra(graph, source):
+    distances = {source: 0}
+    queue = [(0, source)]
+    while queue:
+        distance, node = heapq.heappop(queue)
+        if distance > distances.get(node, float("inf")):
+            continue
+        for neighbour, weight in graph[node]:
+            candidate = distance + weight
+            if candidate < distances.get(neighbour, float("inf")):
+                distances[neighbour] = candidate
+                heapq.heappush(queue, (candidate, neighbour))
+    return distances
+"""
+
+def test_normalization_hides_identifiers_literals_and_comments():
+    assert normalize_tokens(SOLUTION, "python") == normalize_tokens(RENAMED, "python")
+    assert normalize_tokens("int a = 1; // x", "cpp") == normalize_tokens("int b = 2; /* y */", "cpp")
+
+def test_unfinished_python_still_gets_a_signature():
+    assert len(minhash("def f(:\n    '''unterminated", "python")) == NUM_PERMUTATIONS
+
+def test_signatures_are_deterministic_and_estimate_similarity():
+    assert minhash(SOLUTION, "python") == minhash(SOLUTION, "python")
+    assert estimated_similarity(minhash(SOLUTION, "python"), minhash(RENAMED, "python")) == 1.0
+    assert estimated_similarity(minhash(SOLUTION, "python"), minhash(UNRELATED, "python")) < 0.3
+
+def test_signature_for_uses_only_the_editable_regions():
+    regions = ["    return sorted(values)\n"]
+    assert signature_for("template " + SOLUTION, "python", regions) == signature_for(UNRELATED, "python", regions)
+
+def test_index_matches_near_duplicates_across_students_only():
+    index = SimilarityIndex()
+    assert index.add("a", 1, "alice", minhash(SOLUTION, "python")) == {}
+    assert index.add("a", 2, "alice", minhash(RENAMED, "python")) == {}  # Resubmission by the same student
+    assert index.add("a", 3, "bob", minhash(RENAMED, "python")) == {1: 1.0, 2: 1.0}
+    assert index.add("a", 4, "carol", minhash(UNRELATED, "python")) == {}
+    assert index.add("b", 5, "dave", minhash(SOLUTION, "python")) == {}  # Other assignment
+    assert index.similar("a", 1) == {3: 1.0}
+    assert index.size("a") == 4
+
+def test_clusters_group_connected_matches():
+    index = SimilarityIndex()
+    index.add("a", 1, "alice", minhash(SOLUTION, "python"))
+    index.add("a", 2, "bob", minhash(RENAMED, "python"))
+    index.add("a", 3, "carol", minhash(UNRELATED, "python"))
+    index.add("a", 4, "dave", minhash(UNRELATED, "python"))
+    clusters = index.clusters("a")
+    assert [cluster["submission_ids"] for cluster in clusters] == [[1, 2], [3, 4]]
+    assert clusters[0]["students"] == ["alice", "bob"]
+
+def test_load_rebuilds_from_stored_rows():
+    index = SimilarityIndex()
+    rows = [(1, "a", "alice", minhash(SOLUTION, "python").tobytes()),
+            (2, "a", "bob", minhash(RENAMED, "python").tobytes())]
+    index.load(rows)
+    assert index.similar("a", 2) == {1: 1.0}
+    assert isinstance(index.assignments["a"]["signatures"][1][1], array)
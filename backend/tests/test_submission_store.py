@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from submission_store import SubmissionStore, content_hash
+
+@pytest.fixture
+def store(tmp_path):
+    return SubmissionStore(str(tmp_path / "data" / "submissions.db"))
+
+def test_submit_and_read_back(store):
+    record = store.submit("alice", "prefix-sum", "print(1)\n", grade=True).result(timeout=5)
+    assert record["content_hash"] == content_hash("print(1)\n")
+    assert not record["duplicate"]
+    stored = store.get(record["id"])
+    assert stored["code"] == "print(1)\n" and stored["student_id"] == "alice"
+    assert store.get_grade(record["id"])["status"] == "pending"
+    assert store.pending_grades() == [(record["id"], "prefix-sum", "print(1)\n")]
+
+def test_identical_code_is_stored_once(store):
+    first = store.submit("alice", "a", "x = 1").result(timeout=5)
+    second = store.submit("bob", "a", "x = 1").result(timeout=5)
+    assert second["duplicate"] and second["content_hash"] == first["content_hash"]
+    assert store.get(second["id"])["code"] == "x = 1"
+    assert store.get_grade(first["id"]) is None  # Not graded automatically
+
+def test_list_pages_newest_first(store):
+    ids = [store.submit("alice", "a", f"v = {i}").result(timeout=5)["id"] for i in range(5)]
+    store.submit("bob", "a", "v = 0").result(timeout=5)
+    page = store.list(student_id="alice", limit=2)
+    assert [s["id"] for s in page["submissions"]] == ids[:-3:-1]
+    rest = store.list(student_id="alice", before_id=page["next_before_id"], limit=10)
+    assert [s["id"] for s in rest["submissions"]] == ids[-3::-1]
+    assert rest["next_before_id"] is None
+
+def test_record_grade(store):
+    submission_id = store.submit("alice", "a", "pass", grade=True).result(timeout=5)["id"]
+    store.record_grade(submission_id, "graded", score=0.5, passed=1, total=2,
+                       results=[{"passed": True}, {"passed": False}], attempts=1).result(timeout=5)
+    grade = store.get_grade(submission_id)
+    assert grade["status"] == "graded" and grade["score"] == 0.5
+    assert grade["results"] == [{"passed": True}, {"passed": False}]
+
+def test_reference_cache(store):
+    assert store.get_reference("key") is None
+    store.record_reference("key", ["1\n"], 0.25).result(timeout=5)
+    assert store.get_reference("key") == (["1\n"], 0.25)
+
+def test_signatures_round_trip(store):
+    submission_id = store.submit("alice", "a", "pass").result(timeout=5)["id"]
+    store.record_signature(submission_id, "a", "alice", b"\x01\x02").result(timeout=5)
+    assert [tuple(row) for row in store.signatures()] == [(submission_id, "a", "alice", b"\x01\x02")]
+
+def test_unstorable_code_is_rejected_before_queueing(store):
+    with pytest.raises(ValueError):
+        store.submit("alice", "a", None)
+    with pytest.raises(ValueError):
+        store.submit("alice", "a", "\ud800")
+    assert store.pending.empty()
+
+def test_a_failing_operation_does_not_fail_the_rest_of_its_batch(store):
+    def failing(connection):
+        connection.execute("INSERT INTO no_such_table VALUES (1)")
+    # Hold the writer inside one operation so the next three writes are drained into one transaction
+    resume = threading.Event()
+    blocker = store._enqueue(lambda connection: resume.wait(5))
+    futures = [store.submit("alice", "a", "one"), store._enqueue(failing), store.submit("bob", "a", "two")]
+    resume.set()
+    blocker.result(timeout=5)
+    first, failed, last = (future.exception(timeout=5) for future in futures)
+    assert first is None and last is None
+    assert failed is not None
+    assert store.get(futures[0].result()["id"])["code"] == "one"
+    assert store.get(futures[2].result()["id"])["code"] == "two"
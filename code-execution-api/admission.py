@@ -0,0 +1,234 @@
+# admission.py
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger("code_execution_api")
+
+SAMPLE_INTERVAL = 0.5  # Seconds between reads of the host's pressure signals
+# Executions running at once; 0 derives it from the cores available (two per core budget)
+MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "0"))
+MAX_QUEUED = int(os.environ.get("ADMISSION_MAX_QUEUED", "200"))
+# Seconds a request may wait for admission before it is shed; batch work is shed sooner and retried later
+QUEUE_TIMEOUT = {"interactive": 10.0, "batch": 2.0}
+PRIORITIES = tuple(QUEUE_TIMEOUT)
+# Interactive (WebSocket) sessions mostly wait on their user for up to minutes, so they are counted
+# against their own limit rather than holding one of the execution slots above
+MAX_INTERACTIVE_SESSIONS = int(os.environ.get("ADMISSION_MAX_INTERACTIVE_SESSIONS", "32"))
+SESSION_RETRY_AFTER = 30  # Seconds a refused session should wait; sessions free up slowly
+
+# (busy, overloaded) thresholds per signal. When busy, only interactive work is admitted;
+# when overloaded, nothing new starts until running work finishes
+PRESSURE_THRESHOLDS = {
+    "cpu_pressure": (40.0, 75.0),  # % of time some runnable task waited for a CPU (PSI, last 10s)
+    "memory_pressure": (5.0, 20.0),  # % of time all tasks stalled on memory (PSI, last 10s)
+    "run_queue_per_core": (1.5, 3.0)  # Runnable tasks per core, smoothed
+}
+MIN_AVAILABLE_MEMORY = (int(os.environ.get("ADMISSION_BUSY_MEMORY_BYTES", str(1024 * 1024 * 1024))),
+                        int(os.environ.get("ADMISSION_MIN_MEMORY_BYTES", str(256 * 1024 * 1024))))
+LEVELS = ("ok", "busy", "overloaded")
+
+class AdmissionRejected(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _read_pressure(resource, line_kind):
+    # /proc/pressure/{cpu,memory}: "some avg10=1.23 avg60=... total=..." and "full ..."
+    try:
+        with open(f"/proc/pressure/{resource}", "r") as f:
+            for line in f:
+                fields = line.split()
+                if fields and fields[0] == line_kind:
+                    return float(fields[1].split("=")[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def _read_procs_running():
+    try:
+        with open("/proc/stat", "r") as f:
+            for line in f:
+                if line.startswith("procs_running"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _read_available_memory():
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+class AdmissionController:
+    """Admits, queues or sheds executions based on live host pressure and the number in flight.
+
+    Signals that are unavailable (e.g. no PSI outside Linux) are ignored, leaving the in-flight limit.
+    """
+
+    def __init__(self, max_in_flight, cores):
+        self.limit = max_in_flight  # Upper bound for set_capacity
+        self.max_in_flight = max_in_flight
+        self.cores = cores
+        self.in_flight = 0
+        self.waiters = deque()  # (priority, future) in arrival order
+        self.loop = None
+        self.signals = {}
+        self.level = "ok"
+        self.run_queue = None
+        self.service_time = 1.0  # Smoothed seconds per admitted request, for Retry-After estimates
+        self.stats = {"admitted": 0, "queued": 0, "shed": 0}
+
+    def sample(self):
+        """Read the pressure signals and work out the current load level"""
+        procs_running = _read_procs_running()
+        if procs_running is not None:
+            # procs_running counts this sampler too; smooth it, it is an instantaneous value
+            runnable = max(0, procs_running - 1) / self.cores
+            self.run_queue = runnable if self.run_queue is None else 0.7 * self.run_queue + 0.3 * runnable
+        signals = {
+            "cpu_pressure": _read_pressure("cpu", "some"),
+            "memory_pressure": _read_pressure("memory", "full"),
+            "run_queue_per_core": None if self.run_queue is None else round(self.run_queue, 2),
+            "available_memory": _read_available_memory()
+        }
+        level = 0
+        for name, thresholds in PRESSURE_THRESHOLDS.items():
+            if signals[name] is not None:
+                level = max([level] + [index + 1 for index, limit in enumerate(thresholds) if signals[name] >= limit])
+        if signals["available_memory"] is not None:
+            level = max([level] + [index + 1 for index, limit in enumerate(MIN_AVAILABLE_MEMORY)
+                                   if signals["available_memory"] < limit])
+        self.signals = signals
+        if LEVELS[level] != self.level:
+            logger.info(f"Host load level changed from {self.level} to {LEVELS[level]}: {signals}")
+        self.level = LEVELS[level]
+
+    def _sample_loop(self):
+        while True:
+            try:
+                self.sample()
+                if self.loop is not None and self.waiters:
+                    self.loop.call_soon_threadsafe(self._dispatch)
+            except Exception as e:
+                logger.error(f"Admission sampling error: {str(e)}")
+            time.sleep(SAMPLE_INTERVAL)
+
+    def start(self):
+        self.sample()
+        threading.Thread(target=self._sample_loop, name="admission-sampler", daemon=True).start()
+
+    def _allowed(self, priority):
+        if self.in_flight >= self.max_in_flight:
+            return False
+        if self.in_flight == 0:
+            return True  # Always keep one execution running so queued work drains
+        if self.level == "overloaded":
+            return False
+        return self.level == "ok" or priority == "interactive"
+
+    def _dispatch(self):
+        # Admit waiters in arrival order; interactive requests may pass batch work held back while busy
+        for entry in list(self.waiters):
+            priority, future = entry
+            if future.done():
+                self.waiters.remove(entry)
+            elif self._allowed(priority):
+                self.waiters.remove(entry)
+                self.in_flight += 1
+                future.set_result(None)
+            elif self.in_flight >= self.max_in_flight:
+                break
+
+    def retry_after(self):
+        """Seconds a shed client should wait before trying again"""
+        backlog = (len(self.waiters) + self.in_flight + 1) / self.max_in_flight
+        return max(1, min(30, math.ceil(backlog * self.service_time)))
+
+    async def admit(self, priority):
+        """Wait for a slot; raises AdmissionRejected if none frees up within the priority's queue timeout"""
+        self.loop = asyncio.get_running_loop()
+        if not self.waiters and self._allowed(priority):
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return
+        if len(self.waiters) >= MAX_QUEUED:
+            self.stats["shed"] += 1
+            raise AdmissionRejected(f"Server is overloaded ({self.level}); too many requests queued",
+                                    self.retry_after())
+        future = self.loop.create_future()
+        self.waiters.append((priority, future))
+        self.stats["queued"] += 1
+        try:
+            await asyncio.wait_for(future, QUEUE_TIMEOUT[priority])
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # _dispatch granted the slot in the same loop iteration the timeout fired; keep it
+                self.stats["admitted"] += 1
+                return
+            try:
+                self.waiters.remove((priority, future))
+            except ValueError:
+                pass
+            self.stats["shed"] += 1
+            raise AdmissionRejected(f"Server is overloaded ({self.level}); no capacity within "
+                                    f"{QUEUE_TIMEOUT[priority]:g} seconds", self.retry_after())
+        except asyncio.CancelledError:
+            # The client went away; give back a slot granted just before
+            if future.done() and not future.cancelled():
+                self.release(0.0)
+            raise
+        self.stats["admitted"] += 1
+
+    def release(self, elapsed=None):
+        """Free the slot of a finished request; elapsed=None leaves the Retry-After estimate alone"""
+        self.in_flight -= 1
+        if elapsed is not None:
+            self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+        self._dispatch()
+
+    def set_capacity(self, max_in_flight):
+        """Change the in-flight limit (capped at the configured one); safe to call from any thread"""
+        self.max_in_flight = max(1, min(self.limit, max_in_flight))
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._dispatch)
+
+    def get_stats(self):
+        return dict(self.stats, level=self.level, signals=self.signals, in_flight=self.in_flight,
+                    queued_now=len(self.waiters), max_in_flight=self.max_in_flight)
+
+class SessionBudget:
+    """Counts long-lived sessions against their own limit, refusing new ones while the host is overloaded"""
+
+    def __init__(self, limit, controller):
+        self.limit = limit
+        self.controller = controller  # Supplies the host load level
+        self.active = 0
+        self.stats = {"admitted": 0, "shed": 0}
+
+    def acquire(self):
+        """Take a session slot; raises AdmissionRejected instead of waiting"""
+        if self.active >= self.limit:
+            self.stats["shed"] += 1
+            raise AdmissionRejected(f"Too many interactive sessions open (limit {self.limit})", SESSION_RETRY_AFTER)
+        if self.controller.level == "overloaded":
+            self.stats["shed"] += 1
+            raise AdmissionRejected("Server is overloaded; not starting new interactive sessions",
+                                    self.controller.retry_after())
+        self.active += 1
+        self.stats["admitted"] += 1
+
+    def release(self):
+        self.active -= 1
+
+    def get_stats(self):
+        return dict(self.stats, active=self.active, limit=self.limit)
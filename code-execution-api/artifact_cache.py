@@ -0,0 +1,165 @@
+# artifact_cache.py
+import os
+import shutil
+import tarfile
+import logging
+import tempfile
+import threading
+from environment_archive import _file_digest, _safe_members
+
+logger = logging.getLogger("code_execution_api")
+
+# Cache namespaces teachers can seed, and the variable pointing each library at its directory
+ARTIFACT_NAMESPACES = {
+    "huggingface": "HF_HOME",  # transformers, datasets and huggingface_hub (hub/, datasets/)
+    "torch": "TORCH_HOME",  # torch.hub and torchvision weights (hub/checkpoints/)
+    "keras": "KERAS_HOME",  # tensorflow.keras.applications weights (models/)
+    "nltk": "NLTK_DATA",  # NLTK corpora, tokenizers and taggers
+    "sentence_transformers": "SENTENCE_TRANSFORMERS_HOME"
+}
+
+# Set once the Hugging Face cache is seeded: load from it, never download into the shared copy
+HUGGINGFACE_OFFLINE = {"HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1", "HF_DATASETS_OFFLINE": "1"}
+
+class ArtifactCache:
+    """Shared, read-only cache of model weights and corpora seeded from archives.
+
+    Every file is stored once under blobs/ by SHA-256 and hard-linked into the namespace
+    directories, so the same weights shipped in several archives (or several namespaces) take
+    disk space and page cache once. Executions only receive environment variables pointing at it.
+    Everything is owned by the API and files are mode 0444, so the cache is read-only to
+    submissions running as RUN_AS_USER.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.lock = threading.Lock()  # Serializes seeding, removal and blob collection
+        self.variables = {}  # Environment variables for executions, for the seeded namespaces
+
+    def start(self):
+        """Remove staging directories left behind by an earlier run and compute the variables"""
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if name.startswith(".staging-"):
+                    shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        with self.lock:
+            self._refresh()
+
+    def _namespace_dir(self, namespace):
+        return os.path.join(self.root, namespace)
+
+    def _refresh(self):
+        variables = {}
+        for namespace, variable in ARTIFACT_NAMESPACES.items():
+            if os.path.isdir(self._namespace_dir(namespace)):
+                variables[variable] = self._namespace_dir(namespace)
+        if "HF_HOME" in variables:
+            variables.update(HUGGINGFACE_OFFLINE)
+        self.variables = variables
+
+    def _deduplicate(self, path):
+        # Replace a freshly extracted file with a hard link to its blob, adding the blob if new
+        digest = _file_digest(path)
+        blob_path = os.path.join(self.blob_dir, digest)
+        os.chmod(path, 0o444)
+        try:
+            os.link(path, blob_path)
+            return False
+        except FileExistsError:
+            if _file_digest(blob_path) != digest:
+                # Changed since it was stored; later seeds link the fresh copy instead
+                logger.error(f"Cached artifact {digest} was modified on disk; replacing it")
+                temp_path = blob_path + ".new"
+                os.link(path, temp_path)
+                os.replace(temp_path, blob_path)
+                return False
+            temp_path = path + ".dedup"
+            os.link(blob_path, temp_path)
+            os.replace(temp_path, path)
+            return True
+
+    def seed(self, namespace, archive_fileobj):
+        """Unpack a tar archive (optionally compressed) into a namespace, merging with its contents.
+
+        The archive is read as a stream. Files already in the cache are linked, not stored again.
+        """
+        if namespace not in ARTIFACT_NAMESPACES:
+            raise ValueError(f"Unknown artifact namespace '{namespace}'. "
+                             f"Supported namespaces: {', '.join(ARTIFACT_NAMESPACES)}")
+        with self.lock:
+            return self._seed(namespace, archive_fileobj)
+
+    def _seed(self, namespace, archive_fileobj):
+        os.makedirs(self.blob_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=f".staging-{namespace}-", dir=self.root)
+        try:
+            with tarfile.open(fileobj=archive_fileobj, mode="r|*") as tar:
+                for member in _safe_members(tar, staging_dir):
+                    if hasattr(tarfile, "data_filter"):
+                        tar.extract(member, staging_dir, filter="data")
+                    else:
+                        # Never take owners or modes from the archive: the files must stay the API's
+                        tar.extract(member, staging_dir, set_attrs=False)
+
+            files = duplicates = 0
+            for root, dirs, names in os.walk(staging_dir):
+                for name in names:
+                    path = os.path.join(root, name)
+                    if os.path.islink(path):
+                        continue  # e.g. Hugging Face snapshot links into its own blobs/
+                    files += 1
+                    duplicates += self._deduplicate(path)
+
+            # Move everything into place, replacing files of the same name one at a time, so
+            # executions running meanwhile see either the old or the new version of each file
+            namespace_dir = self._namespace_dir(namespace)
+            for root, dirs, names in os.walk(staging_dir):
+                target_root = os.path.join(namespace_dir, os.path.relpath(root, staging_dir))
+                os.makedirs(target_root, exist_ok=True)
+                for name in names:
+                    os.replace(os.path.join(root, name), os.path.join(target_root, name))
+            self._refresh()
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        self._collect()  # Files replaced by the new archive may have been the last users of their blobs
+        logger.info(f"Seeded artifact cache '{namespace}' with {files} files ({duplicates} already cached)")
+        return {"namespace": namespace, "files": files, "deduplicated": duplicates}
+
+    def remove(self, namespace):
+        """Drop a namespace and the blobs only it used; returns False if it was not seeded"""
+        with self.lock:
+            namespace_dir = self._namespace_dir(namespace)
+            if namespace not in ARTIFACT_NAMESPACES or not os.path.isdir(namespace_dir):
+                return False
+            # Executions stop seeing the namespace at once; the files go afterwards
+            removed_dir = tempfile.mkdtemp(prefix=f".staging-removed-{namespace}-", dir=self.root)
+            os.rename(namespace_dir, os.path.join(removed_dir, namespace))
+            self._refresh()
+            shutil.rmtree(removed_dir, ignore_errors=True)
+            self._collect()
+        return True
+
+    def _collect(self):
+        # A blob whose only link is its own name is no longer used by any namespace
+        try:
+            with os.scandir(self.blob_dir) as entries:
+                for entry in entries:
+                    if entry.stat(follow_symlinks=False).st_nlink == 1:
+                        os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+    def usage(self):
+        """Per-namespace file counts plus the deduplicated size of the whole cache"""
+        namespaces = {}
+        for namespace in ARTIFACT_NAMESPACES:
+            namespace_dir = self._namespace_dir(namespace)
+            if os.path.isdir(namespace_dir):
+                namespaces[namespace] = sum(len(names) for _, _, names in os.walk(namespace_dir))
+        try:
+            with os.scandir(self.blob_dir) as entries:
+                total = sum(entry.stat().st_size for entry in entries)
+        except FileNotFoundError:
+            total = 0
+        return {"namespaces": namespaces, "stored_bytes": total, "variables": dict(self.variables)}
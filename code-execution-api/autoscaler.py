@@ -0,0 +1,174 @@
+# autoscaler.py
+import os
+import math
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("code_execution_api")
+
+AUTOSCALE_INTERVAL = float(os.environ.get("AUTOSCALE_INTERVAL", "5"))
+WAIT_TARGET = float(os.environ.get("POOL_WAIT_TARGET_SECONDS", "0.5"))  # 90th percentile wait to stay under
+SCALE_DOWN_DELAY = float(os.environ.get("POOL_SCALE_DOWN_DELAY", "120"))  # Seconds of spare capacity before shrinking
+SLOT_MEMORY_BYTES = int(os.environ.get("POOL_SLOT_MEMORY_BYTES", str(256 * 1024 * 1024)))  # Free memory per added slot
+SLOT_TIMEOUT = float(os.environ.get("POOL_SLOT_TIMEOUT", "10"))  # Longest wait for a slot before shedding with 503
+MAX_EVENTS = 200
+
+class PoolBusy(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class ElasticPool:
+    """A resizable set of slots; callers block in slot() while all are in use, up to a deadline"""
+
+    def __init__(self, name, floor, ceiling):
+        self.name = name
+        self.floor = floor
+        self.ceiling = ceiling
+        self.size = floor
+        self.in_use = 0
+        self.waiting = 0
+        self.condition = threading.Condition()
+        self.waits = deque(maxlen=1000)  # Seconds callers waited for a slot since the last evaluation
+        self.peak = 0  # Most slots in use (plus waiters) since the last evaluation
+        self.hold_time = 1.0  # Smoothed seconds a slot is held, for Retry-After estimates
+        self.timeouts = 0
+
+    def retry_after(self):
+        """Seconds a shed caller should wait before trying again (call with the condition held)"""
+        backlog = (self.waiting + self.in_use + 1) / max(1, self.size)
+        return max(1, min(30, math.ceil(backlog * self.hold_time)))
+
+    @contextmanager
+    def slot(self, timeout=SLOT_TIMEOUT):
+        """Hold a slot for the duration of the block; raises PoolBusy if none frees up within timeout"""
+        start = time.monotonic()
+        deadline = start + timeout
+        with self.condition:
+            self.waiting += 1
+            self.peak = max(self.peak, self.in_use + self.waiting)
+            while self.in_use >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.waiting -= 1
+                    self.timeouts += 1
+                    self.waits.append(timeout)  # Counts towards the p90 so the autoscaler grows the pool
+                    raise PoolBusy(f"No {self.name} slot free within {timeout:g} seconds", self.retry_after())
+                self.condition.wait(remaining)
+            self.waiting -= 1
+            self.in_use += 1
+            self.waits.append(time.monotonic() - start)
+        acquired = time.monotonic()
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.in_use -= 1
+                self.hold_time = 0.8 * self.hold_time + 0.2 * (time.monotonic() - acquired)
+                self.condition.notify()
+
+    def resize(self, size):
+        with self.condition:
+            self.size = size
+            self.condition.notify_all()
+
+    def take_window(self):
+        """Return (90th percentile wait, peak demand, callers waiting now) and start a new window"""
+        with self.condition:
+            waits = sorted(self.waits)
+            self.waits.clear()
+            peak = max(self.peak, self.in_use + self.waiting)
+            self.peak = self.in_use + self.waiting
+            waiting = self.waiting
+        p90 = waits[min(len(waits) - 1, int(len(waits) * 0.9))] if waits else 0.0
+        return p90, peak, waiting
+
+def pool_limits(default_floor, default_ceiling, setting):
+    """Parse 'floor:ceiling' (e.g. POOL_LIMITS_PYTHON=2:32), falling back to the defaults"""
+    if not setting:
+        return default_floor, default_ceiling
+    floor, ceiling = (int(part) for part in setting.split(":"))
+    if not 1 <= floor <= ceiling:
+        raise ValueError(f"Invalid pool limits '{setting}': need 1 <= floor <= ceiling")
+    return floor, ceiling
+
+class Autoscaler:
+    """Periodically grows pools whose callers wait too long and shrinks pools with spare slots.
+
+    A pool grows when its 90th percentile wait exceeds WAIT_TARGET or callers are queued (in the
+    pool, or upstream while every slot is busy), in proportion to the backlog, as long as the host is not under pressure and has memory for the
+    new slots. It shrinks to its recent peak demand once that has stayed below its size for
+    SCALE_DOWN_DELAY seconds. on_resize() is called after every change.
+    """
+
+    def __init__(self, pools, host_state, on_resize=None):
+        self.pools = pools
+        self.host_state = host_state  # () -> (load level, available memory bytes or None, requests queued upstream)
+        self.on_resize = on_resize
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.peaks = {name: deque() for name in pools}  # name -> (time, peak demand) for the scale-down window
+
+    def _record(self, pool, size, reason):
+        event = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "pool": pool.name, "from": pool.size,
+                 "to": size, "reason": reason}
+        self.events.append(event)
+        logger.info(f"Resized pool '{pool.name}' from {pool.size} to {size}: {reason}")
+        pool.resize(size)
+
+    def evaluate(self):
+        """Run one scaling decision for every pool"""
+        level, available_memory, queued = self.host_state()
+        now = time.monotonic()
+        changed = False
+        for name, pool in self.pools.items():
+            p90, peak, waiting = pool.take_window()
+            if pool.in_use >= pool.size:
+                waiting += queued  # Requests held back upstream may be waiting for this pool
+            peaks = self.peaks[name]
+            peaks.append((now, peak))
+            while peaks and peaks[0][0] < now - SCALE_DOWN_DELAY:
+                peaks.popleft()
+
+            if (waiting or p90 > WAIT_TARGET) and pool.size < pool.ceiling:
+                if level != "ok":
+                    continue  # More concurrency would only slow everything down further
+                step = max(1, waiting, math.ceil(pool.size * 0.5) if p90 > WAIT_TARGET else 0)
+                if available_memory is not None:
+                    step = min(step, available_memory // SLOT_MEMORY_BYTES)
+                size = min(pool.ceiling, pool.size + step)
+                if size > pool.size:
+                    self._record(pool, size, f"{waiting} waiting, p90 wait {p90:.2f}s")
+                    changed = True
+                continue
+
+            # Only shrink once the pool has been oversized for the whole window
+            recent_peak = max(demand for _, demand in peaks)
+            window_full = now - peaks[0][0] >= SCALE_DOWN_DELAY - AUTOSCALE_INTERVAL
+            size = max(pool.floor, recent_peak)
+            if window_full and size < pool.size:
+                self._record(pool, size, f"peak demand {recent_peak} over {SCALE_DOWN_DELAY:g}s")
+                changed = True
+        if changed and self.on_resize is not None:
+            self.on_resize()
+
+    def _loop(self):
+        while True:
+            time.sleep(AUTOSCALE_INTERVAL)
+            try:
+                self.evaluate()
+            except Exception as e:
+                logger.error(f"Autoscaler error: {str(e)}")
+
+    def start(self):
+        threading.Thread(target=self._loop, name="pool-autoscaler", daemon=True).start()
+
+    def get_stats(self):
+        return {
+            "pools": {name: {"size": pool.size, "floor": pool.floor, "ceiling": pool.ceiling,
+                             "in_use": pool.in_use, "waiting": pool.waiting, "timeouts": pool.timeouts}
+                      for name, pool in self.pools.items()},
+            "events": list(self.events)
+        }
@@ -0,0 +1,274 @@
+# benchmark.py
+import os
+import re
+import json
+import math
+import time
+import threading
+import statistics
+import subprocess
+import logging
+from process_manager import run_process_group, session_kwargs, register_group, release_group
+
+logger = logging.getLogger("code_execution_api")
+
+MAX_ITERATIONS = 1000
+MAX_WARMUP = 100
+MAX_INPUT_SIZES = 20
+BENCHMARK_TIMEOUT = 60  # Seconds for the whole benchmark, warm-up and every input size included
+
+# Python harness: loads the submission once and times repeated calls inside a single interpreter
+PYTHON_HARNESS = r'''
+import gc
+import json
+import os
+import runpy
+import sys
+import time
+
+with open(sys.argv[1]) as f:
+    config = json.load(f)
+
+entry = config["entry"]
+sys.path.insert(0, os.path.dirname(entry))
+# Student output is irrelevant to the measurement and would only add pipe I/O noise
+sys.stdout = open(os.devnull, "w")
+
+def resolve(namespace, dotted_name):
+    parts = dotted_name.split(".")
+    target = namespace[parts[0]]
+    for part in parts[1:]:
+        if isinstance(target, type):
+            target = target()  # e.g. Solution.prefixSum -> Solution().prefixSum
+        target = getattr(target, part)
+    return target
+
+function = generator = None
+if config["function"]:
+    namespace = runpy.run_path(entry, run_name="__benchmark__")
+    function = resolve(namespace, config["function"])
+    if config["generator"]:
+        generator = resolve(namespace, config["generator"])
+
+results = []
+for size in config["sizes"] or [None]:
+    if function is not None:
+        args = generator(size) if generator is not None else ()
+        if not isinstance(args, tuple):
+            args = (args,)
+        run = lambda: function(*args)
+    else:
+        argv = [entry] + ([str(size)] if size is not None else [])
+        def run():
+            sys.argv = argv
+            try:
+                runpy.run_path(entry, run_name="__main__")
+            except SystemExit:
+                pass
+
+    for _ in range(config["warmup"]):
+        run()
+
+    gc.collect()
+    wall, cpu = [], []
+    for _ in range(config["iterations"]):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        run()
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+    results.append({"size": size, "wall": wall, "cpu": cpu})
+
+with open(config["results"], "w") as f:
+    json.dump(results, f)
+'''
+
+# JavaScript harness: same protocol as the Python harness, using hrtime and cpuUsage
+JAVASCRIPT_HARNESS = r'''
+const fs = require("fs");
+const path = require("path");
+
+const config = JSON.parse(fs.readFileSync(process.argv[2], "utf8"));
+const entry = path.resolve(config.entry);
+// Student output is irrelevant to the measurement and would only add pipe I/O noise
+for (const method of ["log", "info", "warn", "debug"]) console[method] = () => {};
+
+function resolve(root, parts) {
+  let target = root;
+  for (const part of parts) {
+    if (typeof target === "function" && /^class[\s{]/.test(Function.prototype.toString.call(target))) {
+      target = new target();  // e.g. Solution.prefixSum -> new Solution().prefixSum
+    }
+    const next = target[part];
+    target = typeof next === "function" ? next.bind(target) : next;
+  }
+  return target;
+}
+
+let fn = null;
+let generator = null;
+if (config.function) {
+  const roots = require(entry).__benchmark__;
+  fn = resolve(roots.target(), config.function.split(".").slice(1));
+  if (config.generator) generator = resolve(roots.generator(), config.generator.split(".").slice(1));
+}
+
+const results = [];
+for (const size of config.sizes.length ? config.sizes : [null]) {
+  let run;
+  if (fn) {
+    const args = generator ? [generator(size)] : [];
+    run = () => fn(...args);
+  } else {
+    run = () => {
+      delete require.cache[entry];
+      process.argv = [process.argv[0], entry].concat(size === null ? [] : [String(size)]);
+      require(entry);
+    };
+  }
+
+  for (let i = 0; i < config.warmup; i++) run();
+
+  if (global.gc) global.gc();
+  const wall = [];
+  const cpu = [];
+  for (let i = 0; i < config.iterations; i++) {
+    const cpuStart = process.cpuUsage();
+    const wallStart = process.hrtime.bigint();
+    run();
+    wall.push(Number(process.hrtime.bigint() - wallStart) / 1e9);
+    const cpuUsed = process.cpuUsage(cpuStart);
+    cpu.push((cpuUsed.user + cpuUsed.system) / 1e6);
+  }
+  results.push({ size, wall, cpu });
+}
+
+fs.writeFileSync(config.results, JSON.stringify(results));
+'''
+
+IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_$][A-Za-z0-9_$]*(\.[A-Za-z_$][A-Za-z0-9_$]*)*$")
+
+def validate_benchmark_options(language, function, generator, iterations, warmup, sizes):
+    """Raise ValueError if the benchmark options are not usable for the given language"""
+    if not 1 <= iterations <= MAX_ITERATIONS:
+        raise ValueError(f"iterations must be between 1 and {MAX_ITERATIONS}")
+    if not 0 <= warmup <= MAX_WARMUP:
+        raise ValueError(f"warmup must be between 0 and {MAX_WARMUP}")
+    if len(sizes) > MAX_INPUT_SIZES:
+        raise ValueError(f"At most {MAX_INPUT_SIZES} input sizes can be benchmarked at once")
+    for name in (function, generator):
+        if name and not IDENTIFIER_PATTERN.match(name):
+            raise ValueError(f"Invalid function name: {name}")
+    if generator and not function:
+        raise ValueError("input_generator requires function to be set")
+    if function and sizes and not generator:
+        raise ValueError("input_sizes with a function require an input_generator")
+    if function and language == "cpp":
+        raise ValueError("Function-level benchmarks are not supported for C++; benchmark the whole program instead")
+
+def javascript_export_footer(function, generator):
+    """Code appended to a JavaScript submission so the harness can reach its top-level names"""
+    target_root = function.split(".")[0]
+    generator_root = generator.split(".")[0] if generator else "null"
+    return (f"\nmodule.exports.__benchmark__ = {{ target: () => {target_root}, "
+            f"generator: () => {generator_root} }};\n")
+
+def run_in_process_benchmark(command, harness_source, harness_name, config, work_dir, env=None, cwd=None):
+    """Run a language harness once and return its raw per-iteration samples"""
+    harness_path = os.path.join(work_dir, harness_name)
+    config_path = os.path.join(work_dir, "__benchmark_config__.json")
+    results_path = os.path.join(work_dir, "__benchmark_results__.json")
+
+    with open(harness_path, "w") as f:
+        f.write(harness_source)
+    with open(config_path, "w") as f:
+        json.dump(dict(config, results=results_path), f)
+
+    result = run_process_group(
+        command + [harness_path, config_path],
+        timeout=BENCHMARK_TIMEOUT,
+        env=env,
+        cwd=cwd
+    )
+    if result.returncode != 0 or not os.path.exists(results_path):
+        raise RuntimeError(result.stderr or f"Benchmark exited with code {result.returncode}")
+
+    with open(results_path, "r") as f:
+        return json.load(f)
+
+def _run_with_cpu_time(command, env, cwd, timeout):
+    """Run a program once, returning (exit_code, cpu_seconds) from the child's own rusage"""
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, env=env, cwd=cwd, **session_kwargs())
+    register_group(process.pid, command)
+    if not hasattr(os, "wait4"):  # Windows
+        try:
+            process.wait(timeout=timeout)
+        finally:
+            release_group(process.pid, timed_out=process.returncode is None)
+        return process.returncode, None
+
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    try:
+        # wait4 reports usage for exactly this child, unaffected by other concurrent executions
+        _, status, usage = os.wait4(process.pid, 0)
+    finally:
+        timer.cancel()
+        release_group(process.pid, timed_out=timer.finished.is_set())
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if timer.finished.is_set() and process.returncode < 0:
+        raise subprocess.TimeoutExpired(command, timeout)
+    return process.returncode, usage.ru_utime + usage.ru_stime
+
+def run_process_benchmark(command, iterations, warmup, sizes, env=None, cwd=None):
+    """Benchmark a compiled program by running it repeatedly; samples include process startup"""
+    deadline = time.time() + BENCHMARK_TIMEOUT
+    results = []
+    for size in sizes or [None]:
+        run_command = command + ([str(size)] if size is not None else [])
+        wall, cpu = [], []
+        for i in range(warmup + iterations):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(command, BENCHMARK_TIMEOUT)
+            wall_start = time.perf_counter()
+            exit_code, cpu_time = _run_with_cpu_time(run_command, env, cwd, remaining)
+            elapsed = time.perf_counter() - wall_start
+            if exit_code != 0:
+                raise RuntimeError(f"Program exited with code {exit_code}")
+            if i >= warmup:
+                wall.append(elapsed)
+                cpu.append(cpu_time)
+        results.append({"size": size, "wall": wall, "cpu": cpu})
+    return results
+
+def summarize(samples):
+    """Reduce the raw samples for one input size to summary statistics (seconds)"""
+    wall = samples["wall"]
+    cpu = [c for c in samples["cpu"] if c is not None]
+    return {
+        "size": samples["size"],
+        "iterations": len(wall),
+        "min": round(min(wall), 9),
+        "median": round(statistics.median(wall), 9),
+        "mean": round(statistics.mean(wall), 9),
+        "stddev": round(statistics.stdev(wall), 9) if len(wall) > 1 else 0.0,
+        "max": round(max(wall), 9),
+        "cpu_median": round(statistics.median(cpu), 9) if cpu else None,
+        "cpu_mean": round(statistics.mean(cpu), 9) if cpu else None
+    }
+
+def scaling_exponent(summaries):
+    """Least-squares slope of log(median time) against log(input size), e.g. ~1 for O(n), ~2 for O(n^2)"""
+    points = [(math.log(s["size"]), math.log(s["median"]))
+              for s in summaries if s["size"] and s["size"] > 0 and s["median"] > 0]
+    if len(points) < 2:
+        return None
+    mean_x = statistics.mean(x for x, _ in points)
+    mean_y = statistics.mean(y for _, y in points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return round(covariance / variance, 3)
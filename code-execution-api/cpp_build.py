@@ -0,0 +1,179 @@
+# cpp_build.py
+import os
+import time
+import uuid
+import hashlib
+import threading
+import subprocess
+import logging
+from process_manager import run_process_group
+
+logger = logging.getLogger("code_execution_api")
+
+# In Docker, we know g++ is installed
+COMPILER = "g++"
+CXX_FLAGS = ["-std=c++17"]
+
+# Selectable build profiles: (compile flags, link flags). Each profile gets its own cached objects.
+BUILD_PROFILES = {
+    "debug": (["-O0"], []),  # Fastest compile, matches the historical bare g++ invocation
+    "release": (["-O2"], []),
+    "lto": (["-O2", "-flto"], ["-O2", "-flto"]),
+    "sanitize": (["-O1", "-g", "-fno-omit-frame-pointer", "-fsanitize=address,undefined"],
+                 ["-fsanitize=address,undefined"]),
+}
+DEFAULT_BUILD_PROFILE = "debug"
+
+SOURCE_EXTENSIONS = (".cpp", ".cc", ".cxx")
+HEADER_EXTENSIONS = (".h", ".hpp", ".hh", ".hxx", ".inl")
+
+def _collect_files(src_dir, extensions):
+    """Return sorted paths (relative to src_dir) of files with the given extensions"""
+    found = []
+    for root, _, files in os.walk(src_dir):
+        for name in files:
+            if name.endswith(extensions):
+                found.append(os.path.relpath(os.path.join(root, name), src_dir))
+    return sorted(found)
+
+def _hash_files(src_dir, rel_paths, digest):
+    """Feed the path and content of each file into digest"""
+    for rel_path in rel_paths:
+        digest.update(rel_path.encode("utf-8") + b"\0")
+        with open(os.path.join(src_dir, rel_path), "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+
+def compile_project(src_dir, cache_dir, output_file, profile=DEFAULT_BUILD_PROFILE, timeout=30):
+    """Compile every translation unit in src_dir and link them into output_file.
+
+    Each translation unit is compiled to an object file in cache_dir named by
+    the hash of the build profile flags, its own content and the content of
+    every header in the submission, so unchanged files are never recompiled.
+    Returns a dict with "success", "stderr", "compiled" and "reused".
+    """
+    if profile not in BUILD_PROFILES:
+        raise ValueError(f"Unknown build profile '{profile}'. Available profiles: {', '.join(BUILD_PROFILES)}")
+    compile_flags = CXX_FLAGS + BUILD_PROFILES[profile][0]
+    link_flags = BUILD_PROFILES[profile][1]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    deadline = time.time() + timeout
+
+    sources = _collect_files(src_dir, SOURCE_EXTENSIONS)
+    if not sources:
+        return {"success": False, "stderr": "No C++ source files found", "compiled": 0, "reused": 0}
+
+    # Any header change conservatively invalidates every translation unit
+    header_digest = hashlib.sha256()
+    _hash_files(src_dir, _collect_files(src_dir, HEADER_EXTENSIONS), header_digest)
+
+    objects = []
+    compiled = 0
+    reused = 0
+    for rel_path in sources:
+        digest = hashlib.sha256(" ".join([COMPILER] + compile_flags + link_flags).encode("utf-8"))
+        digest.update(header_digest.digest())
+        _hash_files(src_dir, [rel_path], digest)
+        object_file = os.path.join(cache_dir, f"{digest.hexdigest()}.o")
+
+        if os.path.exists(object_file):
+            # Touch so the environment store prunes the least recently used objects first
+            os.utime(object_file)
+            reused += 1
+        else:
+            # Compile to a unique name and rename so concurrent builds never see partial objects.
+            # Relative paths keep __FILE__ and diagnostics independent of the temp directory.
+            # Run as a process group so cc1plus and as die with the driver on timeout.
+            # Objects may legitimately exceed the workspace quota, so file sizes are not capped, and
+            # go to the shared object cache, so the compiler runs as the service's own user.
+            temp_object = f"{object_file}.{uuid.uuid4().hex}.tmp"
+            try:
+                result = run_process_group(
+                    [COMPILER] + compile_flags + [f"-fdebug-prefix-map={src_dir}=.", "-I", ".",
+                                                  "-c", rel_path, "-o", temp_object],
+                    max(deadline - time.time(), 1),
+                    cwd=src_dir,
+                    limit_file_size=False,
+                    as_run_user=False
+                )
+            except BaseException:
+                if os.path.exists(temp_object):
+                    os.unlink(temp_object)
+                raise
+            if result.returncode != 0:
+                if os.path.exists(temp_object):
+                    os.unlink(temp_object)
+                return {"success": False, "stderr": result.stderr, "compiled": compiled, "reused": reused}
+            os.replace(temp_object, object_file)
+            compiled += 1
+
+        objects.append(object_file)
+
+    link_result = run_process_group(
+        [COMPILER] + link_flags + objects + ["-o", output_file],
+        max(deadline - time.time(), 1),
+        limit_file_size=False,
+        as_run_user=False
+    )
+
+    logger.info(f"Built {output_file} ({profile}): {compiled} translation unit(s) compiled, {reused} reused from cache")
+    return {
+        "success": link_result.returncode == 0,
+        "stderr": link_result.stderr,
+        "compiled": compiled,
+        "reused": reused
+    }
+
+# Standard headers precompiled once and force-included for syntax checks
+PRECOMPILED_HEADERS = ["algorithm", "array", "cmath", "cstdio", "cstdlib", "cstring", "deque", "functional",
+                       "iomanip", "iostream", "map", "memory", "numeric", "queue", "set", "sstream", "stack",
+                       "string", "unordered_map", "unordered_set", "utility", "vector"]
+pch_lock = threading.Lock()
+
+def ensure_precompiled_header(pch_dir):
+    """Build (once) a precompiled header of common standard headers and return its header path"""
+    header_path = os.path.join(pch_dir, "common.h")
+    pch_path = header_path + ".gch"
+    with pch_lock:
+        if not os.path.exists(pch_path):
+            os.makedirs(pch_dir, exist_ok=True)
+            with open(header_path, "w") as f:
+                f.writelines(f"#include <{name}>\n" for name in PRECOMPILED_HEADERS)
+            temp_pch = f"{pch_path}.{uuid.uuid4().hex}.tmp"
+            command = ([COMPILER] + CXX_FLAGS + BUILD_PROFILES[DEFAULT_BUILD_PROFILE][0]
+                       + ["-x", "c++-header", header_path, "-o", temp_pch])
+            # The .gch is far larger than any quota and shared by every check
+            result = run_process_group(command, 120, limit_file_size=False, as_run_user=False)
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+            os.replace(temp_pch, pch_path)
+            logger.info(f"Built precompiled header {pch_path}")
+    return header_path
+
+def check_syntax(src_dir, pch_dir=None, timeout=30):
+    """Run the front end only (-fsyntax-only) over every translation unit in src_dir.
+
+    When pch_dir is given, common standard headers are force-included from a
+    precompiled header, so a missing #include of one of them is only reported
+    by the full compile. Returns the compiler diagnostics, or an empty string.
+    """
+    sources = _collect_files(src_dir, SOURCE_EXTENSIONS)
+    if not sources:
+        return "No C++ source files found"
+
+    pch_flags = []
+    if pch_dir is not None:
+        try:
+            pch_flags = ["-include", ensure_precompiled_header(pch_dir)]
+        except (subprocess.CalledProcessError, OSError) as e:
+            logger.warning(f"Could not build precompiled header, checking without it: {str(e)}")
+
+    result = run_process_group(
+        [COMPILER] + CXX_FLAGS + BUILD_PROFILES[DEFAULT_BUILD_PROFILE][0] + pch_flags
+        + ["-fsyntax-only", "-I", "."] + sources,
+        timeout,
+        cwd=src_dir,
+        limit_file_size=False
+    )
+    return result.stderr if result.returncode != 0 else ""
@@ -0,0 +1,77 @@
+# cpu_budget.py
+import os
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger("code_execution_api")
+
+# Cores each execution may use; its thread pools are sized to match
+CPU_CORES_PER_EXECUTION = max(1, int(os.environ.get("CPU_CORES_PER_EXECUTION", "1")))
+
+# Thread pool sizes read by BLAS/OpenMP (numpy, torch, scikit-learn), TensorFlow and Node's libuv
+THREAD_COUNT_VARIABLES = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS",
+                          "VECLIB_MAXIMUM_THREADS", "TF_NUM_INTRAOP_THREADS", "UV_THREADPOOL_SIZE")
+
+def _available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+class CoreAllocator:
+    """Hands each execution its own cores, sharing the least loaded ones once all are taken"""
+
+    def __init__(self, cores_per_execution=CPU_CORES_PER_EXECUTION):
+        self.cores = _available_cores()
+        self.cores_per_execution = min(cores_per_execution, len(self.cores))
+        self.load = {core: 0 for core in self.cores}  # core -> executions currently assigned to it
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def reserve(self):
+        """Context manager yielding the cores assigned to one execution"""
+        with self.lock:
+            cores = sorted(self.cores, key=lambda core: self.load[core])[:self.cores_per_execution]
+            for core in cores:
+                self.load[core] += 1
+        try:
+            yield cores
+        finally:
+            with self.lock:
+                for core in cores:
+                    self.load[core] -= 1
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "cores": len(self.cores),
+                "cores_per_execution": self.cores_per_execution,
+                "busy_cores": sum(1 for load in self.load.values() if load),
+                "oversubscribed_cores": sum(1 for load in self.load.values() if load > 1)
+            }
+
+def limit_threads(env, core_count):
+    """Size the thread pools of the libraries a program uses to its core budget"""
+    for variable in THREAD_COUNT_VARIABLES:
+        env[variable] = str(core_count)
+    env["TF_NUM_INTEROP_THREADS"] = "1"
+    return env
+
+@contextmanager
+def pinned(cores):
+    """Pin the calling thread to cores for the duration, so processes it starts inherit the affinity.
+
+    Setting it before the fork, rather than on the child afterwards, leaves no window in which the
+    program could start threads on other cores. A no-op where affinity is not supported.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cores)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+cpu_allocator = CoreAllocator()
@@ -0,0 +1,118 @@
+# environment_archive.py
+import os
+import json
+import hashlib
+import tarfile
+import logging
+
+logger = logging.getLogger("code_execution_api")
+
+# Read files in 1 MiB chunks so large wheels/binaries are never fully buffered
+CHUNK_SIZE = 1024 * 1024
+
+# Top-level entries that make up a portable environment
+ENVIRONMENT_ENTRIES = ["metadata.json", "venv", "node_modules", "package.json",
+                       "package-lock.json", "CMakeLists.txt", "startup_profile.json"]
+
+def _file_digest(path):
+    """Return the SHA-256 digest of a file, reading it in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def export_environment(assignment_dir, archive_path):
+    """Pack an assignment environment into a gzip-compressed tar archive.
+
+    Files with identical content (common in node_modules and site-packages)
+    are stored once and every further copy is written as a hard link entry.
+    Returns a summary of what was written.
+    """
+    seen = {}  # content digest -> archive name of the first copy
+    stats = {"files": 0, "deduplicated": 0, "bytes": 0}
+
+    # Stream mode ("w|gz") writes sequentially without seeking or buffering
+    with open(archive_path, "wb") as out, tarfile.open(fileobj=out, mode="w|gz") as tar:
+        for entry in ENVIRONMENT_ENTRIES:
+            entry_path = os.path.join(assignment_dir, entry)
+            if not os.path.lexists(entry_path):
+                continue
+
+            if os.path.isdir(entry_path) and not os.path.islink(entry_path):
+                walk = os.walk(entry_path)
+            else:
+                walk = [(assignment_dir, [], [entry])]
+
+            for root, dirs, files in walk:
+                dirs.sort()
+                rel_root = os.path.relpath(root, assignment_dir)
+                if rel_root != ".":
+                    tar.add(root, arcname=rel_root, recursive=False)
+
+                # os.walk lists symlinked directories under dirs but never descends into them
+                linked_dirs = [d for d in dirs if os.path.islink(os.path.join(root, d))]
+                for name in sorted(files) + sorted(linked_dirs):
+                    path = os.path.join(root, name)
+                    arcname = os.path.normpath(os.path.join(rel_root, name))
+                    info = tar.gettarinfo(path, arcname=arcname)
+
+                    if not info.isreg():
+                        # Symlinks (e.g. venv/bin/python, venv/lib64) are stored as-is
+                        tar.addfile(info)
+                        continue
+
+                    digest = _file_digest(path)
+                    if digest in seen:
+                        info.type = tarfile.LNKTYPE
+                        info.linkname = seen[digest]
+                        info.size = 0
+                        tar.addfile(info)
+                        stats["deduplicated"] += 1
+                    else:
+                        seen[digest] = arcname
+                        with open(path, "rb") as f:
+                            tar.addfile(info, f)
+                        stats["bytes"] += info.size
+                    stats["files"] += 1
+
+    stats["archive_size"] = os.path.getsize(archive_path)
+    logger.info(f"Exported environment {assignment_dir} to {archive_path}: {stats}")
+    return stats
+
+def _safe_members(tar, dest_dir):
+    """Yield archive members, rejecting anything that would escape dest_dir"""
+    dest_dir = os.path.realpath(dest_dir)
+    for member in tar:
+        target = os.path.realpath(os.path.join(dest_dir, member.name))
+        if os.path.commonpath([dest_dir, target]) != dest_dir:
+            raise ValueError(f"Archive member escapes environment directory: {member.name}")
+        if member.islnk():
+            link_target = os.path.realpath(os.path.join(dest_dir, member.linkname))
+            if os.path.commonpath([dest_dir, link_target]) != dest_dir:
+                raise ValueError(f"Archive hard link escapes environment directory: {member.name}")
+        if not (member.isreg() or member.isdir() or member.issym() or member.islnk()):
+            raise ValueError(f"Unsupported archive member type: {member.name}")
+        yield member
+
+def import_environment(archive_fileobj, dest_dir):
+    """Unpack an environment archive produced by export_environment into dest_dir.
+
+    The archive is read as a stream so it never has to fit in memory.
+    Returns the parsed metadata of the imported environment.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+
+    with tarfile.open(fileobj=archive_fileobj, mode="r|gz") as tar:
+        for member in _safe_members(tar, dest_dir):
+            if hasattr(tarfile, "tar_filter"):
+                tar.extract(member, dest_dir, filter="tar")
+            else:
+                tar.extract(member, dest_dir)
+
+    metadata_path = os.path.join(dest_dir, "metadata.json")
+    if not os.path.exists(metadata_path):
+        raise ValueError("Archive does not contain metadata.json")
+
+    with open(metadata_path, "r") as f:
+        return json.load(f)
@@ -0,0 +1,224 @@
+# environment_store.py
+import os
+import json
+import time
+import uuid
+import queue
+import shutil
+import logging
+import threading
+
+logger = logging.getLogger("code_execution_api")
+
+TRASH_DIR_NAME = ".trash"
+LAST_USED_FILE = ".last_used"
+
+# Global disk quota for all environments; 0 disables eviction
+ENVIRONMENT_QUOTA_BYTES = int(os.environ.get("ENVIRONMENT_QUOTA_BYTES", "0"))
+# Environments used more recently than this are never evicted
+EVICTION_MIN_IDLE_SECONDS = int(os.environ.get("EVICTION_MIN_IDLE_SECONDS", "3600"))
+EVICTION_INTERVAL = int(os.environ.get("EVICTION_INTERVAL", "300"))
+# Per-assignment cap on cached C++ object files, pruned least recently used first; 0 disables pruning
+OBJECT_CACHE_DIR = os.path.join("build", "objects")
+OBJECT_CACHE_QUOTA_BYTES = int(os.environ.get("OBJECT_CACHE_QUOTA_BYTES", str(512 * 1024 * 1024)))
+# Objects used more recently than this may be about to be linked, so they are never pruned
+OBJECT_MIN_IDLE_SECONDS = 300
+
+def disk_usage(path):
+    """Bytes allocated on disk under path, counting hard-linked files once"""
+    total = 0
+    seen_inodes = set()
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) in seen_inodes:
+                continue
+            seen_inodes.add((st.st_dev, st.st_ino))
+            total += getattr(st, "st_blocks", 0) * 512 or st.st_size
+    return total
+
+class EnvironmentStore:
+    """Disk accounting, LRU eviction and background deletion for assignment environments"""
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.trash_dir = os.path.join(base_dir, TRASH_DIR_NAME)
+        self.deletions = queue.Queue()
+        self.sizes = {}  # assignment name -> bytes, refreshed by the eviction loop
+        self.evictions = 0
+        self.objects_pruned = 0
+
+    def touch(self, assignment_dir):
+        """Record that an environment was just used"""
+        path = os.path.join(assignment_dir, LAST_USED_FILE)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            try:
+                open(path, "a").close()
+            except OSError:
+                pass  # The environment was removed meanwhile
+
+    def last_used(self, assignment_dir):
+        """Time an environment was last used (falls back to when its metadata was written)"""
+        for name in (LAST_USED_FILE, "metadata.json"):
+            try:
+                return os.path.getmtime(os.path.join(assignment_dir, name))
+            except OSError:
+                continue
+        return 0.0
+
+    def remove(self, path):
+        """Move path out of the way instantly and delete it on the background thread"""
+        os.makedirs(self.trash_dir, exist_ok=True)
+        trash_path = os.path.join(self.trash_dir, f"{os.path.basename(path)}-{uuid.uuid4().hex}")
+        os.rename(path, trash_path)
+        self.deletions.put(trash_path)
+
+    def _deletion_loop(self):
+        while True:
+            path = self.deletions.get()
+            try:
+                shutil.rmtree(path)
+                logger.info(f"Deleted {path} in the background")
+            except Exception as e:
+                logger.error(f"Background deletion of {path} failed: {str(e)}")
+
+    def evict(self, name):
+        """Drop an environment's files but keep its metadata so it can be re-provisioned on next use"""
+        assignment_dir = os.path.join(self.base_dir, name)
+        with open(os.path.join(assignment_dir, "metadata.json"), "r") as f:
+            metadata = json.load(f)
+
+        # Build the stub next to the environment, then swap it in with two renames
+        stub_dir = os.path.join(self.base_dir, f".evicting-{name}-{uuid.uuid4().hex}")
+        os.makedirs(stub_dir)
+        metadata.pop("fingerprint", None)
+        metadata["evicted_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        with open(os.path.join(stub_dir, "metadata.json"), "w") as f:
+            json.dump(metadata, f)
+
+        self.remove(assignment_dir)
+        os.rename(stub_dir, assignment_dir)
+        self.sizes.pop(name, None)
+        self.evictions += 1
+
+    def prune_object_cache(self, assignment_dir):
+        """Delete least recently used object files over the cache quota, and abandoned partial objects"""
+        cache_dir = os.path.join(assignment_dir, OBJECT_CACHE_DIR)
+        try:
+            names = os.listdir(cache_dir)
+        except FileNotFoundError:
+            return
+        now = time.time()
+        objects = []
+        total = 0
+        for name in names:
+            path = os.path.join(cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime < OBJECT_MIN_IDLE_SECONDS:
+                total += getattr(st, "st_blocks", 0) * 512 or st.st_size
+                continue
+            if name.endswith(".tmp"):
+                # Left behind by a build that died before renaming it into place
+                self._unlink(path)
+                continue
+            size = getattr(st, "st_blocks", 0) * 512 or st.st_size
+            total += size
+            objects.append((st.st_mtime, path, size))
+
+        if not OBJECT_CACHE_QUOTA_BYTES:
+            return
+        # compile_project touches objects it reuses, so the oldest mtime is the least recently used
+        for _, path, size in sorted(objects):
+            if total <= OBJECT_CACHE_QUOTA_BYTES:
+                break
+            if self._unlink(path):
+                total -= size
+                self.objects_pruned += 1
+
+    def _unlink(self, path):
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def usage(self):
+        """Per-assignment disk usage and last use, as of the last accounting pass"""
+        report = []
+        for name in sorted(os.listdir(self.base_dir)):
+            assignment_dir = os.path.join(self.base_dir, name)
+            if name.startswith(".") or not os.path.isdir(assignment_dir):
+                continue
+            try:
+                with open(os.path.join(assignment_dir, "metadata.json"), "r") as f:
+                    evicted = "evicted_at" in json.load(f)
+            except (OSError, json.JSONDecodeError):
+                evicted = False
+            report.append({
+                "name": name,
+                "disk_bytes": self.sizes.get(name),
+                "last_used": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.last_used(assignment_dir))),
+                "evicted": evicted
+            })
+        return report
+
+    def enforce_quota(self, is_busy):
+        """Refresh disk accounting and evict least recently used idle environments over the quota"""
+        candidates = []
+        for name in os.listdir(self.base_dir):
+            assignment_dir = os.path.join(self.base_dir, name)
+            if name.startswith(".") or not os.path.isdir(assignment_dir):
+                continue
+            self.prune_object_cache(assignment_dir)
+            self.sizes[name] = disk_usage(assignment_dir)
+            candidates.append((self.last_used(assignment_dir), name))
+        for name in list(self.sizes):
+            if not os.path.isdir(os.path.join(self.base_dir, name)):
+                self.sizes.pop(name, None)
+
+        total = sum(self.sizes.values())
+        if not ENVIRONMENT_QUOTA_BYTES or total <= ENVIRONMENT_QUOTA_BYTES:
+            return
+
+        now = time.time()
+        for last_used, name in sorted(candidates):
+            if total <= ENVIRONMENT_QUOTA_BYTES:
+                break
+            if now - last_used < EVICTION_MIN_IDLE_SECONDS or is_busy(name):
+                continue
+            size = self.sizes.get(name, 0)
+            try:
+                self.evict(name)
+            except Exception as e:
+                logger.error(f"Could not evict environment '{name}': {str(e)}")
+                continue
+            total -= size
+            logger.info(f"Evicted idle environment '{name}' ({size} bytes) to stay under the disk quota")
+
+    def _eviction_loop(self, is_busy):
+        while True:
+            try:
+                self.enforce_quota(is_busy)
+            except Exception as e:
+                logger.error(f"Environment eviction error: {str(e)}")
+            time.sleep(EVICTION_INTERVAL)
+
+    def start(self, is_busy):
+        """Purge leftovers from earlier runs and start the deletion and eviction threads"""
+        if os.path.isdir(self.trash_dir):
+            for name in os.listdir(self.trash_dir):
+                self.deletions.put(os.path.join(self.trash_dir, name))
+        for name in os.listdir(self.base_dir):
+            if name.startswith(".evicting-") or name.startswith(".import-"):
+                self.remove(os.path.join(self.base_dir, name))
+        threading.Thread(target=self._deletion_loop, name="environment-deleter", daemon=True).start()
+        threading.Thread(target=self._eviction_loop, args=(is_busy,), name="environment-evictor",
+                         daemon=True).start()
@@ -0,0 +1,224 @@
+# fixtures.py
+import os
+import json
+import errno
+import hashlib
+import logging
+import tempfile
+import threading
+from environment_archive import _file_digest
+
+logger = logging.getLogger("code_execution_api")
+
+FIXTURES_DIR_NAME = ".fixtures"
+# Largest single fixture file accepted by an upload
+MAX_FIXTURE_BYTES = int(os.environ.get("MAX_FIXTURE_BYTES", str(2 * 1024 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes buffered from the request before each write to disk
+
+class FixtureTooLarge(ValueError):
+    pass
+
+def _intact(path, size):
+    # Blobs are owned by the API, mode 0444 and stamped with an mtime of 0 when stored. Submissions
+    # running as RUN_AS_USER cannot write to them at all; without a run user this is only a cheap
+    # check for accidental changes, as a submission can write through its link and restore the mtime
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    return st.st_size == size and st.st_mtime_ns == 0
+
+def normalize_fixture_path(rel_path):
+    """Return a fixture's path relative to the working directory, rejecting paths that escape it"""
+    normalized = os.path.normpath(rel_path)
+    if os.path.isabs(normalized) or normalized.startswith("..") or normalized in (".", "") or \
+            normalized.split(os.sep)[0].startswith("__"):
+        raise ValueError(f"Invalid fixture path: {rel_path}")
+    return normalized
+
+class FixtureUpload:
+    """A fixture being streamed to disk, hashed as it arrives"""
+
+    def __init__(self, directory):
+        fd, self.path = tempfile.mkstemp(prefix=".upload-", dir=directory)
+        self.file = os.fdopen(fd, "wb")
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > MAX_FIXTURE_BYTES:
+            raise FixtureTooLarge(f"Fixture exceeds the limit of {MAX_FIXTURE_BYTES} bytes")
+        self.digest.update(chunk)
+        self.file.write(chunk)
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass  # Already moved into the blob store
+
+class FixtureStore:
+    """Read-only data files attached to assignments.
+
+    Each distinct file is stored once by content hash, however many assignments use it, and is
+    linked into every execution's working directory instead of being copied. Hard links are used
+    where the workspace shares a filesystem with the store, symlinks otherwise; either way all
+    concurrent runs read (and mmap) the same page-cached copy, which is why submissions must run
+    as RUN_AS_USER for the blobs to be read-only to them.
+    """
+
+    def __init__(self, base_dir):
+        self.root = os.path.join(base_dir, FIXTURES_DIR_NAME)
+        self.blob_dir = os.path.join(self.root, "blobs")
+        self.lock = threading.Lock()
+        self.manifests = {}  # assignment name -> {relative path: {"sha256", "size"}}
+        self.hardlinks = True  # Cleared after the first cross-filesystem link attempt
+
+    def start(self):
+        """Remove partial uploads left behind by an earlier run"""
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if name.startswith(".upload-"):
+                    os.unlink(os.path.join(self.root, name))
+
+    def _manifest_path(self, assignment_name):
+        return os.path.join(self.root, f"{assignment_name}.json")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest)
+
+    def manifest(self, assignment_name):
+        """Return {relative path: {"sha256", "size"}} for an assignment's fixtures"""
+        with self.lock:
+            return dict(self._load(assignment_name))
+
+    def _load(self, assignment_name):
+        manifest = self.manifests.get(assignment_name)
+        if manifest is None:
+            try:
+                with open(self._manifest_path(assignment_name), "r") as f:
+                    manifest = json.load(f)
+            except FileNotFoundError:
+                manifest = {}
+            self.manifests[assignment_name] = manifest
+        return manifest
+
+    def _save(self, assignment_name, manifest):
+        path = self._manifest_path(assignment_name)
+        if manifest:
+            with open(path + ".tmp", "w") as f:
+                json.dump(manifest, f, sort_keys=True)
+            os.replace(path + ".tmp", path)
+        elif os.path.exists(path):
+            os.unlink(path)
+        self.manifests[assignment_name] = manifest
+
+    def begin_upload(self):
+        """Start streaming a new fixture to disk"""
+        os.makedirs(self.blob_dir, exist_ok=True)
+        return FixtureUpload(self.root)
+
+    def commit(self, assignment_name, rel_path, upload):
+        """Store an uploaded fixture under rel_path for an assignment, replacing any previous file"""
+        upload.file.flush()
+        os.fsync(upload.file.fileno())
+        upload.file.close()
+        digest = upload.digest.hexdigest()
+        blob_path = self._blob_path(digest)
+        with self.lock:
+            if _intact(blob_path, upload.size) and _file_digest(blob_path) == digest:
+                os.unlink(upload.path)  # Identical content is already stored
+            else:
+                os.chmod(upload.path, 0o444)
+                os.utime(upload.path, ns=(0, 0))
+                os.replace(upload.path, blob_path)
+            manifest = dict(self._load(assignment_name))
+            previous = manifest.get(rel_path)
+            manifest[rel_path] = {"sha256": digest, "size": upload.size}
+            self._save(assignment_name, manifest)
+            if previous is not None:
+                self._collect(previous["sha256"])
+        logger.info(f"Stored fixture '{rel_path}' for assignment '{assignment_name}' ({upload.size} bytes)")
+        return {"path": rel_path, "sha256": digest, "size": upload.size}
+
+    def remove(self, assignment_name, rel_path=None):
+        """Detach one fixture (or all of them) from an assignment; returns False if there was none"""
+        with self.lock:
+            manifest = dict(self._load(assignment_name))
+            if rel_path is None:
+                removed = list(manifest.values())
+                manifest = {}
+            elif rel_path in manifest:
+                removed = [manifest.pop(rel_path)]
+            else:
+                return False
+            self._save(assignment_name, manifest)
+            for entry in removed:
+                self._collect(entry["sha256"])
+            return bool(removed)
+
+    def _collect(self, digest):
+        # Delete a blob once no assignment refers to it
+        for name in os.listdir(self.root):
+            if name.endswith(".json"):
+                if any(entry["sha256"] == digest for entry in self._load(name[:-len(".json")]).values()):
+                    return
+        try:
+            os.unlink(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def link_into(self, assignment_name, work_dir):
+        """Expose an assignment's fixtures as read-only files in an execution's working directory"""
+        with self.lock:
+            manifest = self._load(assignment_name)
+        for rel_path, entry in manifest.items():
+            target = os.path.join(work_dir, rel_path)
+            if os.path.lexists(target):
+                raise ValueError(f"Submission file '{rel_path}' conflicts with an assignment fixture")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            blob_path = self._blob_path(entry["sha256"])
+            if not _intact(blob_path, entry["size"]):
+                logger.error(f"Fixture '{rel_path}' of assignment '{assignment_name}' was modified on disk")
+                raise ValueError(f"Fixture '{rel_path}' is damaged; upload it again")
+            if self.hardlinks:
+                try:
+                    os.link(blob_path, target)
+                    continue
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                        raise
+                    self.hardlinks = False
+                    logger.info("Workspaces are on another filesystem; linking fixtures with symlinks")
+            os.symlink(blob_path, target)
+
+    def open_fixture(self, assignment_name, rel_path):
+        """Open one of an assignment's fixtures for reading, e.g. to use it as a program's stdin"""
+        rel_path = normalize_fixture_path(rel_path)
+        with self.lock:
+            entry = self._load(assignment_name).get(rel_path)
+        if entry is None:
+            raise ValueError(f"Assignment '{assignment_name}' has no fixture '{rel_path}'")
+        blob_path = self._blob_path(entry["sha256"])
+        if not _intact(blob_path, entry["size"]):
+            logger.error(f"Fixture '{rel_path}' of assignment '{assignment_name}' was modified on disk")
+            raise ValueError(f"Fixture '{rel_path}' is damaged; upload it again")
+        return open(blob_path, "rb")
+
+    def blob_inodes(self):
+        """(device, inode) of every stored blob, i.e. of every fixture hard-linked into a workspace"""
+        try:
+            with os.scandir(self.blob_dir) as entries:
+                return {(st.st_dev, st.st_ino) for st in (entry.stat(follow_symlinks=False) for entry in entries)}
+        except FileNotFoundError:
+            return set()
+
+    def usage(self):
+        """Bytes stored in the blob store, each distinct file counted once"""
+        try:
+            with os.scandir(self.blob_dir) as entries:
+                return sum(entry.stat().st_size for entry in entries)
+        except FileNotFoundError:
+            return 0
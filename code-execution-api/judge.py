@@ -0,0 +1,255 @@
+# judge.py
+import os
+import json
+import math
+import logging
+import subprocess
+from process_manager import run_process_group
+from benchmark import IDENTIFIER_PATTERN
+
+logger = logging.getLogger("code_execution_api")
+
+MAX_JUDGE_CASES = 1000
+JUDGE_TIMEOUT = 30  # Seconds for all cases together
+MAX_CASE_OUTPUT = 4096  # Characters of printed output kept per case
+DEFAULT_FLOAT_TOLERANCE = 1e-9
+
+# Python harness: loads the submission once (its __main__ driver does not run), then calls the
+# function for every case. One JSON line is flushed per case so a timeout keeps earlier results.
+# A case with a time limit is interrupted when it runs out, so the remaining cases still run.
+PYTHON_JUDGE_HARNESS = r'''
+import io
+import json
+import os
+import runpy
+import signal
+import sys
+import time
+import traceback
+
+with open(sys.argv[1]) as f:
+    config = json.load(f)
+
+entry = config["entry"]
+sys.path.insert(0, os.path.dirname(entry))
+results = open(config["results"], "w")
+stdout = sys.stdout
+
+def resolve(namespace, dotted_name):
+    parts = dotted_name.split(".")
+    target = namespace[parts[0]]
+    for part in parts[1:]:
+        if isinstance(target, type):
+            target = target()  # A fresh instance per case, e.g. Solution.prefixSum -> Solution().prefixSum
+        target = getattr(target, part)
+    return target
+
+def to_json(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise TypeError(f"return value of type {type(value).__name__} is not JSON-serializable")
+
+class CaseTimeLimit(BaseException):
+    pass
+
+def expire(signum, frame):
+    raise CaseTimeLimit()
+
+signal.signal(signal.SIGALRM, expire)
+
+sys.stdout = captured = io.StringIO()
+try:
+    namespace = runpy.run_path(entry, run_name="__judge__")
+    load_error = None
+except BaseException:
+    load_error = traceback.format_exc(limit=-3)
+load_output = captured.getvalue()
+
+for args, limit in zip(config["cases"], config["time_limits"]):
+    sys.stdout = captured = io.StringIO()
+    record = {"actual": None, "error": load_error, "time": 0.0}
+    if load_error is None:
+        try:
+            function = resolve(namespace, config["function"])
+            start = time.perf_counter()
+            try:
+                if limit:
+                    signal.setitimer(signal.ITIMER_REAL, limit)
+                value = function(*args)
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            record["time"] = time.perf_counter() - start
+            record["actual"] = json.loads(json.dumps(value, default=to_json))
+        except CaseTimeLimit:
+            record["time"] = time.perf_counter() - start
+            record["error"] = f"Time limit of {limit:g} seconds exceeded"
+        except BaseException:
+            record["error"] = traceback.format_exc(limit=-3)
+    record["output"] = captured.getvalue()[:config["max_output"]]
+    results.write(json.dumps(record) + "\n")
+    results.flush()
+
+sys.stdout = stdout
+print(load_output[:config["max_output"]], end="")
+'''
+
+# JavaScript harness: same protocol; the submission exposes its top-level names via module.exports.__judge__
+JAVASCRIPT_JUDGE_HARNESS = r'''
+const fs = require("fs");
+const path = require("path");
+const util = require("util");
+
+const config = JSON.parse(fs.readFileSync(process.argv[2], "utf8"));
+const entry = path.resolve(config.entry);
+const results = fs.openSync(config.results, "w");
+
+let captured = "";
+for (const method of ["log", "info", "warn", "error", "debug"]) {
+  console[method] = (...args) => { captured += util.format(...args) + "\n"; };
+}
+
+function resolve(root, parts) {
+  let target = root;
+  for (const part of parts) {
+    if (typeof target === "function" && /^class[\s{]/.test(Function.prototype.toString.call(target))) {
+      target = new target();  // A fresh instance per case, e.g. Solution.prefixSum -> new Solution().prefixSum
+    }
+    const next = target[part];
+    target = typeof next === "function" ? next.bind(target) : next;
+  }
+  return target;
+}
+
+let root = null;
+let loadError = null;
+try {
+  root = require(entry).__judge__;
+} catch (e) {
+  loadError = String(e && e.stack || e);
+}
+const loadOutput = captured;
+
+for (const args of config.cases) {
+  captured = "";
+  const record = { actual: null, error: loadError, time: 0 };
+  if (loadError === null) {
+    try {
+      const fn = resolve(root(), config.function.split(".").slice(1));
+      const start = process.hrtime.bigint();
+      const value = fn(...args);
+      record.time = Number(process.hrtime.bigint() - start) / 1e9;
+      const serialized = JSON.stringify(value instanceof Set ? [...value] : value);
+      record.actual = serialized === undefined ? null : JSON.parse(serialized);
+    } catch (e) {
+      record.error = String(e && e.stack || e);
+    }
+  }
+  record.output = captured.slice(0, config.max_output);
+  fs.writeSync(results, JSON.stringify(record) + "\n");
+}
+
+process.stdout.write(loadOutput.slice(0, config.max_output));
+'''
+
+def validate_judge_options(language, function, case_count, timeout=JUDGE_TIMEOUT, time_limits=()):
+    """Raise ValueError if a function can not be judged with these options"""
+    if not 0 < timeout <= JUDGE_TIMEOUT:
+        raise ValueError(f"timeout must be between 0 and {JUDGE_TIMEOUT} seconds")
+    if any(limit is not None and not 0 < limit <= timeout for limit in time_limits):
+        raise ValueError("Case time limits must be between 0 seconds and the timeout")
+    if language not in ("python", "javascript"):
+        raise ValueError(f"Function-level judging is not supported for {language}; compare program output instead")
+    if not IDENTIFIER_PATTERN.match(function):
+        raise ValueError(f"Invalid function name: {function}")
+    if not 1 <= case_count <= MAX_JUDGE_CASES:
+        raise ValueError(f"Between 1 and {MAX_JUDGE_CASES} cases can be judged at once")
+
+def javascript_judge_footer(function):
+    """Code appended to a JavaScript submission so the judge harness can reach the function's root"""
+    return f"\nmodule.exports.__judge__ = () => {function.split('.')[0]};\n"
+
+def values_equal(actual, expected, float_tolerance=DEFAULT_FLOAT_TOLERANCE, unordered=False):
+    """Structurally compare JSON values; numbers within float_tolerance (relative or absolute) match.
+
+    With unordered=True, lists at any depth are compared as multisets.
+    """
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return type(actual) is type(expected) and actual == expected
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        if isinstance(expected, int) and isinstance(actual, int):
+            return actual == expected
+        return math.isclose(actual, expected, rel_tol=float_tolerance, abs_tol=float_tolerance)
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(actual) != len(expected):
+            return False
+        if unordered:
+            remaining = list(actual)
+            for item in expected:
+                for index, candidate in enumerate(remaining):
+                    if values_equal(candidate, item, float_tolerance, unordered):
+                        del remaining[index]
+                        break
+                else:
+                    return False
+            return True
+        return all(values_equal(a, e, float_tolerance, unordered) for a, e in zip(actual, expected))
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return actual.keys() == expected.keys() and \
+            all(values_equal(actual[key], expected[key], float_tolerance, unordered) for key in expected)
+    return type(actual) is type(expected) and actual == expected
+
+def run_judge(command, harness_source, harness_name, config, work_dir, env=None, cwd=None, timeout=JUDGE_TIMEOUT):
+    """Run a judge harness over every case; returns (per-case records, program output, timed_out).
+
+    Cases that did not finish before the timeout have no record.
+    """
+    harness_path = os.path.join(work_dir, harness_name)
+    config_path = os.path.join(work_dir, "__judge_config__.json")
+    results_path = os.path.join(work_dir, "__judge_results__.jsonl")
+
+    with open(harness_path, "w") as f:
+        f.write(harness_source)
+    with open(config_path, "w") as f:
+        json.dump(dict(config, results=results_path, max_output=MAX_CASE_OUTPUT), f)
+
+    timed_out = False
+    output = ""
+    try:
+        result = run_process_group(command + [harness_path, config_path], timeout=timeout, env=env, cwd=cwd)
+        output = result.stdout
+        if result.returncode != 0:
+            output += result.stderr
+    except subprocess.TimeoutExpired:
+        timed_out = True
+
+    records = []
+    if os.path.exists(results_path):
+        with open(results_path, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # Partially written line from a process killed mid-write
+    return records, output, timed_out
+
+def grade_cases(expected_values, records, timed_out, float_tolerance=DEFAULT_FLOAT_TOLERANCE, unordered=False,
+                time_limits=None):
+    """Combine expected return values with the harness records into per-case verdicts.
+
+    A case slower than its entry in time_limits fails even if its value is right.
+    """
+    verdicts = []
+    for index, expected in enumerate(expected_values):
+        if index < len(records):
+            record = records[index]
+            limit = time_limits[index] if time_limits else None
+            if limit is not None and record["time"] > limit and record["error"] is None:
+                # The JavaScript harness can not interrupt a case, so its limits are checked afterwards
+                record = dict(record, error=f"Time limit of {limit:g} seconds exceeded")
+            passed = record["error"] is None and \
+                values_equal(record["actual"], expected, float_tolerance, unordered)
+            verdicts.append(dict(record, expected=expected, passed=passed, time=round(record["time"], 6)))
+        else:
+            verdicts.append({"actual": None, "expected": expected, "passed": False, "time": None,
+                             "output": "", "error": "Timed out" if timed_out else "Not run"})
+    return verdicts
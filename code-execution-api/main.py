@@ -1,15 +1,45 @@
 # main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 import subprocess
+import asyncio
+import codecs
 import os
 import time
 import tempfile
 import shutil
+import tarfile
+import hashlib
+import threading
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from concurrent.futures import Future
 import json
 from fastapi.middleware.cors import CORSMiddleware
+from environment_archive import export_environment, import_environment
+from cpp_build import compile_project, check_syntax, BUILD_PROFILES, DEFAULT_BUILD_PROFILE
+from syntax_check import check_python_syntax, check_javascript_syntax
+from workspace import workspaces, check_quota, WORKSPACE_POOL_SIZE, WORKSPACE_QUOTA_BYTES, RUN_USER
+from python_startup import optimize_python_startup, load_startup_profile, get_launch_flags
+from process_manager import (run_process_group, session_kwargs, register_group, release_group, kill_groups_using,
+                             start_reaper, get_process_stats)
+from benchmark import (PYTHON_HARNESS, JAVASCRIPT_HARNESS, BENCHMARK_TIMEOUT, validate_benchmark_options,
+                       javascript_export_footer, run_in_process_benchmark, run_process_benchmark,
+                       summarize, scaling_exponent)
+from environment_store import EnvironmentStore, ENVIRONMENT_QUOTA_BYTES
+from output_compare import OutputComparator, run_compared, DEFAULT_FLOAT_TOLERANCE as DEFAULT_OUTPUT_TOLERANCE
+from judge import (PYTHON_JUDGE_HARNESS, JAVASCRIPT_JUDGE_HARNESS, JUDGE_TIMEOUT, DEFAULT_FLOAT_TOLERANCE,
+                   validate_judge_options, javascript_judge_footer, run_judge, grade_cases)
+from fixtures import FixtureStore, FixtureTooLarge, UPLOAD_CHUNK_SIZE, normalize_fixture_path
+from artifact_cache import ArtifactCache
+from cpu_budget import cpu_allocator, limit_threads, pinned
+from admission import (AdmissionController, AdmissionRejected, SessionBudget, MAX_IN_FLIGHT,
+                       MAX_INTERACTIVE_SESSIONS, PRIORITIES)
+from autoscaler import ElasticPool, Autoscaler, PoolBusy, pool_limits
+from repl_session import (SessionManager, SessionLimitReached, REPL_HARNESSES, SESSION_LANGUAGES, DEFAULT_CELL_TIMEOUT,
+                          MAX_CELL_TIMEOUT, MAX_CELL_BYTES)
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +50,72 @@ logger = logging.getLogger("code_execution_api")
 
 app = FastAPI(title="Code Execution API")
 
+# Admission control for executions, driven by host pressure and the number in flight
+admission = AdmissionController(
+    MAX_IN_FLIGHT or 2 * max(1, len(cpu_allocator.cores) // cpu_allocator.cores_per_execution),
+    len(cpu_allocator.cores)
+)
+# WebSocket sessions have their own budget so that idle ones do not hold execution slots
+interactive_sessions = SessionBudget(MAX_INTERACTIVE_SESSIONS, admission)
+
+# Execution slots per language and C++ compile slots, resized with demand by the autoscaler.
+# Bounds are 'floor:ceiling' from POOL_LIMITS_<NAME> (e.g. POOL_LIMITS_PYTHON=2:16)
+core_slots = max(1, len(cpu_allocator.cores) // cpu_allocator.cores_per_execution)
+execution_pools = {
+    language: ElasticPool(language, *pool_limits(1, 2 * core_slots, os.environ.get(f"POOL_LIMITS_{language.upper()}")))
+    for language in ("python", "javascript", "cpp")
+}
+compile_pool = ElasticPool("cpp_compile", *pool_limits(1, core_slots, os.environ.get("POOL_LIMITS_CPP_COMPILE")))
+
+def apply_pool_sizes():
+    """Admit as many executions as the pools can run and keep a warm workspace for each"""
+    total = sum(pool.size for pool in execution_pools.values())
+    admission.set_capacity(total)
+    workspaces.pool_size = max(WORKSPACE_POOL_SIZE, total + compile_pool.size)
+
+autoscaler = Autoscaler(dict(execution_pools, cpp_compile=compile_pool),
+                        lambda: (admission.level, admission.signals.get("available_memory"), len(admission.waiters)),
+                        apply_pool_sizes)
+
+# Paths subject to admission control and their default priority (override with X-Execution-Priority)
+ADMISSION_PATHS = {"/execute/code": "interactive", "/judge/function": "batch", "/benchmark/code": "batch",
+                   "/sessions": "interactive", "/sessions/{session_id}/execute": "interactive"}
+
+def admission_path(path):
+    """Map a request path to its ADMISSION_PATHS key"""
+    if path.startswith("/sessions/") and path.endswith("/execute"):
+        return "/sessions/{session_id}/execute"
+    return path
+
+# Registered before CORS so that shed responses still carry CORS headers
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Queue or shed executions with 503 and Retry-After before the host saturates"""
+    priority = ADMISSION_PATHS.get(admission_path(request.url.path))
+    if priority is None:
+        return await call_next(request)
+    default_priority = priority
+    priority = request.headers.get("X-Execution-Priority", priority)
+    if priority not in PRIORITIES:
+        priority = default_priority
+    try:
+        await admission.admit(priority)
+    except AdmissionRejected as e:
+        logger.warning(f"Shed {priority} request to {request.url.path}: {str(e)}")
+        return JSONResponse(status_code=503, content={"detail": str(e)},
+                            headers={"Retry-After": str(e.retry_after)})
+    start_time = time.time()
+    try:
+        return await call_next(request)
+    finally:
+        admission.release(time.time() - start_time)
+
+@app.exception_handler(PoolBusy)
+def pool_busy(request: Request, e: PoolBusy):
+    """Shed requests that waited too long for an execution or compile slot"""
+    logger.warning(f"Shed request to {request.url.path}: {str(e)}")
+    return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": str(e.retry_after)})
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -33,52 +129,287 @@ app.add_middleware(
 BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "environments")
 os.makedirs(BASE_DIR, exist_ok=True)
 
+# Shared caches that are not assignments (hidden from /list/assignments)
+PCH_DIR = os.path.join(BASE_DIR, ".cache", "pch")
+
+# Disk accounting, idle eviction and background deletion of environments
+environment_store = EnvironmentStore(BASE_DIR)
+
+# Read-only data files attached to assignments, linked into every execution's workspace
+fixture_store = FixtureStore(BASE_DIR)
+
+# Model weights and corpora shared by all assignments, seeded by teachers
+artifact_cache = ArtifactCache(os.environ.get("ARTIFACT_CACHE_DIR") or os.path.join(BASE_DIR, ".cache", "artifacts"))
+
+# Persistent interpreters for notebook-style, cell-by-cell execution
+session_manager = SessionManager()
+
+# Default (and maximum) seconds a single execution may run
+EXECUTION_TIMEOUT = 30
+# Inline stdin is held in memory with the rest of the request; larger inputs are uploaded as fixtures
+MAX_STDIN_BYTES = int(os.environ.get("MAX_STDIN_BYTES", str(16 * 1024 * 1024)))
+
+# Limits for interactive (WebSocket) execution sessions
+INTERACTIVE_TIMEOUT = 300  # Seconds a session may run in total
+INTERACTIVE_MAX_INPUT = 16 * 1024 * 1024  # Total bytes a client may send to stdin
+INTERACTIVE_CHUNK_SIZE = 4096  # Bytes of output relayed per message
+
 # Pydantic models for request validation
 class AssignmentCreate(BaseModel):
     assignment_name: str
     language: str  # 'python', 'javascript', or 'cpp'
     requirements: List[str] = []
+    build_profile: str = DEFAULT_BUILD_PROFILE  # C++ only: 'debug', 'release', 'lto' or 'sanitize'
 
 class CodeExecution(BaseModel):
     assignment_name: str
     code: str
+    stdin: Optional[str] = None  # Input piped to the program's standard input, up to MAX_STDIN_BYTES
+    stdin_fixture: Optional[str] = None  # Or: path of an uploaded fixture streamed to standard input
+    files: Dict[str, str] = {}  # Additional project files (relative path -> content) next to the entry file
+    build_profile: Optional[str] = None  # C++ only: overrides the assignment's default build profile
+    # When set, stdout is checked against this while the program runs and it is stopped at the first difference
+    expected_output: Optional[str] = None
+    comparison: str = "exact"  # 'exact', 'whitespace' or 'float'
+    float_tolerance: float = DEFAULT_OUTPUT_TOLERANCE
+    timeout: Optional[float] = None  # Per-test time limit in seconds, at most EXECUTION_TIMEOUT
+
+class SyntaxCheck(BaseModel):
+    assignment_name: str
+    code: str
+    files: Dict[str, str] = {}
+
+class BenchmarkRequest(BaseModel):
+    assignment_name: str
+    code: str
+    files: Dict[str, str] = {}
+    function: Optional[str] = None  # e.g. 'Solution.prefixSum'; the whole program is timed when omitted
+    input_generator: Optional[str] = None  # Called with each input size; Python tuples are unpacked into arguments
+    input_sizes: List[int] = []  # Sizes to sweep for a scaling curve (passed as argv[1] in whole-program mode)
+    iterations: int = 10
+    warmup: int = 2
+    build_profile: Optional[str] = None  # C++ only: overrides the assignment's default build profile
+
+class JudgeCase(BaseModel):
+    args: List[Any] = []  # Positional arguments, as JSON values
+    expected: Any = None  # Expected return value, compared structurally
+    time_limit: Optional[float] = None  # Seconds this case may take; loading the submission does not count
+
+class JudgeRequest(BaseModel):
+    assignment_name: str
+    code: str
+    files: Dict[str, str] = {}
+    function: str  # e.g. 'Solution.prefixSum'; classes are instantiated fresh for every case
+    cases: List[JudgeCase]
+    float_tolerance: float = DEFAULT_FLOAT_TOLERANCE
+    unordered: bool = False  # Compare lists as multisets
+    timeout: Optional[float] = None  # Seconds for all cases together, at most JUDGE_TIMEOUT
+
+class SessionCreate(BaseModel):
+    assignment_name: str
+    owner: Optional[str] = None  # e.g. a student id; an owner's live session for the assignment is reused
+    files: Dict[str, str] = {}  # Project files (relative path -> content) the cells can import or read
+    restart: bool = False  # Start a fresh interpreter even if the owner has one
+
+class CellExecution(BaseModel):
+    code: str
+    timeout: Optional[float] = None  # Seconds; defaults to DEFAULT_CELL_TIMEOUT, up to MAX_CELL_TIMEOUT
 
 class ExecutionResult(BaseModel):
     output: str
     error: str
     execution_time: float
+    comparison: Optional[Dict[str, Any]] = None  # Verdict when expected_output was given
+    compile_time: Optional[float] = None  # C++ only: seconds of execution_time spent compiling
+    exit_code: Optional[int] = None  # None when the program never ran to an exit (timeout, compile error, ...)
+
+@app.on_event("startup")
+def start_background_tasks():
+    """Start the process reaper, the environment evictor and pre-create the execution workspace pool"""
+    if RUN_USER is None:
+        logger.warning("RUN_AS_USER is not set: submissions run as the API's own user and can modify "
+                       "shared fixtures and cached artifacts")
+    elif os.stat(BASE_DIR).st_mode & 0o022:
+        # Submissions must not be able to rename or replace the shared stores under it
+        os.chmod(BASE_DIR, 0o755)
+    start_reaper()
+    workspaces.start()
+    workspaces.start_quota_monitor(fixture_store.blob_inodes, kill_groups_using)
+    fixture_store.start()
+    artifact_cache.start()
+    admission.start()
+    apply_pool_sizes()
+    autoscaler.start()
+    session_manager.start()
+    environment_store.start(lambda assignment_name: assignment_name in provisioning or
+                            assignment_name in session_manager.assignments())
 
 @app.get("/")
 def read_root():
     return {"message": "Code Execution API is running"}
 
+# Bump when the on-disk environment layout changes so existing environments get rebuilt
+ENVIRONMENT_LAYOUT_VERSION = 2
+
+# In-flight provisioning per assignment: assignment_name -> (fingerprint, Future)
+provisioning_lock = threading.Lock()
+provisioning = {}
+
+def environment_fingerprint(language, requirements, build_profile):
+    """Return a stable hash of everything that determines an assignment's environment"""
+    spec = {
+        "layout": ENVIRONMENT_LAYOUT_VERSION,
+        "language": language,
+        "requirements": [req.strip() for req in requirements],
+        "build_profile": build_profile
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+def read_metadata(assignment_dir):
+    """Return an assignment's metadata, or an empty dict if it is missing or unreadable"""
+    try:
+        with open(os.path.join(assignment_dir, "metadata.json"), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def ensure_environment(assignment_name, assignment_dir):
+    """Return an assignment's metadata, transparently re-provisioning it first if it was evicted"""
+    with open(os.path.join(assignment_dir, "metadata.json"), "r") as f:
+        metadata = json.load(f)
+    if "evicted_at" in metadata:
+        logger.info(f"Assignment '{assignment_name}' was evicted on {metadata['evicted_at']} - re-provisioning")
+        language = metadata.get("language", "python")
+        requirements = metadata.get("requirements", [])
+        build_profile = metadata.get("build_profile", DEFAULT_BUILD_PROFILE)
+        fingerprint = environment_fingerprint(language, requirements, build_profile)
+        # Called on a worker thread already, so it simply blocks until the environment is back
+        while True:
+            in_flight = start_provisioning(assignment_name, assignment_dir, language, requirements,
+                                           build_profile, fingerprint)
+            if in_flight is None:
+                break
+            in_flight_fingerprint, future = in_flight
+            try:
+                future.result()
+            except Exception:
+                if in_flight_fingerprint == fingerprint:
+                    raise
+                continue
+            if in_flight_fingerprint == fingerprint:
+                break
+        metadata = read_metadata(assignment_dir)
+    environment_store.touch(assignment_dir)
+    return metadata
+
+def unsupported_build_profile(build_profile):
+    """Error message for a build profile that does not exist, or None if it does (or none was given)"""
+    if build_profile is None or build_profile in BUILD_PROFILES:
+        return None
+    return f"Build profile '{build_profile}' is not supported. Supported profiles: {', '.join(BUILD_PROFILES)}"
+
+def validate_build_profile(build_profile):
+    error = unsupported_build_profile(build_profile)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+def start_provisioning(assignment_name, assignment_dir, language, requirements, build_profile, fingerprint):
+    """Return the (fingerprint, Future) of the assignment's provisioning run, starting one if none is in flight.
+    
+    Returns None if nothing is in flight and the environment on disk was already built from fingerprint.
+    """
+    with provisioning_lock:
+        in_flight = provisioning.get(assignment_name)
+        if in_flight is not None:
+            return in_flight
+        if read_metadata(assignment_dir).get("fingerprint") == fingerprint:
+            return None
+        future = Future()
+        provisioning[assignment_name] = (fingerprint, future)
+    threading.Thread(target=run_provisioning, name=f"provision-{assignment_name}", daemon=True, args=(
+        assignment_name, assignment_dir, language, requirements, build_profile, fingerprint, future
+    )).start()
+    return fingerprint, future
+
+def run_provisioning(assignment_name, assignment_dir, language, requirements, build_profile, fingerprint, future):
+    try:
+        result, error = provision_assignment(assignment_name, assignment_dir, language, requirements,
+                                             build_profile, fingerprint), None
+    except Exception as e:
+        result, error = None, e
+    # Leave the in-flight table before waking anyone, so a waiter with another spec starts its own run
+    with provisioning_lock:
+        provisioning.pop(assignment_name, None)
+    if error is None:
+        future.set_result(result)
+    else:
+        future.set_exception(error)
+
 @app.post("/create/assignment")
-def create_assignment(assignment_data: AssignmentCreate):
-    """Create a new environment for an assignment with specified requirements"""
+async def create_assignment(assignment_data: AssignmentCreate):
+    """Create an environment for an assignment, skipping the build if an identical one exists.
+    
+    Concurrent creates for the same assignment and spec share a single provisioning run. The build runs
+    on its own thread and callers wait for it without holding a worker thread.
+    """
     assignment_name = assignment_data.assignment_name
     language = assignment_data.language.lower()
     requirements = assignment_data.requirements
+    build_profile = assignment_data.build_profile
     
     # Validate assignment name (alphanumeric with underscores)
     if not assignment_name.replace("_", "").isalnum():
         raise HTTPException(status_code=400, detail="Assignment name must be alphanumeric with underscores")
     
-    # Check if assignment already exists
+    # Check if language is supported
+    if language not in ["python", "javascript", "cpp"]:
+        raise HTTPException(status_code=400, 
+                           detail=f"Language '{language}' is not supported. Supported languages: python, javascript, cpp")
+    
+    validate_build_profile(build_profile)
+    
+    fingerprint = environment_fingerprint(language, requirements, build_profile)
     assignment_dir = os.path.join(BASE_DIR, assignment_name)
+    
+    while True:
+        in_flight = start_provisioning(assignment_name, assignment_dir, language, requirements,
+                                       build_profile, fingerprint)
+        if in_flight is None:
+            # Nothing in flight and an environment built from the same spec exists: reuse it as-is
+            logger.info(f"Assignment '{assignment_name}' is already up to date")
+            return {
+                "message": f"Assignment '{assignment_name}' is already up to date",
+                "assignment_name": assignment_name,
+                "language": language,
+                "requirements": requirements,
+                "build_profile": build_profile,
+                "unchanged": True
+            }
+        
+        # Share the run's result if it builds our spec, otherwise wait for it to finish and then
+        # rebuild with our spec. Shielded so a client hanging up does not cancel the run for the others.
+        in_flight_fingerprint, future = in_flight
+        try:
+            result = await asyncio.shield(asyncio.wrap_future(future))
+        except Exception:
+            if in_flight_fingerprint == fingerprint:
+                raise
+            continue
+        if in_flight_fingerprint == fingerprint:
+            return result
+
+def provision_assignment(assignment_name, assignment_dir, language, requirements, build_profile, fingerprint):
+    """Build an assignment environment from scratch, replacing any existing one"""
+    # Check if assignment already exists
     if os.path.exists(assignment_dir):
-        # Delete the existing assignment directory before recreating
-        logger.info(f"Assignment '{assignment_name}' already exists - deleting previous data")
+        # Move the existing assignment directory aside before recreating; it is deleted in the background
+        logger.info(f"Assignment '{assignment_name}' changed - deleting previous data")
         try:
-            shutil.rmtree(assignment_dir)
+            environment_store.remove(assignment_dir)
         except Exception as e:
             logger.error(f"Failed to delete existing assignment: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to delete existing assignment: {str(e)}")
     
-    # Check if language is supported
-    if language not in ["python", "javascript", "cpp"]:
-        raise HTTPException(status_code=400, 
-                           detail=f"Language '{language}' is not supported. Supported languages: python, javascript, cpp")
-    
     try:
         # Create assignment directory
         os.makedirs(assignment_dir, exist_ok=True)
@@ -87,6 +418,7 @@ def create_assignment(assignment_data: AssignmentCreate):
         metadata = {
             "language": language,
             "requirements": requirements,
+            "build_profile": build_profile,
             "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
         }
         
@@ -96,29 +428,43 @@ def create_assignment(assignment_data: AssignmentCreate):
         logger.info(f"Created directory for assignment: {assignment_name} with language: {language}")
         
         # Language-specific setup
+        failed_requirements = []
         try:
             if language == "python":
-                setup_python_environment(assignment_dir, requirements)
+                failed_requirements = setup_python_environment(assignment_dir, requirements)
             elif language == "javascript":
-                setup_javascript_environment(assignment_dir, requirements)
+                failed_requirements = setup_javascript_environment(assignment_dir, requirements)
             elif language == "cpp":
                 setup_cpp_environment(assignment_dir, requirements)
         except subprocess.CalledProcessError as e:
             logger.warning(f"Some requirements could not be installed: {str(e)}")
             # We'll continue with the assignment creation even if some requirements failed
+            failed_requirements = list(requirements) or ["environment setup"]
+        
+        # Record the fingerprint only once setup has fully succeeded, so neither an interrupted build
+        # nor one missing requirements (e.g. after a network error) is reused; the next create retries
+        if failed_requirements:
+            metadata["failed_requirements"] = failed_requirements
+        else:
+            metadata["fingerprint"] = fingerprint
+        with open(os.path.join(assignment_dir, "metadata.json"), "w") as f:
+            json.dump(metadata, f)
         
         return {
             "message": f"Assignment '{assignment_name}' created successfully",
             "assignment_name": assignment_name,
             "language": language,
-            "requirements": requirements
+            "requirements": requirements,
+            "build_profile": build_profile,
+            "failed_requirements": failed_requirements,
+            "unchanged": False
         }
     
     except Exception as e:
         logger.error(f"Unexpected error creating assignment: {str(e)}")
         # Clean up if there was an error
         if os.path.exists(assignment_dir):
-            shutil.rmtree(assignment_dir)
+            environment_store.remove(assignment_dir)
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 def setup_python_environment(assignment_dir, requirements):
@@ -128,7 +474,8 @@ def setup_python_environment(assignment_dir, requirements):
     subprocess.run(["python", "-m", "venv", venv_dir], check=True)
     logger.info(f"Created Python virtual environment at {venv_dir}")
     
-    # Install requirements if any
+    # Install requirements if any, returning the ones that failed
+    failed_requirements = []
     if requirements:
         if os.name == 'nt':  # Windows
             pip_path = os.path.join(venv_dir, "Scripts", "pip")
@@ -143,7 +490,6 @@ def setup_python_environment(assignment_dir, requirements):
             logger.warning(f"Could not upgrade pip, continuing with installation: {str(e)}")
         
         # Install each requirement with enhanced error handling
-        failed_requirements = []
         for req in requirements:
             try:
                 # Try with hash verification
@@ -164,6 +510,8 @@ def setup_python_environment(assignment_dir, requirements):
                             subprocess.run([pip_path, "install", "--prefer-binary", 
                                           "--no-cache-dir", package_name], check=True)
                             logger.info(f"Successfully installed {package_name} (without version constraint)")
+                            # Not the version asked for, so the environment is rebuilt on the next create
+                            failed_requirements.append(req)
                         except subprocess.CalledProcessError:
                             failed_requirements.append(req)
                     else:
@@ -173,6 +521,13 @@ def setup_python_environment(assignment_dir, requirements):
             logger.warning(f"Could not install some requirements: {failed_requirements}")
         else:
             logger.info(f"Installed all Python requirements: {requirements}")
+    
+    # Precompile bytecode, profile imports and measure cold start so runs start as fast as possible
+    try:
+        optimize_python_startup(assignment_dir, get_venv_python(assignment_dir), requirements)
+    except Exception as e:
+        logger.warning(f"Could not optimize Python startup, using default launch: {str(e)}")
+    return failed_requirements
 
 def setup_javascript_environment(assignment_dir, requirements):
     """Set up a Node.js environment with specified npm packages"""
@@ -192,7 +547,8 @@ def setup_javascript_environment(assignment_dir, requirements):
     with open(os.path.join(assignment_dir, "package.json"), "w") as f:
         json.dump(package_json, f, indent=2)
     
-    # Install npm packages if any
+    # Install npm packages if any, returning the ones that failed
+    failed_packages = []
     if requirements:
         # Package name mappings for common errors
         package_mappings = {
@@ -210,7 +566,6 @@ def setup_javascript_environment(assignment_dir, requirements):
                 corrected_requirements.append(req)
         
         # Install packages one by one with error handling
-        failed_packages = []
         for package in corrected_requirements:
             try:
                 # Use --no-fund and --no-audit to reduce network calls
@@ -227,6 +582,7 @@ def setup_javascript_environment(assignment_dir, requirements):
             logger.warning(f"Could not install some packages: {failed_packages}")
         else:
             logger.info(f"Installed all JavaScript packages: {corrected_requirements}")
+    return failed_packages
 
 def setup_cpp_environment(assignment_dir, requirements):
     """Set up a C++ environment (minimal setup as requirements handling would be complex)"""
@@ -244,8 +600,9 @@ project(CppAssignment)
 set(CMAKE_CXX_STANDARD 17)
 set(CMAKE_CXX_STANDARD_REQUIRED ON)
 
-# Add executable target
-add_executable(program src/main.cpp)
+# Add executable target from every translation unit in src/
+file(GLOB_RECURSE SOURCES src/*.cpp src/*.cc src/*.cxx)
+add_executable(program ${SOURCES})
 """
     
     with open(os.path.join(assignment_dir, "CMakeLists.txt"), "w") as f:
@@ -258,26 +615,77 @@ def execute_code(execution_data: CodeExecution):
     """Execute code in the specified assignment environment"""
     assignment_name = execution_data.assignment_name
     code = execution_data.code
+    stdin_file = None
     
     # Check if assignment exists
     assignment_dir = os.path.join(BASE_DIR, assignment_name)
     if not os.path.exists(assignment_dir):
         raise HTTPException(status_code=404, detail=f"Assignment '{assignment_name}' not found")
     
+    timeout = execution_data.timeout or EXECUTION_TIMEOUT
+    if not 0 < timeout <= EXECUTION_TIMEOUT:
+        raise HTTPException(status_code=400, detail=f"timeout must be between 0 and {EXECUTION_TIMEOUT} seconds")
+    validate_build_profile(execution_data.build_profile)
+    
+    if execution_data.stdin is not None:
+        if execution_data.stdin_fixture is not None:
+            raise HTTPException(status_code=400, detail="Give either stdin or stdin_fixture, not both")
+        if len(execution_data.stdin.encode("utf-8", errors="replace")) > MAX_STDIN_BYTES:
+            raise HTTPException(status_code=413, detail=f"stdin is limited to {MAX_STDIN_BYTES} bytes; "
+                                                        f"upload larger inputs as a fixture and pass stdin_fixture")
+    
+    comparator = None
+    if execution_data.expected_output is not None:
+        try:
+            comparator = OutputComparator(execution_data.expected_output, execution_data.comparison,
+                                          execution_data.float_tolerance)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if execution_data.stdin_fixture is not None:
+        # Read straight from the stored blob, so even very large inputs are never copied
+        try:
+            stdin_file = fixture_store.open_fixture(assignment_name, execution_data.stdin_fixture)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        # Read metadata to determine language
-        with open(os.path.join(assignment_dir, "metadata.json"), "r") as f:
-            metadata = json.load(f)
+        # Read metadata to determine language, re-provisioning the environment if it was evicted
+        metadata = ensure_environment(assignment_name, assignment_dir)
         
         language = metadata.get("language", "python")  # Default to python if not specified
         
+        # Spool stdin to disk so the program reads it incrementally through its own file handle
+        if stdin_file is None:
+            stdin_file = spool_stdin(execution_data.stdin)
+        
+        files = execution_data.files
+        
+        # Fast-fail on syntax errors without spawning an interpreter (C++ reports them from the compile)
+        if language in ("python", "javascript"):
+            try:
+                syntax_errors = check_submission_syntax(language, code, files)
+            except Exception as e:
+                logger.warning(f"Syntax pre-check unavailable, executing anyway: {str(e)}")
+                syntax_errors = ""
+            if syntax_errors:
+                return {
+                    "output": "",
+                    "error": syntax_errors,
+                    "execution_time": 0.0
+                }
+        
         # Execute code based on language
         if language == "python":
-            return execute_python_code(assignment_dir, code)
+            with execution_pools["python"].slot():
+                return execute_python_code(assignment_dir, code, stdin_file, files, comparator, timeout)
         elif language == "javascript":
-            return execute_javascript_code(assignment_dir, code)
+            with execution_pools["javascript"].slot():
+                return execute_javascript_code(assignment_dir, code, stdin_file, files, comparator, timeout)
         elif language == "cpp":
-            return execute_cpp_code(assignment_dir, code)
+            build_profile = execution_data.build_profile or metadata.get("build_profile", DEFAULT_BUILD_PROFILE)
+            with execution_pools["cpp"].slot():
+                return execute_cpp_code(assignment_dir, code, stdin_file, files, build_profile, comparator, timeout)
         else:
             logger.error(f"Unsupported language: {language}")
             return {
@@ -286,6 +694,9 @@ def execute_code(execution_data: CodeExecution):
                 "execution_time": 0.0
             }
     
+    except PoolBusy:
+        raise
+    
     except FileNotFoundError as e:
         logger.error(f"Assignment metadata not found: {str(e)}")
         return {
@@ -309,29 +720,153 @@ def execute_code(execution_data: CodeExecution):
             "error": f"Execution error: {str(e)}",
             "execution_time": 0.0
         }
+    
+    finally:
+        if stdin_file is not None and stdin_file != subprocess.DEVNULL:
+            stdin_file.close()
+
+def check_submission_syntax(language, code, files):
+    """Return formatted syntax errors for a submission, or an empty string if it parses"""
+    if language == "python":
+        sources = {"main.py": code}
+        sources.update({path: content for path, content in files.items() if path.endswith(".py")})
+        return check_python_syntax(sources)
+    
+    if language == "javascript":
+        sources = {"main.js": code}
+        sources.update({path: content for path, content in files.items() if path.endswith(".js")})
+        return check_javascript_syntax(sources)
+    
+    if language == "cpp":
+        with workspaces.workspace() as project_dir:
+            write_project_files(project_dir, "main.cpp", code, files)
+            with compile_pool.slot():
+                return check_syntax(project_dir, PCH_DIR)
+    
+    raise ValueError(f"Unsupported language: {language}")
+
+@app.post("/check/syntax")
+def check_code_syntax(check_data: SyntaxCheck):
+    """Check code for syntax errors without running it (cheap enough for as-you-type checking)"""
+    assignment_dir = os.path.join(BASE_DIR, check_data.assignment_name)
+    if not os.path.exists(assignment_dir):
+        raise HTTPException(status_code=404, detail=f"Assignment '{check_data.assignment_name}' not found")
+    
+    language = read_metadata(assignment_dir).get("language", "python")
+    
+    start_time = time.time()
+    try:
+        errors = check_submission_syntax(language, check_data.code, check_data.files)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except subprocess.TimeoutExpired:
+        errors = "Syntax check timed out"
+    except PoolBusy:
+        raise
+    except Exception as e:
+        logger.error(f"Syntax check error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Syntax check failed: {str(e)}")
+    
+    return {
+        "valid": not errors,
+        "errors": errors,
+        "check_time": round(time.time() - start_time, 3)
+    }
 
-def execute_python_code(assignment_dir, code):
+def spool_stdin(stdin):
+    """Return a readable file handle with the given input, or DEVNULL when there is none"""
+    if stdin is None:
+        # Never let programs read from the API server's own stdin
+        return subprocess.DEVNULL
+    
+    # Backed by an unlinked file on disk, so large test inputs are not piped through memory
+    stdin_file = tempfile.TemporaryFile(mode="w+b")
+    stdin_file.write(stdin.encode("utf-8"))
+    stdin_file.seek(0)
+    return stdin_file
+
+def get_venv_python(assignment_dir):
+    """Return the path to the Python interpreter in an assignment's virtual environment"""
+    if os.name == 'nt':  # Windows
+        return os.path.join(assignment_dir, "venv", "Scripts", "python.exe")
+    return os.path.join(assignment_dir, "venv", "bin", "python")
+
+def execution_env():
+    """Return a copy of the environment for a submission, pointing ML libraries at the artifact cache"""
+    env = os.environ.copy()
+    env.update(artifact_cache.variables)
+    return env
+
+def get_node_env(assignment_dir):
+    """Return a copy of the environment with NODE_PATH including the assignment's node_modules"""
+    env = execution_env()
+    node_modules_path = os.path.join(assignment_dir, "node_modules")
+    
+    # os.pathsep handles NODE_PATH differently based on OS (";" on Windows, ":" elsewhere)
+    if "NODE_PATH" in env:
+        env["NODE_PATH"] = f"{node_modules_path}{os.pathsep}{env['NODE_PATH']}"
+    else:
+        env["NODE_PATH"] = node_modules_path
+    return env
+
+def write_project_files(project_dir, entry_name, code, files):
+    """Write the entry file and any additional submission files, returning the entry file path"""
+    files = files or {}
+    check_quota(len(code.encode("utf-8")) + sum(len(content.encode("utf-8")) for content in files.values()))
+    
+    for rel_path, content in files.items():
+        normalized = os.path.normpath(rel_path)
+        if os.path.isabs(normalized) or normalized.startswith("..") or normalized == entry_name:
+            raise ValueError(f"Invalid file path in submission: {rel_path}")
+        
+        file_path = os.path.join(project_dir, normalized)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as f:
+            f.write(content)
+    
+    entry_path = os.path.join(project_dir, entry_name)
+    with open(entry_path, "w") as f:
+        f.write(code)
+    return entry_path
+
+def run_submission(command, stdin, comparator=None, timeout=EXECUTION_TIMEOUT, env=None, cwd=None):
+    """Run a submission on its own cores; returns (result, comparison verdict).
+    
+    With a comparator, stdout is checked as it streams and the program is killed at the first difference.
+    """
+    with cpu_allocator.reserve() as cores, pinned(cores):
+        env = limit_threads(dict(os.environ if env is None else env), len(cores))
+        if comparator is None:
+            result, comparison = run_process_group(command, stdin=stdin, timeout=timeout, env=env, cwd=cwd), None
+        else:
+            result, comparison = run_compared(command, timeout, comparator, stdin=stdin, env=env, cwd=cwd)
+    if cwd is not None and workspaces.exceeded_quota(cwd):
+        result.stderr += f"\nKilled: the program wrote more than the workspace quota of {WORKSPACE_QUOTA_BYTES} bytes\n"
+    return result, comparison
+
+def execute_python_code(assignment_dir, code, stdin=subprocess.DEVNULL, files=None, comparator=None,
+                        timeout=EXECUTION_TIMEOUT):
     """Execute Python code in a virtual environment"""
-    temp_file_path = None
+    project_dir = workspaces.acquire()
     try:
-        # Create a temporary file for the code
-        with tempfile.NamedTemporaryFile(suffix='.py', mode='w', delete=False) as temp_file:
-            temp_file_path = temp_file.name
-            temp_file.write(code)
+        # Write the code (and any additional project files) to a per-execution workspace
+        temp_file_path = write_project_files(project_dir, "main.py", code, files)
+        fixture_store.link_into(os.path.basename(assignment_dir), project_dir)
         
         # Get path to Python interpreter in the virtual environment
-        if os.name == 'nt':  # Windows
-            python_path = os.path.join(assignment_dir, "venv", "Scripts", "python.exe")
-        else:  # Unix-like
-            python_path = os.path.join(assignment_dir, "venv", "bin", "python")
+        python_path = get_venv_python(assignment_dir)
         
         # Execute the code with the virtual environment's Python
         start_time = time.time()
-        result = subprocess.run(
-            [python_path, temp_file_path],
-            capture_output=True,
-            text=True,
-            timeout=30  # Timeout after 30 seconds
+        # Unbuffered output when comparing, so a wrong first line is seen (and stopped) right away
+        unbuffered = ["-u"] if comparator is not None else []
+        result, comparison = run_submission(
+            [python_path] + get_launch_flags(assignment_dir) + unbuffered + [temp_file_path],
+            stdin,
+            comparator,
+            timeout,
+            env=execution_env(),
+            cwd=project_dir  # Relative paths resolve to submission files and fixtures
         )
         execution_time = time.time() - start_time
         
@@ -339,75 +874,57 @@ def execute_python_code(assignment_dir, code):
         output = result.stdout
         error = result.stderr
         
-        # Clean up the temporary file
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         return {
             "output": output,
             "error": error,
-            "execution_time": round(execution_time, 3)
+            "execution_time": round(execution_time, 3),
+            "comparison": comparison,
+            "exit_code": result.returncode
         }
     
     except subprocess.TimeoutExpired:
-        # Clean up the temporary file if it exists
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         return {
             "output": "",
-            "error": "Execution timed out after 30 seconds",
-            "execution_time": 30.0
+            "error": f"Execution timed out after {timeout:g} seconds",
+            "execution_time": float(timeout)
         }
     
     except Exception as e:
-        # Clean up the temporary file if it exists
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         logger.error(f"Python execution error: {str(e)}")
         return {
             "output": "",
             "error": f"Python execution error: {str(e)}",
             "execution_time": 0.0
         }
+    
+    finally:
+        # Always return the workspace, whatever happened during execution
+        workspaces.release(project_dir)
 
-def execute_javascript_code(assignment_dir, code):
+def execute_javascript_code(assignment_dir, code, stdin=subprocess.DEVNULL, files=None, comparator=None,
+                            timeout=EXECUTION_TIMEOUT):
     """Execute JavaScript code using Node.js"""
-    temp_file_path = None
+    project_dir = workspaces.acquire()
     try:
-        # Create a temporary file for the code
-        with tempfile.NamedTemporaryFile(suffix='.js', mode='w', delete=False) as temp_file:
-            temp_file_path = temp_file.name
-            temp_file.write(code)
+        # Write the code (and any additional project files) to a per-execution workspace
+        temp_file_path = write_project_files(project_dir, "main.js", code, files)
+        fixture_store.link_into(os.path.basename(assignment_dir), project_dir)
         
         # Execute the code with Node.js
         start_time = time.time()
         
         # Set NODE_PATH to include the assignment's node_modules
-        env = os.environ.copy()
-        node_modules_path = os.path.join(assignment_dir, "node_modules")
-        
-        # Handle NODE_PATH differently based on OS
-        if os.name == 'nt':  # Windows
-            path_separator = ";"
-        else:  # Unix-like
-            path_separator = ":"
-            
-        if "NODE_PATH" in env:
-            env["NODE_PATH"] = f"{node_modules_path}{path_separator}{env['NODE_PATH']}"
-        else:
-            env["NODE_PATH"] = node_modules_path
+        env = get_node_env(assignment_dir)
         
         logger.info(f"Setting NODE_PATH to: {env['NODE_PATH']}")
         
-        result = subprocess.run(
+        result, comparison = run_submission(
             ["node", temp_file_path],
-            capture_output=True,
-            text=True,
-            timeout=30,  # Timeout after 30 seconds
+            stdin,
+            comparator,
+            timeout,
             env=env,
-            cwd=assignment_dir  # Run in the assignment directory to access local modules
+            cwd=project_dir  # Local modules resolve through NODE_PATH
         )
         execution_time = time.time() - start_time
         
@@ -415,83 +932,72 @@ def execute_javascript_code(assignment_dir, code):
         output = result.stdout
         error = result.stderr
         
-        # Clean up the temporary file
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         return {
             "output": output,
             "error": error,
-            "execution_time": round(execution_time, 3)
+            "execution_time": round(execution_time, 3),
+            "comparison": comparison,
+            "exit_code": result.returncode
         }
     
     except subprocess.TimeoutExpired:
-        # Clean up the temporary file if it exists
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         return {
             "output": "",
-            "error": "JavaScript execution timed out after 30 seconds",
-            "execution_time": 30.0
+            "error": f"JavaScript execution timed out after {timeout:g} seconds",
+            "execution_time": float(timeout)
         }
     
     except Exception as e:
-        # Clean up the temporary file if it exists
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         logger.error(f"JavaScript execution error: {str(e)}")
         return {
             "output": "",
             "error": f"JavaScript execution error: {str(e)}",
             "execution_time": 0.0
         }
+    
+    finally:
+        # Always return the workspace, whatever happened during execution
+        workspaces.release(project_dir)
 
-def execute_cpp_code(assignment_dir, code):
-    """Execute C++ code by directly compiling with g++ or another compiler if available"""
+def execute_cpp_code(assignment_dir, code, stdin=subprocess.DEVNULL, files=None, build_profile=DEFAULT_BUILD_PROFILE,
+                     comparator=None, timeout=EXECUTION_TIMEOUT):
+    """Execute C++ code, compiling each translation unit once and reusing cached object files"""
+    project_dir = workspaces.acquire()
     try:
-        # Create source file
-        src_dir = os.path.join(assignment_dir, "src")
+        # Write the sources to a per-execution workspace so concurrent runs never overwrite each other
+        src_dir = os.path.join(project_dir, "src")
         os.makedirs(src_dir, exist_ok=True)
-        
-        src_file = os.path.join(src_dir, "main.cpp")
-        
-        # Write code to the source file
-        with open(src_file, "w") as f:
-            f.write(code)
+        write_project_files(src_dir, "main.cpp", code, files)
+        fixture_store.link_into(os.path.basename(assignment_dir), project_dir)
         
         # Start timing
         start_time = time.time()
         
-        # In Docker, we know g++ is installed
-        compiler = "g++"
-        output_file = os.path.join(assignment_dir, "program")
+        output_file = os.path.join(project_dir, "program")
         if os.name == 'nt':  # Windows
             output_file += ".exe"
         
-        # Compile the code
-        compile_result = subprocess.run(
-            [compiler, "-std=c++17", src_file, "-o", output_file],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        # Compile the code, reusing object files cached in the assignment's build directory
+        with compile_pool.slot():
+            compile_result = compile_project(src_dir, os.path.join(assignment_dir, "build", "objects"),
+                                             output_file, build_profile)
+        compile_time = time.time() - start_time
         
-        if compile_result.returncode != 0:
+        if not compile_result["success"]:
             return {
                 "output": "",
-                "error": f"Compilation failed:\n{compile_result.stderr}",
+                "error": f"Compilation failed:\n{compile_result['stderr']}",
                 "execution_time": round(time.time() - start_time, 3)
             }
         
         # Run the compiled program
-        run_result = subprocess.run(
+        run_result, comparison = run_submission(
             [output_file],
-            capture_output=True,
-            text=True,
-            timeout=30,  # Timeout after 30 seconds
-            cwd=assignment_dir
+            stdin,
+            comparator,
+            timeout,
+            env=execution_env(),
+            cwd=project_dir
         )
         
         execution_time = time.time() - start_time
@@ -499,16 +1005,22 @@ def execute_cpp_code(assignment_dir, code):
         return {
             "output": run_result.stdout,
             "error": run_result.stderr,
-            "execution_time": round(execution_time, 3)
+            "execution_time": round(execution_time, 3),
+            "comparison": comparison,
+            "compile_time": round(compile_time, 3),
+            "exit_code": run_result.returncode
         }
     
     except subprocess.TimeoutExpired:
         return {
             "output": "",
-            "error": "C++ execution timed out after 30 seconds",
-            "execution_time": 30.0
+            "error": f"C++ execution timed out after {timeout:g} seconds",
+            "execution_time": float(timeout)
         }
     
+    except PoolBusy:
+        raise
+    
     except Exception as e:
         logger.error(f"C++ execution error: {str(e)}")
         return {
@@ -516,6 +1028,429 @@ def execute_cpp_code(assignment_dir, code):
             "error": f"C++ execution error: {str(e)}",
             "execution_time": 0.0
         }
+    
+    finally:
+        workspaces.release(project_dir)
+
+@app.post("/benchmark/code")
+def benchmark_code(benchmark_data: BenchmarkRequest):
+    """Run code repeatedly after warm-up and report timing statistics per input size"""
+    assignment_dir = os.path.join(BASE_DIR, benchmark_data.assignment_name)
+    if not os.path.exists(assignment_dir):
+        raise HTTPException(status_code=404, detail=f"Assignment '{benchmark_data.assignment_name}' not found")
+    
+    metadata = ensure_environment(benchmark_data.assignment_name, assignment_dir)
+    language = metadata.get("language", "python")
+    
+    try:
+        validate_benchmark_options(language, benchmark_data.function, benchmark_data.input_generator,
+                                   benchmark_data.iterations, benchmark_data.warmup, benchmark_data.input_sizes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    validate_build_profile(benchmark_data.build_profile)
+    
+    config = {
+        "function": benchmark_data.function,
+        "generator": benchmark_data.input_generator,
+        "sizes": benchmark_data.input_sizes,
+        "iterations": benchmark_data.iterations,
+        "warmup": benchmark_data.warmup
+    }
+    
+    project_dir = workspaces.acquire()
+    try:
+        if language == "python":
+            config["entry"] = write_project_files(project_dir, "main.py", benchmark_data.code, benchmark_data.files)
+            fixture_store.link_into(benchmark_data.assignment_name, project_dir)
+            # Pinned to a core budget so timings do not swing with the load of concurrent runs
+            with execution_pools[language].slot(), cpu_allocator.reserve() as cores, pinned(cores):
+                raw_results = run_in_process_benchmark(
+                    [get_venv_python(assignment_dir)] + get_launch_flags(assignment_dir), PYTHON_HARNESS, "__benchmark_harness__.py", config, project_dir,
+                    env=limit_threads(execution_env(), len(cores)), cwd=project_dir
+                )
+        elif language == "javascript":
+            code = benchmark_data.code
+            if benchmark_data.function:
+                code += javascript_export_footer(benchmark_data.function, benchmark_data.input_generator)
+            config["entry"] = write_project_files(project_dir, "main.js", code, benchmark_data.files)
+            fixture_store.link_into(benchmark_data.assignment_name, project_dir)
+            with execution_pools[language].slot(), cpu_allocator.reserve() as cores, pinned(cores):
+                raw_results = run_in_process_benchmark(
+                    ["node"], JAVASCRIPT_HARNESS, "__benchmark_harness__.js", config, project_dir,
+                    env=limit_threads(get_node_env(assignment_dir), len(cores)), cwd=project_dir
+                )
+        elif language == "cpp":
+            # Compiled programs cannot be re-entered in-process, so each iteration is a full run
+            src_dir = os.path.join(project_dir, "src")
+            os.makedirs(src_dir, exist_ok=True)
+            write_project_files(src_dir, "main.cpp", benchmark_data.code, benchmark_data.files)
+            fixture_store.link_into(benchmark_data.assignment_name, project_dir)
+            output_file = os.path.join(project_dir, "program")
+            build_profile = benchmark_data.build_profile or metadata.get("build_profile", DEFAULT_BUILD_PROFILE)
+            with compile_pool.slot():
+                compile_result = compile_project(src_dir, os.path.join(assignment_dir, "build", "objects"),
+                                                 output_file, build_profile)
+            if not compile_result["success"]:
+                return {"results": [], "error": f"Compilation failed:\n{compile_result['stderr']}"}
+            with execution_pools[language].slot(), cpu_allocator.reserve() as cores, pinned(cores):
+                raw_results = run_process_benchmark([output_file], benchmark_data.iterations, benchmark_data.warmup,
+                                                    benchmark_data.input_sizes,
+                                                    env=limit_threads(execution_env(), len(cores)), cwd=project_dir)
+        else:
+            return {"results": [], "error": f"Unsupported language: {language}"}
+        
+        summaries = [summarize(samples) for samples in raw_results]
+        return {
+            "language": language,
+            "mode": "process" if language == "cpp" else "in_process",
+            "function": benchmark_data.function,
+            "results": summaries,
+            "scaling_exponent": scaling_exponent(summaries),
+            "error": ""
+        }
+    
+    except subprocess.TimeoutExpired:
+        return {"results": [], "error": f"Benchmark timed out after {BENCHMARK_TIMEOUT} seconds"}
+    
+    except PoolBusy:
+        raise
+    
+    except Exception as e:
+        logger.error(f"Benchmark error: {str(e)}")
+        return {"results": [], "error": f"Benchmark error: {str(e)}"}
+    
+    finally:
+        workspaces.release(project_dir)
+
+@app.post("/judge/function")
+def judge_function(judge_data: JudgeRequest):
+    """Load a submission once and check a function's return values against a batch of cases"""
+    assignment_dir = os.path.join(BASE_DIR, judge_data.assignment_name)
+    if not os.path.exists(assignment_dir):
+        raise HTTPException(status_code=404, detail=f"Assignment '{judge_data.assignment_name}' not found")
+    
+    metadata = ensure_environment(judge_data.assignment_name, assignment_dir)
+    language = metadata.get("language", "python")
+    
+    try:
+        timeout = judge_data.timeout or JUDGE_TIMEOUT
+        time_limits = [case.time_limit for case in judge_data.cases]
+        validate_judge_options(language, judge_data.function, len(judge_data.cases), timeout, time_limits)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    config = {"function": judge_data.function, "cases": [case.args for case in judge_data.cases],
+              "time_limits": time_limits}
+    
+    project_dir = workspaces.acquire()
+    try:
+        if language == "python":
+            config["entry"] = write_project_files(project_dir, "main.py", judge_data.code, judge_data.files)
+            fixture_store.link_into(judge_data.assignment_name, project_dir)
+            with execution_pools[language].slot(), cpu_allocator.reserve() as cores, pinned(cores):
+                records, output, timed_out = run_judge(
+                    [get_venv_python(assignment_dir)] + get_launch_flags(assignment_dir), PYTHON_JUDGE_HARNESS,
+                    "__judge_harness__.py", config, project_dir, env=limit_threads(execution_env(), len(cores)),
+                    cwd=project_dir, timeout=timeout
+                )
+        else:
+            code = judge_data.code + javascript_judge_footer(judge_data.function)
+            config["entry"] = write_project_files(project_dir, "main.js", code, judge_data.files)
+            fixture_store.link_into(judge_data.assignment_name, project_dir)
+            with execution_pools[language].slot(), cpu_allocator.reserve() as cores, pinned(cores):
+                records, output, timed_out = run_judge(
+                    ["node"], JAVASCRIPT_JUDGE_HARNESS, "__judge_harness__.js", config, project_dir,
+                    env=limit_threads(get_node_env(assignment_dir), len(cores)), cwd=project_dir, timeout=timeout
+                )
+        
+        results = grade_cases([case.expected for case in judge_data.cases], records, timed_out,
+                              judge_data.float_tolerance, judge_data.unordered, time_limits)
+        return {
+            "language": language,
+            "function": judge_data.function,
+            "passed": sum(result["passed"] for result in results),
+            "total": len(results),
+            "results": results,
+            "output": output,
+            "error": f"Judging timed out after {timeout:g} seconds" if timed_out else ""
+        }
+    
+    except PoolBusy:
+        raise
+    
+    except Exception as e:
+        logger.error(f"Judge error: {str(e)}")
+        return {"results": [], "error": f"Judge error: {str(e)}"}
+    
+    finally:
+        workspaces.release(project_dir)
+
+def prepare_interactive_command(assignment_dir, language, code, files, work_dir, build_profile=DEFAULT_BUILD_PROFILE):
+    """Write (and for C++ compile) code in work_dir and return (command, env, compile_error)"""
+    env = execution_env()
+    
+    if language == "python":
+        code_path = write_project_files(work_dir, "main.py", code, files)
+        # Unbuffered so prompts reach the client before the program blocks on input
+        return [get_venv_python(assignment_dir)] + get_launch_flags(assignment_dir) + ["-u", code_path], env, None
+    
+    if language == "javascript":
+        code_path = write_project_files(work_dir, "main.js", code, files)
+        return ["node", code_path], get_node_env(assignment_dir), None
+    
+    if language == "cpp":
+        src_dir = os.path.join(work_dir, "src")
+        os.makedirs(src_dir, exist_ok=True)
+        write_project_files(src_dir, "main.cpp", code, files)
+        output_file = os.path.join(work_dir, "program")
+        if os.name == 'nt':  # Windows
+            output_file += ".exe"
+        with compile_pool.slot():
+            compile_result = compile_project(src_dir, os.path.join(assignment_dir, "build", "objects"),
+                                             output_file, build_profile)
+        if not compile_result["success"]:
+            return None, env, f"Compilation failed:\n{compile_result['stderr']}"
+        return [output_file], env, None
+    
+    return None, env, f"Unsupported language: {language}"
+
+@app.websocket("/execute/interactive")
+async def execute_interactive(websocket: WebSocket):
+    """Run code interactively, relaying stdin and stdout/stderr over a WebSocket.
+    
+    The client first sends {"assignment_name": ..., "code": ..., "files": {...}} (plus an
+    optional "build_profile" for C++), then any number of {"stdin": "..."} messages and
+    optionally {"eof": true}. The server streams
+    {"stdout": ...} / {"stderr": ...} messages and finishes with
+    {"exit_code": ..., "execution_time": ...}.
+    
+    Each connection counts against the interactive session budget, not the execution slots, since
+    sessions mostly wait on their user. When the budget is used up or the host is overloaded (or, for
+    C++, no compile slot frees up in time) the client receives {"error": ..., "retry_after": ...} and
+    the socket is closed with code 1013.
+    """
+    await websocket.accept()
+    try:
+        interactive_sessions.acquire()
+    except AdmissionRejected as e:
+        logger.warning(f"Refused interactive session: {str(e)}")
+        await websocket.send_json({"error": str(e), "retry_after": e.retry_after})
+        await websocket.close(code=1013)  # Try again later
+        return
+    try:
+        work_dir = workspaces.acquire()
+    except Exception:
+        interactive_sessions.release()
+        raise
+    process = None
+    
+    try:
+        request = await websocket.receive_json()
+        assignment_name = str(request.get("assignment_name", ""))
+        assignment_dir = os.path.join(BASE_DIR, assignment_name)
+        
+        if not assignment_name.replace("_", "").isalnum() or not os.path.exists(assignment_dir):
+            await websocket.send_json({"error": f"Assignment '{assignment_name}' not found"})
+            return
+        
+        metadata = await asyncio.to_thread(ensure_environment, assignment_name, assignment_dir)
+        language = metadata.get("language", "python")
+        build_profile = str(request.get("build_profile") or metadata.get("build_profile", DEFAULT_BUILD_PROFILE))
+        profile_error = unsupported_build_profile(build_profile)
+        if profile_error:
+            await websocket.send_json({"error": profile_error})
+            return
+        
+        command, env, compile_error = await asyncio.to_thread(
+            prepare_interactive_command, assignment_dir, language,
+            request.get("code", ""), request.get("files", {}), work_dir, build_profile
+        )
+        await asyncio.to_thread(fixture_store.link_into, assignment_name, work_dir)
+        if compile_error:
+            await websocket.send_json({"error": compile_error})
+            return
+        # Sessions mostly wait for input, so they are not pinned, but their thread pools stay in budget
+        limit_threads(env, cpu_allocator.cores_per_execution)
+        
+        start_time = time.time()
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            cwd=work_dir,
+            **session_kwargs()
+        )
+        register_group(process.pid, command)
+        
+        async def relay_output(stream, key):
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            while True:
+                chunk = await stream.read(INTERACTIVE_CHUNK_SIZE)
+                text = decoder.decode(chunk, final=not chunk)
+                if text:
+                    await websocket.send_json({key: text})
+                if not chunk:
+                    break
+        
+        async def relay_input():
+            received = 0
+            try:
+                while True:
+                    message = await websocket.receive_json()
+                    if "stdin" in message:
+                        data = str(message["stdin"]).encode("utf-8")
+                        received += len(data)
+                        if received > INTERACTIVE_MAX_INPUT:
+                            await websocket.send_json({"error": "Input limit exceeded, closing stdin"})
+                            break
+                        process.stdin.write(data)
+                        # Backpressure: wait until the program has consumed the pipe buffer
+                        await process.stdin.drain()
+                    if message.get("eof"):
+                        break
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Program exited without reading all of its input
+            finally:
+                if not process.stdin.is_closing():
+                    process.stdin.close()
+        
+        input_task = asyncio.create_task(relay_input())
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    relay_output(process.stdout, "stdout"),
+                    relay_output(process.stderr, "stderr"),
+                    process.wait()
+                ),
+                timeout=INTERACTIVE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            release_group(process.pid, timed_out=True)
+            process.kill()
+            await process.wait()
+            await websocket.send_json({"error": f"Interactive session timed out after {INTERACTIVE_TIMEOUT} seconds"})
+        finally:
+            input_task.cancel()
+        
+        if workspaces.exceeded_quota(work_dir):
+            await websocket.send_json({"error": f"Killed: the program wrote more than the workspace quota of "
+                                                f"{WORKSPACE_QUOTA_BYTES} bytes"})
+        await websocket.send_json({
+            "exit_code": process.returncode,
+            "execution_time": round(time.time() - start_time, 3)
+        })
+    
+    except WebSocketDisconnect:
+        logger.info("Interactive session closed by client")
+    
+    except PoolBusy as e:
+        logger.warning(f"Shed interactive session: {str(e)}")
+        await websocket.send_json({"error": str(e), "retry_after": e.retry_after})
+        await websocket.close(code=1013)
+    
+    except Exception as e:
+        logger.error(f"Interactive execution error: {str(e)}")
+        try:
+            await websocket.send_json({"error": f"Interactive execution error: {str(e)}"})
+        except Exception:
+            pass
+    
+    finally:
+        if process is not None:
+            # Kill the whole tree, including anything the program forked before exiting
+            release_group(process.pid, timed_out=process.returncode is None)
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        workspaces.release(work_dir)
+        interactive_sessions.release()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+@app.post("/sessions")
+def create_session(session_data: SessionCreate):
+    """Start a persistent interpreter in an assignment environment, or return the owner's live one"""
+    assignment_name = session_data.assignment_name
+    assignment_dir = os.path.join(BASE_DIR, assignment_name)
+    if not os.path.exists(assignment_dir):
+        raise HTTPException(status_code=404, detail=f"Assignment '{assignment_name}' not found")
+    
+    if session_data.owner is not None and not session_data.restart:
+        session = session_manager.find(assignment_name, session_data.owner)
+        if session is not None:
+            return dict(session.describe(), created=False)
+    
+    try:
+        metadata = ensure_environment(assignment_name, assignment_dir)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Assignment metadata not usable: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Assignment metadata not usable: {str(e)}")
+    language = metadata.get("language", "python")
+    if language not in SESSION_LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"Sessions are not supported for {language}; use /execute/code")
+    
+    harness_source, harness_name = REPL_HARNESSES[language]
+    work_dir = workspaces.acquire()
+    try:
+        harness_path = write_project_files(work_dir, harness_name, harness_source, session_data.files)
+        fixture_store.link_into(assignment_name, work_dir)
+        if language == "python":
+            command = [get_venv_python(assignment_dir)] + get_launch_flags(assignment_dir) + [harness_path]
+            env = execution_env()
+        else:
+            command = ["node", harness_path]
+            env = get_node_env(assignment_dir)
+        # Sessions mostly wait between cells, so they are not pinned, but their thread pools stay in budget
+        limit_threads(env, cpu_allocator.cores_per_execution)
+        session = session_manager.open(session_data.owner, assignment_name, language, command, env, work_dir)
+    except SessionLimitReached as e:
+        workspaces.release(work_dir)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except ValueError as e:
+        workspaces.release(work_dir)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        workspaces.release(work_dir)
+        logger.error(f"Error starting session: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to start session: {str(e)}")
+    return dict(session.describe(), created=True)
+
+@app.post("/sessions/{session_id}/execute")
+def execute_cell(session_id: str, cell: CellExecution):
+    """Run a cell against a session's preserved state"""
+    timeout = cell.timeout or DEFAULT_CELL_TIMEOUT
+    if not 0 < timeout <= MAX_CELL_TIMEOUT:
+        raise HTTPException(status_code=400, detail=f"timeout must be between 0 and {MAX_CELL_TIMEOUT} seconds")
+    if len(cell.code.encode("utf-8")) > MAX_CELL_BYTES:
+        raise HTTPException(status_code=400, detail=f"Cells are limited to {MAX_CELL_BYTES} bytes")
+    
+    session = session_manager.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+    with execution_pools[session.language].slot():
+        try:
+            return session_manager.execute(session_id, cell.code, timeout)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+
+@app.get("/sessions/{session_id}")
+def get_session(session_id: str):
+    """Describe a session"""
+    session = session_manager.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+    return session.describe()
+
+@app.delete("/sessions/{session_id}")
+def close_session(session_id: str):
+    """End a session and discard its state"""
+    if not session_manager.close(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+    return {"message": f"Session '{session_id}' closed"}
 
 @app.delete("/delete/assignment/{assignment_name}")
 def delete_assignment(assignment_name: str):
@@ -526,14 +1461,196 @@ def delete_assignment(assignment_name: str):
         raise HTTPException(status_code=404, detail=f"Assignment '{assignment_name}' not found")
     
     try:
-        # Remove the assignment directory
-        shutil.rmtree(assignment_dir)
+        # Move the assignment directory aside; the files are deleted in the background
+        session_manager.close_assignment(assignment_name)
+        environment_store.remove(assignment_dir)
+        fixture_store.remove(assignment_name)
         return {"message": f"Assignment '{assignment_name}' deleted successfully"}
     
     except Exception as e:
         logger.error(f"Error deleting assignment: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to delete assignment: {str(e)}")
 
+@app.put("/assignment/{assignment_name}/fixtures/{path:path}")
+async def upload_fixture(assignment_name: str, path: str, request: Request):
+    """Stream a read-only data file into an assignment, available to every execution at path"""
+    assignment_dir = os.path.join(BASE_DIR, assignment_name)
+    if not assignment_name.replace("_", "").isalnum() or not os.path.exists(assignment_dir):
+        raise HTTPException(status_code=404, detail=f"Assignment '{assignment_name}' not found")
+    try:
+        rel_path = normalize_fixture_path(path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The body is written to disk in large chunks as it arrives, never held in memory whole
+    upload = await asyncio.to_thread(fixture_store.begin_upload)
+    try:
+        buffer = bytearray()
+        async for chunk in request.stream():
+            buffer += chunk
+            if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                await asyncio.to_thread(upload.write, bytes(buffer))
+                buffer.clear()
+        await asyncio.to_thread(upload.write, bytes(buffer))
+        return await asyncio.to_thread(fixture_store.commit, assignment_name, rel_path, upload)
+    except FixtureTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    finally:
+        await asyncio.to_thread(upload.discard)
+
+@app.get("/assignment/{assignment_name}/fixtures")
+def list_fixtures(assignment_name: str):
+    """List the data files attached to an assignment"""
+    manifest = fixture_store.manifest(assignment_name)
+    return {"fixtures": [dict(entry, path=path) for path, entry in sorted(manifest.items())]}
+
+@app.delete("/assignment/{assignment_name}/fixtures/{path:path}")
+def delete_fixture(assignment_name: str, path: str):
+    """Detach a data file from an assignment"""
+    try:
+        removed = fixture_store.remove(assignment_name, normalize_fixture_path(path))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Fixture '{path}' not found in assignment '{assignment_name}'")
+    return {"message": f"Fixture '{path}' deleted from assignment '{assignment_name}'"}
+
+@app.put("/artifacts/{namespace}")
+def seed_artifacts(namespace: str, archive: UploadFile = File(...)):
+    """Unpack a tar archive of model weights or corpora into a shared artifact cache namespace"""
+    try:
+        return artifact_cache.seed(namespace, archive.file)
+    except (ValueError, tarfile.TarError) as e:
+        logger.error(f"Invalid artifact archive: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid artifact archive: {str(e)}")
+
+@app.get("/artifacts")
+def list_artifacts():
+    """Report the seeded artifact namespaces and the variables executions receive for them"""
+    return artifact_cache.usage()
+
+@app.delete("/artifacts/{namespace}")
+def delete_artifacts(namespace: str):
+    """Remove an artifact cache namespace"""
+    if not artifact_cache.remove(namespace):
+        raise HTTPException(status_code=404, detail=f"Artifact namespace '{namespace}' is not seeded")
+    return {"message": f"Artifact namespace '{namespace}' deleted"}
+
+@app.get("/export/assignment/{assignment_name}")
+def export_assignment(assignment_name: str):
+    """Export an assignment environment as a compressed, deduplicated archive"""
+    assignment_dir = os.path.join(BASE_DIR, assignment_name)
+    
+    if not assignment_name.replace("_", "").isalnum() or not os.path.exists(assignment_dir):
+        raise HTTPException(status_code=404, detail=f"Assignment '{assignment_name}' not found")
+    
+    # Write the archive to disk first so it is streamed back without buffering in memory
+    fd, archive_path = tempfile.mkstemp(prefix=f"{assignment_name}-", suffix=".tar.gz")
+    os.close(fd)
+    
+    try:
+        stats = export_environment(assignment_dir, archive_path)
+    except Exception as e:
+        os.unlink(archive_path)
+        logger.error(f"Error exporting assignment: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to export assignment: {str(e)}")
+    
+    return FileResponse(
+        archive_path,
+        media_type="application/gzip",
+        filename=f"{assignment_name}.tar.gz",
+        headers={"X-Environment-Files": str(stats["files"]),
+                 "X-Environment-Deduplicated": str(stats["deduplicated"])},
+        background=BackgroundTask(os.unlink, archive_path)
+    )
+
+@app.post("/import/assignment/{assignment_name}")
+def import_assignment(assignment_name: str, archive: UploadFile = File(...)):
+    """Hydrate an assignment environment from an archive produced by /export/assignment"""
+    if not assignment_name.replace("_", "").isalnum():
+        raise HTTPException(status_code=400, detail="Assignment name must be alphanumeric with underscores")
+    
+    assignment_dir = os.path.join(BASE_DIR, assignment_name)
+    
+    # Unpack into a hidden staging directory so a failed import never leaves a half-written environment
+    staging_dir = tempfile.mkdtemp(prefix=f".import-{assignment_name}-", dir=BASE_DIR)
+    
+    try:
+        metadata = import_environment(archive.file, staging_dir)
+        
+        if os.path.exists(assignment_dir):
+            logger.info(f"Assignment '{assignment_name}' already exists - replacing with imported environment")
+            environment_store.remove(assignment_dir)
+        os.rename(staging_dir, assignment_dir)
+        
+        logger.info(f"Imported environment for assignment: {assignment_name}")
+        return {
+            "message": f"Assignment '{assignment_name}' imported successfully",
+            "assignment_name": assignment_name,
+            "language": metadata.get("language", "unknown"),
+            "requirements": metadata.get("requirements", [])
+        }
+    
+    except (ValueError, tarfile.TarError) as e:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        logger.error(f"Invalid environment archive: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid environment archive: {str(e)}")
+    
+    except Exception as e:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        logger.error(f"Error importing assignment: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to import assignment: {str(e)}")
+
+@app.get("/environment/{assignment_name}/startup")
+def environment_startup(assignment_name: str):
+    """Report the measured cold-start time, launch flags and import profile of a Python environment"""
+    assignment_dir = os.path.join(BASE_DIR, assignment_name)
+    if not assignment_name.replace("_", "").isalnum() or not os.path.exists(assignment_dir):
+        raise HTTPException(status_code=404, detail=f"Assignment '{assignment_name}' not found")
+    
+    profile = load_startup_profile(assignment_dir)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"No startup profile recorded for assignment '{assignment_name}'")
+    return dict(profile, assignment_name=assignment_name)
+
+@app.get("/stats/processes")
+def process_stats():
+    """Report process groups started, killed on timeout and reaped after leaking"""
+    return get_process_stats()
+
+@app.get("/stats/admission")
+def admission_stats():
+    """Report the host load level, its pressure signals and admission counters"""
+    return dict(admission.get_stats(), interactive_sessions=interactive_sessions.get_stats())
+
+@app.get("/stats/sessions")
+def session_stats():
+    """Report live REPL sessions, their memory use and how sessions ended"""
+    return session_manager.get_stats()
+
+@app.get("/stats/pools")
+def pool_stats():
+    """Report the size and use of each elastic pool and recent scaling decisions"""
+    return autoscaler.get_stats()
+
+@app.get("/stats/cpu")
+def cpu_stats():
+    """Report the per-execution core budget and how many cores are currently assigned"""
+    return cpu_allocator.get_stats()
+
+@app.get("/stats/environments")
+def environment_stats():
+    """Report per-environment disk usage, last use and eviction state against the disk quota"""
+    environments = environment_store.usage()
+    return {
+        "environments": environments,
+        "total_bytes": sum(e["disk_bytes"] or 0 for e in environments),
+        "quota_bytes": ENVIRONMENT_QUOTA_BYTES,
+        "evictions": environment_store.evictions,
+        "objects_pruned": environment_store.objects_pruned,
+        "fixture_bytes": fixture_store.usage()
+    }
+
 @app.get("/list/assignments")
 def list_assignments():
     """List all available assignments with their languages"""
@@ -542,6 +1659,9 @@ def list_assignments():
         
         for name in os.listdir(BASE_DIR):
             dir_path = os.path.join(BASE_DIR, name)
+            # Skip hidden staging directories (e.g. in-progress imports)
+            if name.startswith("."):
+                continue
             if os.path.isdir(dir_path):
                 # Try to get language from metadata
                 metadata_path = os.path.join(dir_path, "metadata.json")
@@ -0,0 +1,183 @@
+# output_compare.py
+import math
+import codecs
+import threading
+import subprocess
+import logging
+from process_manager import session_kwargs, register_group, release_group
+
+logger = logging.getLogger("code_execution_api")
+
+COMPARISON_MODES = ("exact", "whitespace", "float")
+DEFAULT_FLOAT_TOLERANCE = 1e-6
+READ_CHUNK_SIZE = 65536
+MAX_STDERR_BYTES = 1024 * 1024
+MAX_REPORTED_LINE = 200  # Characters of each differing line included in the verdict
+
+def _is_float(token):
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+class OutputComparator:
+    """Checks program output against the expected output line by line as it arrives.
+
+    Modes: 'exact' compares lines verbatim, 'whitespace' compares the whitespace-separated
+    tokens of each line, 'float' does the same but lets numeric tokens differ by float_tolerance
+    (relative or absolute). Trailing blank lines never count.
+    """
+
+    def __init__(self, expected, mode="exact", float_tolerance=DEFAULT_FLOAT_TOLERANCE):
+        if mode not in COMPARISON_MODES:
+            raise ValueError(f"Unknown comparison mode '{mode}'. Supported modes: {', '.join(COMPARISON_MODES)}")
+        self.mode = mode
+        self.float_tolerance = float_tolerance
+        self.expected = expected.splitlines()
+        while self.expected and not self.expected[-1].strip():
+            self.expected.pop()
+        self.line_number = 0  # Complete lines consumed so far
+        self.pending = ""  # Partial line waiting for its newline
+        self.difference = None
+
+    def _lines_match(self, actual, expected):
+        if self.mode == "exact":
+            return actual.rstrip("\r") == expected.rstrip("\r")
+        actual_tokens, expected_tokens = actual.split(), expected.split()
+        if self.mode == "whitespace" or len(actual_tokens) != len(expected_tokens):
+            return actual_tokens == expected_tokens
+        for a, e in zip(actual_tokens, expected_tokens):
+            if a == e:
+                continue
+            if not (_is_float(a) and _is_float(e)):
+                return False
+            if not math.isclose(float(a), float(e), rel_tol=self.float_tolerance, abs_tol=self.float_tolerance):
+                return False
+        return True
+
+    def _fail(self, reason, expected, actual):
+        self.difference = {
+            "line": self.line_number,
+            "reason": reason,
+            "expected": None if expected is None else expected[:MAX_REPORTED_LINE],
+            "actual": None if actual is None else actual[:MAX_REPORTED_LINE]
+        }
+
+    def _check_line(self, line):
+        self.line_number += 1
+        if self.line_number <= len(self.expected):
+            if not self._lines_match(line, self.expected[self.line_number - 1]):
+                self._fail("mismatch", self.expected[self.line_number - 1], line)
+        elif line.strip():
+            self._fail("extra output", None, line)
+
+    def feed(self, text):
+        """Consume more output; returns False as soon as it can no longer match"""
+        if self.difference is not None:
+            return False
+        lines = (self.pending + text).split("\n")
+        self.pending = lines.pop()
+        for line in lines:
+            self._check_line(line)
+            if self.difference is not None:
+                return False
+        # Judge an unfinished line early once it can no longer match, so a program that floods
+        # output without newlines is stopped too
+        if self.line_number >= len(self.expected):
+            if self.pending.strip():
+                self.line_number += 1
+                self._fail("extra output", None, self.pending)
+        else:
+            expected = self.expected[self.line_number]
+            if self.mode == "exact":
+                diverged = not expected.startswith(self.pending.rstrip("\r"))
+            else:
+                diverged = len(self.pending) > 2 * len(expected) + 1024
+            if diverged:
+                self.line_number += 1
+                self._fail("mismatch", expected, self.pending)
+        return self.difference is None
+
+    def finish(self):
+        """Call once the program's output has ended; returns the verdict"""
+        if self.difference is None and self.pending:
+            self._check_line(self.pending)
+            self.pending = ""
+        if self.difference is None and self.line_number < len(self.expected):
+            self.line_number += 1
+            self._fail("missing output", self.expected[self.line_number - 1], None)
+        return {"passed": self.difference is None, "mode": self.mode, "first_difference": self.difference}
+
+def run_compared(command, timeout, comparator, stdin=subprocess.DEVNULL, env=None, cwd=None):
+    """Run a program in its own process group, checking stdout against comparator as it streams.
+
+    The whole group is killed the moment the output diverges, so wrong answers cost no more CPU
+    than it took to produce the first wrong line. Returns (CompletedProcess, verdict); raises
+    subprocess.TimeoutExpired like run_process_group.
+    """
+    process = subprocess.Popen(
+        command,
+        stdin=stdin,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        cwd=cwd,
+        **session_kwargs()
+    )
+    register_group(process.pid, command)
+
+    stderr_chunks = []
+    def read_stderr():
+        size = 0
+        for chunk in iter(lambda: process.stderr.read1(READ_CHUNK_SIZE), b""):
+            if size < MAX_STDERR_BYTES:
+                stderr_chunks.append(chunk[:MAX_STDERR_BYTES - size])
+                size += len(chunk)
+    stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+    stderr_thread.start()
+
+    timed_out = threading.Event()
+    def on_timeout():
+        timed_out.set()
+        release_group(process.pid, timed_out=True)
+        process.kill()
+    timer = threading.Timer(timeout, on_timeout)
+    timer.start()
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    stdout_parts = []
+    terminated_early = False
+    try:
+        while True:
+            chunk = process.stdout.read1(READ_CHUNK_SIZE)
+            if not chunk:
+                stdout_parts.append(decoder.decode(b"", final=True))
+                break
+            text = decoder.decode(chunk)
+            stdout_parts.append(text)
+            if not comparator.feed(text):
+                terminated_early = True
+                release_group(process.pid)
+                process.kill()
+                break
+        process.wait()
+    except BaseException:
+        release_group(process.pid, timed_out=True)
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        timer.cancel()
+        stderr_thread.join(timeout=5)
+        process.stdout.close()
+        process.stderr.close()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout)
+    release_group(process.pid)
+
+    verdict = comparator.finish()
+    verdict["terminated_early"] = terminated_early
+    stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace")
+    return subprocess.CompletedProcess(command, process.returncode, "".join(stdout_parts), stderr), verdict
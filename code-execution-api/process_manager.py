@@ -0,0 +1,338 @@
+# process_manager.py
+import os
+import sys
+import time
+import ctypes
+import signal
+import logging
+import threading
+import subprocess
+from workspace import WORKSPACE_QUOTA_BYTES, RUN_USER
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("code_execution_api")
+
+REAPER_INTERVAL = 10  # Seconds between scans for leaked processes
+PIPE_DRAIN_TIMEOUT = 1  # Seconds to wait for a killed program's output pipes to close
+ORPHAN_GRACE = 5  # Seconds before an unregistered child in a session of its own counts as a leak
+PR_SET_CHILD_SUBREAPER = 36
+
+# Process groups we launched: pgid -> command name. A group stays tracked until a
+# reaper scan finds no process left in its session.
+groups_lock = threading.Lock()
+active_groups = {}  # Leader still running
+finished_groups = {}  # Leader exited; any remaining member is a leak
+
+stats = {
+    "groups_started": 0,
+    "groups_killed_on_timeout": 0,
+    "leaked_processes_killed": 0,
+    "zombies_reaped": 0,
+    "groups_killed_over_quota": 0
+}
+
+def session_kwargs(as_run_user=True):
+    """Popen arguments that put the child in a new session/process group of its own.
+
+    With as_run_user it runs as RUN_AS_USER, if configured, without root's supplementary groups.
+    """
+    if os.name == 'nt':  # Windows
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    kwargs = {"start_new_session": True}
+    if as_run_user and RUN_USER is not None:
+        kwargs.update(user=RUN_USER[0], group=RUN_USER[1], extra_groups=[])
+    return kwargs
+
+def apply_file_size_limit(pid):
+    """Cap each file a running process writes at the workspace quota (SIGXFSZ / EFBIG beyond it).
+
+    Applied with prlimit right after the spawn rather than in a preexec_fn, which is unsafe with
+    threads and keeps subprocess off its vfork fast path. Processes forked before the limit is set
+    escape it, but still fall under the workspace quota monitor.
+    """
+    if resource is None or not hasattr(resource, "prlimit"):
+        return
+    try:
+        resource.prlimit(pid, resource.RLIMIT_FSIZE, (WORKSPACE_QUOTA_BYTES, WORKSPACE_QUOTA_BYTES))
+    except (ProcessLookupError, PermissionError):
+        pass  # Already exited
+
+def kill_group(pgid):
+    """SIGKILL every process in a group"""
+    if os.name == 'nt':  # Windows has no process groups to signal; the caller kills the child
+        return
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def _descendants(pid):
+    """Every process below pid, found by walking the /proc ppid chain"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            info = _read_proc_stat(int(entry))
+            if info is not None:
+                children.setdefault(info[1], []).append(int(entry))
+    found = []
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        found.append(child)
+        pending.extend(children.get(child, []))
+    return found
+
+def kill_tree(pgid):
+    """SIGKILL a group and every descendant of its leader, including any that left the group with setsid()"""
+    leader = _read_proc_stat(pgid) if os.path.isdir("/proc") else None
+    # Only walk from a leader that has not been reaped; a reused pid would not lead its own session
+    if leader is not None and leader[3] == pgid:
+        for pid in _descendants(pgid):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+    kill_group(pgid)
+
+def _mark_finished(pgid):
+    with groups_lock:
+        if pgid in active_groups:
+            finished_groups[pgid] = active_groups.pop(pgid)
+
+def _watch_leader(pgid):
+    """Once the group leader exits, kill the rest of its group so inherited pipes close at once"""
+    try:
+        # WNOWAIT leaves the leader as a zombie for its Popen to reap, which also keeps the
+        # pgid from being reused while we signal it
+        os.waitid(os.P_PID, pgid, os.WEXITED | os.WNOWAIT)
+    except ChildProcessError:
+        return
+    kill_group(pgid)
+    _mark_finished(pgid)
+
+def register_group(pgid, command, limit_file_size=True):
+    """Track a process group launched with session_kwargs(), capping its file sizes unless told not to"""
+    if limit_file_size:
+        apply_file_size_limit(pgid)
+    with groups_lock:
+        active_groups[pgid] = os.path.basename(str(command[0]))
+        stats["groups_started"] += 1
+    if hasattr(os, "waitid"):
+        threading.Thread(target=_watch_leader, args=(pgid,), name=f"watch-{pgid}", daemon=True).start()
+
+def release_group(pgid, timed_out=False):
+    """Kill whatever is left of a group whose leader has exited or timed out"""
+    kill_tree(pgid)
+    _mark_finished(pgid)
+    if timed_out:
+        with groups_lock:
+            stats["groups_killed_on_timeout"] += 1
+
+def run_process_group(command, timeout, stdin=subprocess.DEVNULL, env=None, cwd=None, limit_file_size=True,
+                      as_run_user=True):
+    """Like subprocess.run(capture_output=True, text=True), but the whole process tree is
+    killed on timeout, on error and after the program exits"""
+    process = subprocess.Popen(
+        command,
+        stdin=stdin,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+        cwd=cwd,
+        **session_kwargs(as_run_user)
+    )
+    register_group(process.pid, command, limit_file_size)
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        release_group(process.pid, timed_out=True)
+        process.kill()
+        try:
+            process.communicate(timeout=PIPE_DRAIN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            # Something that escaped the tree before the kill (e.g. a setsid() grandchild whose
+            # parent had already exited) still holds the pipes; kill it and stop reading
+            for pid in _pipe_holders(process.stdout, process.stderr):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    pass
+            process.stdout.close()
+            process.stderr.close()
+            process.wait()
+        raise
+    except BaseException:
+        release_group(process.pid, timed_out=True)
+        process.kill()
+        process.wait()
+        raise
+    release_group(process.pid)
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+def _read_proc_stat(pid):
+    """Return (state, ppid, pgrp, session) for a pid from /proc, or None if it is gone"""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces and parentheses, so split after the last ')'
+    fields = data[data.rindex(")") + 2:].split()
+    return fields[0], int(fields[1]), int(fields[2]), int(fields[3])
+
+def _process_age(pid):
+    """Seconds since pid started, or None if it is gone"""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            data = f.read()
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError):
+        return None
+    start_ticks = int(data[data.rindex(")") + 2:].split()[19])
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+def _pipe_holders(*pipes):
+    """Pids other than ours with any of the given pipes open"""
+    if not os.path.isdir("/proc"):
+        return []
+    targets = {f"pipe:[{os.fstat(pipe.fileno()).st_ino}]" for pipe in pipes if pipe is not None and not pipe.closed}
+    own_pid = os.getpid()
+    holders = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit() or int(entry) == own_pid:
+            continue
+        try:
+            fds = os.listdir(f"/proc/{entry}/fd")
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                if os.readlink(f"/proc/{entry}/fd/{fd}") in targets:
+                    holders.append(int(entry))
+                    break
+            except OSError:
+                continue
+    return holders
+
+def reap_once():
+    """Kill processes that outlived their execution and reap zombies reparented to us"""
+    if not os.path.isdir("/proc"):
+        return
+
+    with groups_lock:
+        finished = dict(finished_groups)
+        active = set(active_groups)
+
+    own_pid = os.getpid()
+    own_session = os.getsid(0)
+    occupied_sessions = set()
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        pid = int(entry)
+        info = _read_proc_stat(pid)
+        if info is None:
+            continue
+        state, ppid, _, session = info
+        # A descendant that left its group with setsid() and was re-parented to us (as PID 1 or
+        # as the child subreaper) once its parent exited. The grace period skips children we
+        # have just started and not yet registered
+        escaped = (ppid == own_pid and session == pid and session != own_session
+                   and session not in active and session not in finished
+                   and (_process_age(pid) or 0) > ORPHAN_GRACE)
+
+        if state == "Z":
+            # Orphans re-parented to us (e.g. when the API runs as PID 1 in Docker) are never
+            # waited on by anyone else; only reap pids that no Popen object owns
+            if ppid == own_pid and ((session in finished and pid != session) or escaped):
+                try:
+                    if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                        stats["zombies_reaped"] += 1
+                except ChildProcessError:
+                    pass
+            continue
+
+        if session in finished and session not in active:
+            occupied_sessions.add(session)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                stats["leaked_processes_killed"] += 1
+                logger.warning(f"Killed leaked process {pid} from {finished[session]} (session {session})")
+            except (ProcessLookupError, PermissionError):
+                pass
+        elif escaped:
+            kill_group(pid)
+            stats["leaked_processes_killed"] += 1
+            logger.warning(f"Killed leaked process {pid} that left its execution's session")
+
+    # Sessions with nothing left in them no longer need watching
+    with groups_lock:
+        for session in finished:
+            if session not in occupied_sessions:
+                finished_groups.pop(session, None)
+
+def _uses_path(pid, path):
+    # The process works in path or holds a file under it open
+    prefix = path.rstrip(os.sep) + os.sep
+    try:
+        links = [os.readlink(f"/proc/{pid}/cwd")]
+        links += [os.readlink(f"/proc/{pid}/fd/{fd}") for fd in os.listdir(f"/proc/{pid}/fd")]
+    except OSError:
+        return False
+    return any(link == path or link.startswith(prefix) for link in links)
+
+def kill_groups_using(path):
+    """Kill every launched process group with a member working in, or writing under, path"""
+    if not os.path.isdir("/proc"):
+        return 0
+    with groups_lock:
+        active = set(active_groups)
+    sessions = set()
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            info = _read_proc_stat(int(entry))
+            if info is not None and info[3] in active and info[3] not in sessions and _uses_path(entry, path):
+                sessions.add(info[3])
+    for session in sessions:
+        kill_group(session)
+        with groups_lock:
+            stats["groups_killed_over_quota"] += 1
+    return len(sessions)
+
+def reaper_loop():
+    """Run reap_once forever at REAPER_INTERVAL"""
+    while True:
+        time.sleep(REAPER_INTERVAL)
+        try:
+            reap_once()
+        except Exception as e:
+            logger.error(f"Process reaper error: {str(e)}")
+
+def _become_subreaper():
+    """Have orphaned descendants re-parented to this process rather than init, so the reaper sees them"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) == 0
+    except (OSError, AttributeError):
+        return False
+
+def start_reaper():
+    """Start the background reaper thread"""
+    if not _become_subreaper():
+        logger.info("Could not become a child subreaper; escaped processes are left to init")
+    thread = threading.Thread(target=reaper_loop, name="process-reaper", daemon=True)
+    thread.start()
+    return thread
+
+def get_process_stats():
+    """Return counters describing launched, killed and reaped processes"""
+    with groups_lock:
+        return dict(stats, active_groups=len(active_groups), watched_groups=len(finished_groups))
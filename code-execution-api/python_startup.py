@@ -0,0 +1,129 @@
+# python_startup.py
+import os
+import re
+import json
+import time
+import statistics
+import subprocess
+import logging
+
+logger = logging.getLogger("code_execution_api")
+
+STARTUP_PROFILE_FILE = "startup_profile.json"
+
+# -s: skip the user site directory, -E: ignore PYTHON* variables inherited from the API server
+# (so its PYTHONPATH never leaks onto the student's sys.path), frozen stdlib modules for startup
+OPTIMIZED_FLAGS = ["-s", "-E", "-X", "frozen_modules=on"]
+STARTUP_SAMPLES = 5
+IMPORT_PROFILE_TOP = 15
+
+# Runs inside the venv: maps requirement names to the top-level modules their distributions install
+TOP_LEVEL_MODULES_SCRIPT = r'''
+import json, re, sys
+from importlib import metadata
+
+modules = []
+for requirement in json.loads(sys.argv[1]):
+    name = re.split(r"[<>=!~\[; ]", requirement, 1)[0]
+    try:
+        dist = metadata.distribution(name)
+    except metadata.PackageNotFoundError:
+        continue
+    top_level = (dist.read_text("top_level.txt") or "").split()
+    if not top_level:
+        top_level = sorted({f.parts[0].split(".")[0] for f in dist.files or []
+                            if f.suffix == ".py" and len(f.parts) <= 2 and not f.parts[0].endswith(".dist-info")})
+    modules.extend(m for m in top_level if m.isidentifier() and not m.startswith("_"))
+print(json.dumps(sorted(set(modules))))
+'''
+
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def _site_packages(python_path):
+    result = subprocess.run([python_path, "-c", "import sysconfig; print(sysconfig.get_paths()['purelib'])"],
+                            capture_output=True, text=True, check=True, timeout=30)
+    return result.stdout.strip()
+
+def _median_startup_ms(command):
+    """Median wall time in milliseconds to run command to completion"""
+    samples = []
+    for _ in range(STARTUP_SAMPLES):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, timeout=120)
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 2)
+
+def parse_importtime(stderr):
+    """Turn -X importtime output into the slowest modules by cumulative and self time"""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({"module": module, "self_ms": int(self_us) / 1000,
+                            "cumulative_ms": int(cumulative_us) / 1000, "top_level": len(indent) <= 1})
+    top_level = sorted((e for e in entries if e["top_level"]), key=lambda e: -e["cumulative_ms"])
+    slowest = sorted(entries, key=lambda e: -e["self_ms"])[:IMPORT_PROFILE_TOP]
+    return {
+        "total_ms": round(sum(e["cumulative_ms"] for e in top_level), 2),
+        "top_level": [{"module": e["module"], "cumulative_ms": e["cumulative_ms"]} for e in top_level],
+        "slowest_self": [{"module": e["module"], "self_ms": e["self_ms"]} for e in slowest]
+    }
+
+def optimize_python_startup(assignment_dir, python_path, requirements):
+    """Precompile the venv, profile its imports and pick launch flags; returns the saved profile"""
+    profile = {"launch_flags": [], "precompiled": False, "cold_start_ms": {}, "import_profile": None}
+
+    # Unchecked-hash pycs are never re-validated against their sources, saving a stat per import.
+    # Safe here because the venv is never modified after setup.
+    site_packages = _site_packages(python_path)
+    compile_result = subprocess.run(
+        [python_path, "-m", "compileall", "-q", "-f", "-j", "0", "--invalidation-mode", "unchecked-hash",
+         site_packages],
+        capture_output=True, text=True, timeout=1800
+    )
+    profile["precompiled"] = compile_result.returncode == 0
+    if compile_result.returncode != 0:
+        logger.warning(f"Some site-packages could not be precompiled: {compile_result.stdout[-2000:]}")
+
+    modules_result = subprocess.run([python_path, "-c", TOP_LEVEL_MODULES_SCRIPT, json.dumps(requirements)],
+                                    capture_output=True, text=True, timeout=60)
+    modules = json.loads(modules_result.stdout) if modules_result.returncode == 0 else []
+    import_statement = "; ".join(f"import {module}" for module in modules) or "pass"
+
+    # Only adopt the optimized flags if the requirements still import with them
+    check = subprocess.run([python_path] + OPTIMIZED_FLAGS + ["-c", import_statement],
+                           capture_output=True, text=True, timeout=300)
+    if check.returncode == 0:
+        profile["launch_flags"] = OPTIMIZED_FLAGS
+    else:
+        logger.warning(f"Optimized launch flags break imports, using defaults: {check.stderr[-2000:]}")
+
+    launch = [python_path] + profile["launch_flags"]
+    profile["cold_start_ms"] = {
+        "default": _median_startup_ms([python_path, "-c", "pass"]),
+        "optimized": _median_startup_ms(launch + ["-c", "pass"]),
+        "with_requirements": _median_startup_ms(launch + ["-c", import_statement])
+    }
+
+    importtime = subprocess.run(launch + ["-X", "importtime", "-c", import_statement],
+                                capture_output=True, text=True, timeout=300)
+    profile["import_profile"] = dict(parse_importtime(importtime.stderr), modules=modules)
+
+    with open(os.path.join(assignment_dir, STARTUP_PROFILE_FILE), "w") as f:
+        json.dump(profile, f, indent=2)
+    logger.info(f"Python startup profile for {assignment_dir}: {profile['cold_start_ms']}")
+    return profile
+
+def load_startup_profile(assignment_dir):
+    """Return the saved startup profile, or None for environments built before profiling existed"""
+    try:
+        with open(os.path.join(assignment_dir, STARTUP_PROFILE_FILE), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def get_launch_flags(assignment_dir):
+    """Interpreter flags to run student code with in this environment"""
+    profile = load_startup_profile(assignment_dir)
+    return profile["launch_flags"] if profile else []
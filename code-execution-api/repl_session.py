@@ -0,0 +1,460 @@
+# repl_session.py
+import os
+import json
+import time
+import uuid
+import select
+import signal
+import logging
+import threading
+import subprocess
+from workspace import workspaces
+from process_manager import session_kwargs, register_group, release_group, _read_proc_stat
+
+logger = logging.getLogger("code_execution_api")
+
+SESSION_IDLE_TIMEOUT = float(os.environ.get("SESSION_IDLE_TIMEOUT", "900"))  # Seconds without a cell before a session ends
+# Total resident memory of all sessions; idle sessions are ended, least recently used first, to stay under it
+SESSION_MEMORY_BUDGET = int(os.environ.get("SESSION_MEMORY_BUDGET_BYTES", str(2 * 1024 * 1024 * 1024)))
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", "32"))
+SWEEP_INTERVAL = 10  # Seconds between checks for idle, dead and over-budget sessions
+DEFAULT_CELL_TIMEOUT = 30
+MAX_CELL_TIMEOUT = 300
+INTERRUPT_GRACE = 2.0  # Seconds an interrupted cell gets to unwind before the session is killed
+MAX_CELL_BYTES = 1024 * 1024
+MAX_CELL_OUTPUT = 1024 * 1024  # Bytes of stdout (and of stderr) returned per cell
+
+SESSION_LANGUAGES = ("python", "javascript")
+
+# Python kernel: runs cells in one namespace, reading requests from and replying on the pipes passed
+# in argv. Cell output goes straight to the stdout/stderr files, so output of child processes and C
+# extensions is captured too. A trailing expression is echoed like in a notebook, and SIGINT
+# interrupts the running cell without losing state.
+PYTHON_REPL_HARNESS = r'''
+import ast
+import json
+import linecache
+import os
+import signal
+import sys
+import time
+import traceback
+
+requests = os.fdopen(int(sys.argv[1]), "r", encoding="utf-8")
+replies = os.fdopen(int(sys.argv[2]), "w", encoding="utf-8")
+sys.argv = [""]
+namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+signal.signal(signal.SIGINT, signal.default_int_handler)
+
+def run_cell(source, filename):
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    tree = ast.parse(source, filename)
+    last = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = ast.Expression(tree.body.pop().value)
+    exec(compile(tree, filename, "exec"), namespace)
+    if last is not None:
+        value = eval(compile(last, filename, "eval"), namespace)
+        if value is not None:
+            namespace["_"] = value
+            print(repr(value))
+
+def report(error):
+    # Leave the kernel's own frames out of the traceback
+    tb = error.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename == __file__:
+        tb = tb.tb_next
+    traceback.print_exception(type(error), error, tb)
+
+while True:
+    try:
+        line = requests.readline()
+    except KeyboardInterrupt:
+        continue  # An interrupt that arrived just after its cell finished
+    if not line:
+        break
+    request = json.loads(line)
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        run_cell(request["code"], f"<cell {request['count']}>")
+    except KeyboardInterrupt as e:
+        status = "interrupted"
+        report(e)
+    except BaseException as e:
+        status = "error"
+        report(e)
+    elapsed = time.perf_counter() - start
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        pass
+    replies.write(json.dumps({"status": status, "time": elapsed}) + "\n")
+    replies.flush()
+'''
+
+# JavaScript kernel: same protocol. Cells run as scripts in the kernel's global context, so var and
+# function declarations persist (top-level let/const can not be declared again by a later cell).
+# A promise left by the last expression is awaited.
+JAVASCRIPT_REPL_HARNESS = r'''
+const fs = require("fs");
+const path = require("path");
+const readline = require("readline");
+const util = require("util");
+const vm = require("vm");
+const { createRequire } = require("module");
+
+const [requestFd, replyFd] = process.argv.slice(2).map(Number);
+globalThis.require = createRequire(path.join(process.cwd(), "__repl__.js"));
+process.on("SIGINT", () => {});  // Between cells; a running cell is interrupted through breakOnSigint
+
+async function runCell(request) {
+  const start = process.hrtime.bigint();
+  let status = "ok";
+  try {
+    let value = vm.runInThisContext(request.code, {
+      filename: `cell ${request.count}`, timeout: request.timeout * 1000, breakOnSigint: true
+    });
+    if (value && typeof value.then === "function") {
+      value = await value;
+    }
+    if (value !== undefined) {
+      globalThis._ = value;
+      console.log(util.inspect(value));
+    }
+  } catch (e) {
+    const code = e && e.code;
+    status = code === "ERR_SCRIPT_EXECUTION_TIMEOUT" ? "timeout"
+      : code === "ERR_SCRIPT_EXECUTION_INTERRUPTED" ? "interrupted" : "error";
+    // Leave the kernel's own frames out of the stack trace
+    const stack = String(e && e.stack || e).split("\n");
+    console.error(stack.filter((line) => !/^\s+at .*(node:|__repl_kernel__)/.test(line)).join("\n"));
+  }
+  const time = Number(process.hrtime.bigint() - start) / 1e9;
+  fs.writeSync(replyFd, JSON.stringify({ status, time }) + "\n");
+}
+
+let queue = Promise.resolve();
+readline.createInterface({ input: fs.createReadStream(null, { fd: requestFd }) })
+  .on("line", (line) => { queue = queue.then(() => runCell(JSON.parse(line))); })
+  .on("close", () => queue.then(() => process.exit(0)));
+'''
+
+REPL_HARNESSES = {
+    "python": (PYTHON_REPL_HARNESS, "__repl_kernel__.py"),
+    "javascript": (JAVASCRIPT_REPL_HARNESS, "__repl_kernel__.js")
+}
+
+class SessionLimitReached(Exception):
+    pass
+
+class SessionEnded(Exception):
+    pass
+
+def _session_memory():
+    """Resident bytes per process session (the kernels are session leaders), summed over members"""
+    usage = {}
+    if not os.path.isdir("/proc"):
+        return usage
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        info = _read_proc_stat(int(entry))
+        if info is None:
+            continue
+        try:
+            with open(f"/proc/{entry}/statm", "r") as f:
+                resident = int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+        usage[info[3]] = usage.get(info[3], 0) + resident
+    return usage
+
+class ReplSession:
+    """A live interpreter holding one student's state for an assignment"""
+
+    def __init__(self, owner, assignment_name, language, work_dir):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.assignment_name = assignment_name
+        self.language = language
+        self.work_dir = work_dir
+        self.process = None
+        self.requests = None  # Our end of the request pipe
+        self.replies = None  # Our end of the reply pipe
+        self.buffer = b""
+        self.stdout_path = os.path.join(work_dir, "__repl_stdout__")
+        self.stderr_path = os.path.join(work_dir, "__repl_stderr__")
+        self.lock = threading.Lock()  # Cells run one at a time
+        self.busy = False
+        self.execution_count = 0
+        self.created = time.time()
+        self.last_used = time.monotonic()
+        self.memory = 0
+
+    def spawn(self, command, env):
+        request_read, self.requests = os.pipe()
+        self.replies, reply_write = os.pipe()
+        try:
+            with open(self.stdout_path, "ab") as stdout, open(self.stderr_path, "ab") as stderr:
+                # Opened for appending, so the kernel keeps writing at the end after each cell's output is cut
+                self.process = subprocess.Popen(
+                    command + [str(request_read), str(reply_write)],
+                    stdin=subprocess.DEVNULL,
+                    stdout=stdout,
+                    stderr=stderr,
+                    env=env,
+                    cwd=self.work_dir,
+                    pass_fds=(request_read, reply_write),
+                    **session_kwargs()
+                )
+        finally:
+            os.close(request_read)
+            os.close(reply_write)
+        register_group(self.process.pid, command)
+
+    def _read_reply(self, timeout):
+        """Return the kernel's reply to the running cell, or None if none came within timeout"""
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self.buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.replies], [], [], remaining)[0]:
+                return None
+            chunk = os.read(self.replies, 65536)
+            if not chunk:
+                raise SessionEnded()
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def _take_output(self, path):
+        # Read what the kernel wrote during the cell, then empty the file for the next one
+        try:
+            with open(path, "r+b") as f:
+                data = f.read(MAX_CELL_OUTPUT + 1)
+                f.truncate(0)
+        except FileNotFoundError:
+            return ""  # The session ended and its workspace is gone
+        text = data[:MAX_CELL_OUTPUT].decode("utf-8", errors="replace")
+        if len(data) > MAX_CELL_OUTPUT:
+            text += f"\n[Output truncated after {MAX_CELL_OUTPUT} bytes]"
+        return text
+
+    def run_cell(self, code, timeout):
+        """Run one cell against the session's state; returns (status, elapsed seconds)"""
+        if self.requests is None:
+            raise SessionEnded("The session has ended")
+        self.execution_count += 1
+        request = {"code": code, "count": self.execution_count, "timeout": timeout}
+        os.write(self.requests, (json.dumps(request) + "\n").encode("utf-8"))
+        reply = self._read_reply(timeout + 0.5)  # The JavaScript kernel enforces the timeout itself
+        if reply is not None:
+            return reply["status"], reply["time"]
+        # Interrupt the cell but keep the state; only a kernel that does not respond is killed
+        try:
+            os.kill(self.process.pid, signal.SIGINT)
+        except ProcessLookupError:
+            pass
+        reply = self._read_reply(INTERRUPT_GRACE)
+        if reply is None:
+            raise SessionEnded(f"Cell timed out after {timeout:g} seconds and could not be interrupted; "
+                               f"the session was ended and its state lost")
+        return "timeout", float(timeout)
+
+    def execute(self, code, timeout):
+        """Run a cell; returns the usual output/error/execution_time result plus its status"""
+        with self.lock:
+            self.busy = True
+            try:
+                status, elapsed = self.run_cell(code, timeout)
+                ended = None
+            except (SessionEnded, OSError) as e:
+                status, elapsed = "ended", 0.0
+                ended = str(e) or f"The interpreter exited (exit code {self.process.poll()}); its state was lost"
+                if workspaces.exceeded_quota(self.work_dir):
+                    ended += " after writing more than the workspace quota"
+            finally:
+                self.busy = False
+                self.last_used = time.monotonic()
+            error = self._take_output(self.stderr_path)
+            if status == "timeout":
+                error += f"Cell timed out after {timeout:g} seconds and was interrupted; the session state was kept\n"
+            if ended:
+                error += ended
+            return {
+                "output": self._take_output(self.stdout_path),
+                "error": error,
+                "execution_time": round(elapsed, 3),
+                "status": status,
+                "execution_count": self.execution_count
+            }
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if self.process is not None:
+            release_group(self.process.pid)
+            self.process.kill()
+            self.process.wait()
+        # A running cell sees the kernel exit and returns before the pipes are closed
+        with self.lock:
+            for fd in (self.requests, self.replies):
+                if fd is not None:
+                    os.close(fd)
+            self.requests = self.replies = None
+
+    def describe(self):
+        return {
+            "session_id": self.id,
+            "owner": self.owner,
+            "assignment_name": self.assignment_name,
+            "language": self.language,
+            "execution_count": self.execution_count,
+            "busy": self.busy,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            "memory_bytes": self.memory
+        }
+
+class SessionManager:
+    """Keeps per-student interpreters alive between cells.
+
+    Sessions end when idle for SESSION_IDLE_TIMEOUT, when their interpreter exits, and (idle ones,
+    least recently used first) when all sessions together use more than the memory budget or a new
+    session needs a slot.
+    """
+
+    def __init__(self, memory_budget=SESSION_MEMORY_BUDGET, max_sessions=MAX_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.memory_budget = memory_budget
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.sessions = {}  # session id -> ReplSession
+        self.owners = {}  # (assignment name, owner) -> session id
+        self.stats = {"started": 0, "expired_idle": 0, "evicted_memory": 0, "evicted_limit": 0, "ended": 0}
+
+    def find(self, assignment_name, owner):
+        """Return the live session of an owner for an assignment, if any"""
+        with self.lock:
+            session = self.sessions.get(self.owners.get((assignment_name, owner)))
+        if session is not None and not session.alive():
+            self.close(session.id, "ended")
+            return None
+        return session
+
+    def open(self, owner, assignment_name, language, command, env, work_dir):
+        """Start an interpreter in a prepared workspace; the workspace is released when the session ends"""
+        session = ReplSession(owner, assignment_name, language, work_dir)
+        with self.lock:
+            if len(self.sessions) >= self.max_sessions:
+                idle = sorted((s for s in self.sessions.values() if not s.busy), key=lambda s: s.last_used)
+                if not idle:
+                    raise SessionLimitReached(f"All {self.max_sessions} sessions are busy")
+                evicted = idle[0]
+            else:
+                evicted = None
+        if evicted is not None:
+            self.close(evicted.id, "evicted_limit")
+        try:
+            session.spawn(command, env)
+        except Exception:
+            session.stop()
+            raise
+        with self.lock:
+            self.sessions[session.id] = session
+            if owner is not None:
+                previous = self.owners.get((assignment_name, owner))
+                self.owners[(assignment_name, owner)] = session.id
+            else:
+                previous = None
+            self.stats["started"] += 1
+        if previous is not None:
+            self.close(previous, "ended")
+        logger.info(f"Started {language} session {session.id} for assignment '{assignment_name}'")
+        return session
+
+    def get(self, session_id):
+        with self.lock:
+            return self.sessions.get(session_id)
+
+    def execute(self, session_id, code, timeout):
+        """Run a cell in a session; ends the session if its interpreter did not survive"""
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        result = session.execute(code, timeout)
+        if result["status"] == "ended" or not session.alive():
+            self.close(session_id, "ended")
+        return result
+
+    def close(self, session_id, reason=None):
+        """End a session and free its workspace; returns False if it did not exist"""
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+            if session is None:
+                return False
+            if self.owners.get((session.assignment_name, session.owner)) == session_id:
+                del self.owners[(session.assignment_name, session.owner)]
+            if reason in self.stats:
+                self.stats[reason] += 1
+        # Waits for a running cell, except for evictions which only pick idle sessions
+        session.stop()
+        workspaces.release(session.work_dir)
+        logger.info(f"Closed session {session_id} of assignment '{session.assignment_name}'"
+                    f"{f' ({reason})' if reason else ''}")
+        return True
+
+    def close_assignment(self, assignment_name):
+        """End every session of an assignment"""
+        with self.lock:
+            session_ids = [s.id for s in self.sessions.values() if s.assignment_name == assignment_name]
+        for session_id in session_ids:
+            self.close(session_id)
+
+    def assignments(self):
+        """Names of the assignments with live sessions, whose environments must not be evicted"""
+        with self.lock:
+            return {session.assignment_name for session in self.sessions.values()}
+
+    def sweep(self):
+        """End dead and idle sessions, then idle ones least recently used first while over the memory budget"""
+        usage = _session_memory()
+        now = time.monotonic()
+        with self.lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            session.memory = usage.get(session.process.pid, 0)
+            if not session.alive():
+                self.close(session.id, "ended")
+            elif not session.busy and now - session.last_used > self.idle_timeout:
+                self.close(session.id, "expired_idle")
+        with self.lock:
+            sessions = list(self.sessions.values())
+        total = sum(session.memory for session in sessions)
+        for session in sorted(sessions, key=lambda s: s.last_used):
+            if total <= self.memory_budget:
+                break
+            if not session.busy:
+                logger.warning(f"Sessions use {total} bytes, over the budget of {self.memory_budget}; "
+                               f"ending session {session.id}")
+                total -= session.memory
+                self.close(session.id, "evicted_memory")
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(SWEEP_INTERVAL)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Session sweep error: {str(e)}")
+
+    def start(self):
+        threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True).start()
+
+    def get_stats(self):
+        with self.lock:
+            sessions = [session.describe() for session in self.sessions.values()]
+        return dict(self.stats, active=len(sessions), memory_bytes=sum(s["memory_bytes"] for s in sessions),
+                    memory_budget=self.memory_budget, sessions=sessions)
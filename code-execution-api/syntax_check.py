@@ -0,0 +1,120 @@
+# syntax_check.py
+import os
+import json
+import queue
+import logging
+import threading
+import traceback
+import subprocess
+
+logger = logging.getLogger("code_execution_api")
+
+JS_CHECKER_POOL_SIZE = 2
+JS_CHECK_TIMEOUT = 5  # Seconds before a stuck checker process is killed and replaced
+# Larger submissions are rejected before parsing; the parsers' memory use grows with the source
+MAX_SOURCE_BYTES = int(os.environ.get("SYNTAX_CHECK_MAX_BYTES", str(1024 * 1024)))
+
+# Long-lived Node.js checker: reads one JSON request per line and parses the code with the
+# same function wrapper Node uses for CommonJS modules, without ever running it
+JS_CHECKER_SCRIPT = r'''
+const vm = require("vm");
+const readline = require("readline");
+const rl = readline.createInterface({ input: process.stdin });
+rl.on("line", (line) => {
+  const { code, filename } = JSON.parse(line);
+  let error = null;
+  try {
+    vm.compileFunction(code.replace(/^#!.*/, ""), ["exports", "require", "module", "__filename", "__dirname"],
+                       { filename });
+  } catch (e) {
+    error = String(e.stack).split("\n    at ")[0];
+  }
+  process.stdout.write(JSON.stringify({ error }) + "\n");
+});
+'''
+
+def _check_size(sources):
+    """Raise ValueError if the sources together are too large to parse"""
+    size = sum(len(code.encode("utf-8", errors="replace")) for code in sources.values())
+    if size > MAX_SOURCE_BYTES:
+        raise ValueError(f"Sources are too large to check ({size} bytes, limit {MAX_SOURCE_BYTES})")
+
+def check_python_syntax(sources):
+    """Parse Python sources in-process; return formatted errors, or an empty string if valid.
+
+    sources maps file names to code. Nothing is executed and no interpreter is spawned.
+    Raises ValueError if the sources exceed MAX_SOURCE_BYTES.
+    """
+    _check_size(sources)
+    errors = []
+    for filename, code in sources.items():
+        try:
+            compile(code, filename, "exec", dont_inherit=True)
+        except (RecursionError, MemoryError) as e:
+            # Pathologically nested code exhausts the compiler rather than raising SyntaxError
+            errors.append(f'  File "{filename}"\n'
+                          f"{type(e).__name__}: code is too deeply nested or too complex to compile\n")
+        except (SyntaxError, ValueError) as e:
+            if isinstance(e, SyntaxError) and e.lineno:
+                # CPython re-reads the line from disk if a file with this name exists, so take it from the source
+                lines = code.splitlines()
+                if 0 < e.lineno <= len(lines):
+                    e.text = lines[e.lineno - 1] + "\n"
+            errors.append("".join(traceback.format_exception_only(type(e), e)))
+    return "".join(errors)
+
+class JavaScriptSyntaxChecker:
+    """A persistent Node.js process that parses code without executing it"""
+
+    def __init__(self):
+        self.process = None
+
+    def _ensure_started(self):
+        if self.process is None or self.process.poll() is not None:
+            self.process = subprocess.Popen(
+                ["node", "-e", JS_CHECKER_SCRIPT],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1
+            )
+
+    def check(self, code, filename):
+        """Return the formatted syntax error for code, or None if it parses"""
+        self._ensure_started()
+        process = self.process
+        timer = threading.Timer(JS_CHECK_TIMEOUT, process.kill)
+        timer.start()
+        try:
+            process.stdin.write(json.dumps({"code": code, "filename": filename}) + "\n")
+            process.stdin.flush()
+            line = process.stdout.readline()
+        finally:
+            timer.cancel()
+        if not line:
+            self.process = None
+            raise RuntimeError("JavaScript syntax checker exited unexpectedly")
+        return json.loads(line)["error"]
+
+# Checkers are created lazily and handed out one request at a time
+js_checker_pool = queue.Queue()
+for _ in range(JS_CHECKER_POOL_SIZE):
+    js_checker_pool.put(JavaScriptSyntaxChecker())
+
+def check_javascript_syntax(sources):
+    """Parse JavaScript sources with a pooled checker; return formatted errors, or an empty string.
+
+    Raises ValueError if the sources exceed MAX_SOURCE_BYTES.
+    """
+    _check_size(sources)
+    checker = js_checker_pool.get()
+    try:
+        errors = []
+        for filename, code in sources.items():
+            error = checker.check(code, filename)
+            if error:
+                errors.append(error.rstrip() + "\n")
+        return "".join(errors)
+    finally:
+        js_checker_pool.put(checker)
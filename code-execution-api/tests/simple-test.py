@@ -240,6 +240,132 @@ def test_execute_nonexistent_assignment():
     print(f"Status Code: {response.status_code}")
     print(f"Response: {response.json()}")
 
+def test_execute_with_stdin_and_expected_output(assignment_name):
+    """Test feeding stdin and checking stdout against an expected output"""
+    print("\n=== Testing Execute with Stdin and Expected Output ===")
+    
+    execution_data = {
+        "assignment_name": assignment_name,
+        "code": "values = [int(x) for x in input().split()]\nprint(sum(values))",
+        "stdin": "1 2 3\n",
+        "expected_output": "6\n",
+        "comparison": "whitespace",
+        "timeout": 5
+    }
+    
+    response = requests.post(f"{BASE_URL}/execute/code", json=execution_data)
+    print(f"Status Code: {response.status_code}")
+    result = response.json()
+    print(f"Output: {result.get('output', '')}")
+    print(f"Exit Code: {result.get('exit_code')}")
+    print(f"Comparison: {result.get('comparison')}")
+
+def test_stdin_fixture(assignment_name):
+    """Test uploading a fixture and streaming it to a program's stdin"""
+    print("\n=== Testing Stdin Fixture ===")
+    
+    response = requests.put(f"{BASE_URL}/assignment/{assignment_name}/fixtures/numbers.txt",
+                            data="\n".join(str(i) for i in range(100000)).encode("utf-8"))
+    print(f"Upload Status Code: {response.status_code}")
+    print(f"Upload Response: {response.json()}")
+    
+    execution_data = {
+        "assignment_name": assignment_name,
+        "code": "import sys\nprint(sum(int(line) for line in sys.stdin))",
+        "stdin_fixture": "numbers.txt"
+    }
+    
+    response = requests.post(f"{BASE_URL}/execute/code", json=execution_data)
+    print(f"Status Code: {response.status_code}")
+    print(f"Output: {response.json().get('output', '')}")
+
+def test_check_syntax(assignment_name):
+    """Test checking code for syntax errors without running it"""
+    print("\n=== Testing Syntax Check ===")
+    
+    for code in ["print('valid')", "print('missing parenthesis'"]:
+        response = requests.post(f"{BASE_URL}/check/syntax", json={"assignment_name": assignment_name, "code": code})
+        print(f"Status Code: {response.status_code}")
+        print(f"Response: {response.json()}")
+
+def test_judge_function(assignment_name):
+    """Test judging a function's return values against a batch of cases"""
+    print("\n=== Testing Judge Function ===")
+    
+    judge_data = {
+        "assignment_name": assignment_name,
+        "code": """
+def prefix_sum(values):
+    total = 0
+    result = []
+    for value in values:
+        total += value
+        result.append(total)
+    return result
+""",
+        "function": "prefix_sum",
+        "cases": [
+            {"args": [[1, 2, 3]], "expected": [1, 3, 6]},
+            {"args": [[]], "expected": []},
+            {"args": [[5]], "expected": [6]}  # Deliberately wrong
+        ]
+    }
+    
+    response = requests.post(f"{BASE_URL}/judge/function", json=judge_data)
+    print(f"Status Code: {response.status_code}")
+    result = response.json()
+    print(f"Passed: {result.get('passed')} of {result.get('total')}")
+    print(f"Error: {result.get('error', '')}")
+
+def test_benchmark_code(assignment_name):
+    """Test benchmarking a function over several input sizes"""
+    print("\n=== Testing Benchmark Code ===")
+    
+    benchmark_data = {
+        "assignment_name": assignment_name,
+        "code": "def total(values):\n    return sum(values)\n\ndef make_input(n):\n    return (list(range(n)),)\n",
+        "function": "total",
+        "input_generator": "make_input",
+        "input_sizes": [1000, 10000, 100000],
+        "iterations": 5,
+        "warmup": 1
+    }
+    
+    response = requests.post(f"{BASE_URL}/benchmark/code", json=benchmark_data)
+    print(f"Status Code: {response.status_code}")
+    result = response.json()
+    for summary in result.get("results", []):
+        print(f"Size {summary['size']}: median {summary['median']} seconds")
+    print(f"Scaling Exponent: {result.get('scaling_exponent')}")
+    print(f"Error: {result.get('error', '')}")
+
+def test_session(assignment_name):
+    """Test a persistent REPL session that keeps state between cells"""
+    print("\n=== Testing REPL Session ===")
+    
+    response = requests.post(f"{BASE_URL}/sessions", json={"assignment_name": assignment_name, "owner": "simple-test"})
+    print(f"Status Code: {response.status_code}")
+    session = response.json()
+    print(f"Session: {session}")
+    if response.status_code != 200:
+        return
+    
+    for code in ["counter = 41", "counter += 1\nprint(counter)"]:
+        response = requests.post(f"{BASE_URL}/sessions/{session['session_id']}/execute", json={"code": code})
+        print(f"Status Code: {response.status_code}")
+        print(f"Response: {response.json()}")
+    
+    response = requests.delete(f"{BASE_URL}/sessions/{session['session_id']}")
+    print(f"Close Status Code: {response.status_code}")
+
+def test_stats():
+    """Test the monitoring endpoints"""
+    print("\n=== Testing Stats ===")
+    
+    for name in ["processes", "admission", "sessions", "pools", "cpu", "environments"]:
+        response = requests.get(f"{BASE_URL}/stats/{name}")
+        print(f"{name}: {response.status_code} {response.json()}")
+
 def main():
     """Run all tests"""
     try:
@@ -249,6 +375,12 @@ def main():
         time.sleep(1)
         test_execute_python_code(assignment_name)
         test_execute_code_with_error(assignment_name)
+        test_execute_with_stdin_and_expected_output(assignment_name)
+        test_stdin_fixture(assignment_name)
+        test_check_syntax(assignment_name)
+        test_judge_function(assignment_name)
+        test_benchmark_code(assignment_name)
+        test_session(assignment_name)
         
         # JavaScript tests
         print("\n\n========== JAVASCRIPT TESTS ==========")
@@ -267,6 +399,8 @@ def main():
         # Test nonexistent assignment
         test_execute_nonexistent_assignment()
         
+        test_stats()
+        
     except requests.exceptions.ConnectionError:
         print("ERROR: Could not connect to the server. Make sure the API is running on http://localhost:8000")
 
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+import admission
+from admission import AdmissionController, AdmissionRejected
+
+def controller(max_in_flight=1):
+    # Without sample() the host is "ok", so only the in-flight limit applies
+    return AdmissionController(max_in_flight, cores=1)
+
+def test_admits_up_to_the_limit_then_queues():
+    async def scenario():
+        control = controller(max_in_flight=2)
+        await control.admit("batch")
+        await control.admit("batch")
+        waiter = asyncio.ensure_future(control.admit("interactive"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done() and control.get_stats()["queued_now"] == 1
+        control.release(0.5)
+        await waiter
+        assert control.in_flight == 2
+        assert control.stats == {"admitted": 3, "queued": 1, "shed": 0}
+    asyncio.run(scenario())
+
+def test_sheds_after_the_queue_timeout(monkeypatch):
+    monkeypatch.setitem(admission.QUEUE_TIMEOUT, "batch", 0.05)
+    async def scenario():
+        control = controller()
+        await control.admit("interactive")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await control.admit("batch")
+        assert rejected.value.retry_after >= 1
+        assert control.in_flight == 1 and not control.waiters
+        assert control.stats["shed"] == 1
+    asyncio.run(scenario())
+
+def test_sheds_at_once_when_the_queue_is_full(monkeypatch):
+    monkeypatch.setattr(admission, "MAX_QUEUED", 1)
+    async def scenario():
+        control = controller()
+        await control.admit("interactive")
+        waiter = asyncio.ensure_future(control.admit("interactive"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await control.admit("interactive")
+        control.release(0.1)
+        await waiter
+    asyncio.run(scenario())
+
+def test_busy_host_holds_batch_work_but_admits_interactive():
+    async def scenario():
+        control = controller(max_in_flight=4)
+        await control.admit("batch")
+        control.level = "busy"
+        await control.admit("interactive")
+        batch = asyncio.ensure_future(control.admit("batch"))
+        await asyncio.sleep(0.01)
+        assert not batch.done()
+        control.level = "ok"
+        control.release(0.1)
+        await batch
+        assert control.in_flight == 2
+    asyncio.run(scenario())
+
+def test_slot_granted_as_the_timeout_fires_is_kept(monkeypatch):
+    monkeypatch.setitem(admission.QUEUE_TIMEOUT, "batch", 0.05)
+    async def scenario():
+        control = controller()
+        await control.admit("batch")
+        real_wait_for = asyncio.wait_for
+        async def grant_then_time_out(future, timeout):
+            # The dispatcher grants the slot in the same iteration the wait times out
+            control.release()
+            raise asyncio.TimeoutError()
+        monkeypatch.setattr(asyncio, "wait_for", grant_then_time_out)
+        try:
+            await control.admit("batch")
+        finally:
+            monkeypatch.setattr(asyncio, "wait_for", real_wait_for)
+        assert control.in_flight == 1
+        control.release()
+        assert control.in_flight == 0
+    asyncio.run(scenario())
+
+def test_set_capacity_is_capped_by_the_configured_limit():
+    control = controller(max_in_flight=4)
+    control.set_capacity(10)
+    assert control.max_in_flight == 4
+    control.set_capacity(0)
+    assert control.max_in_flight == 1
+
+def test_session_budget_is_separate_from_execution_slots():
+    control = controller(max_in_flight=1)
+    sessions = admission.SessionBudget(2, control)
+    sessions.acquire()
+    sessions.acquire()
+    assert control.in_flight == 0
+    with pytest.raises(AdmissionRejected) as rejected:
+        sessions.acquire()
+    assert rejected.value.retry_after == admission.SESSION_RETRY_AFTER
+    sessions.release()
+    control.level = "overloaded"
+    with pytest.raises(AdmissionRejected):
+        sessions.acquire()
+    control.level = "ok"
+    sessions.acquire()
+    assert sessions.get_stats() == {"admitted": 3, "shed": 2, "active": 2, "limit": 2}
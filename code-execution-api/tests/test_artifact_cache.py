@@ -0,0 +1,92 @@
+import io
+import os
+import stat
+import tarfile
+
+import pytest
+
+import process_manager
+from artifact_cache import ArtifactCache
+
+def archive(files, uid=0):
+    """A gzipped tar of {name: bytes}"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = 0o666
+            info.uid = uid
+            tar.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "artifacts"))
+    cache.start()
+    return cache
+
+def test_seeded_files_are_read_only_and_exported_to_executions(cache):
+    result = cache.seed("torch", archive({"hub/checkpoints/resnet.pth": b"weights"}))
+    assert result == {"namespace": "torch", "files": 1, "deduplicated": 0}
+    path = os.path.join(cache.root, "torch", "hub", "checkpoints", "resnet.pth")
+    assert open(path, "rb").read() == b"weights"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o444
+    assert cache.variables == {"TORCH_HOME": os.path.join(cache.root, "torch")}
+
+def test_files_keep_the_api_as_owner_whatever_the_archive_says(cache):
+    cache.seed("nltk", archive({"corpora/words.txt": b"a\nb\n"}, uid=65534))
+    assert os.stat(os.path.join(cache.root, "nltk", "corpora", "words.txt")).st_uid == os.geteuid()
+
+def test_identical_files_are_stored_once(cache):
+    cache.seed("torch", archive({"a.bin": b"same"}))
+    result = cache.seed("keras", archive({"models/b.bin": b"same"}))
+    assert result["deduplicated"] == 1
+    first = os.stat(os.path.join(cache.root, "torch", "a.bin"))
+    second = os.stat(os.path.join(cache.root, "keras", "models", "b.bin"))
+    assert first.st_ino == second.st_ino
+    assert cache.usage()["stored_bytes"] == 4
+
+def test_huggingface_runs_offline(cache):
+    cache.seed("huggingface", archive({"hub/version.txt": b"1"}))
+    assert cache.variables["HF_HUB_OFFLINE"] == "1"
+
+def test_unknown_namespaces_are_rejected(cache):
+    with pytest.raises(ValueError):
+        cache.seed("pip", archive({"x": b"x"}))
+
+def test_remove_collects_unused_blobs(cache):
+    cache.seed("torch", archive({"a.bin": b"shared", "b.bin": b"torch only"}))
+    cache.seed("keras", archive({"c.bin": b"shared"}))
+    assert cache.remove("torch")
+    assert not cache.remove("torch")
+    assert "TORCH_HOME" not in cache.variables
+    assert cache.usage()["stored_bytes"] == len(b"shared")
+
+def test_a_modified_blob_is_not_linked_into_new_seeds(cache):
+    cache.seed("torch", archive({"a.bin": b"good"}))
+    path = os.path.join(cache.root, "torch", "a.bin")
+    os.chmod(path, 0o644)
+    with open(path, "r+b") as f:
+        f.write(b"evil")
+    result = cache.seed("keras", archive({"b.bin": b"good"}))
+    assert result["deduplicated"] == 0
+    assert open(os.path.join(cache.root, "keras", "b.bin"), "rb").read() == b"good"
+
+@pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() != 0, reason="running as another user needs root")
+def test_submissions_running_as_the_run_user_cannot_modify_the_cache(cache, monkeypatch):
+    import pwd
+    try:
+        nobody = pwd.getpwnam("nobody")
+    except KeyError:
+        pytest.skip("no 'nobody' user")
+    monkeypatch.setattr(process_manager, "RUN_USER", (nobody.pw_uid, nobody.pw_gid))
+    cache.seed("torch", archive({"hub/model.pth": b"weights"}))
+    namespace_dir = os.path.join(cache.root, "torch", "hub")
+    program = ("for attempt in 'printf evil 1<>model.pth' 'chmod 666 model.pth' 'rm -f model.pth' "
+               "'echo x > planted.pth'; do "
+               "if (eval \"$attempt\") 2>/dev/null; then echo allowed; else echo denied; fi; done")
+    result = process_manager.run_process_group(["/bin/sh", "-c", program], 10, cwd=namespace_dir)
+    assert result.stdout.split() == ["denied"] * 4, result.stderr
+    assert open(os.path.join(namespace_dir, "model.pth"), "rb").read() == b"weights"
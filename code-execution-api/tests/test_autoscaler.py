@@ -0,0 +1,102 @@
+import time
+import threading
+
+import pytest
+
+import autoscaler
+from autoscaler import ElasticPool, Autoscaler, PoolBusy, pool_limits
+
+def hold_slots(pool, count):
+    """Occupy count slots from other threads until the returned event is set"""
+    release = threading.Event()
+    acquired = threading.Barrier(count + 1)
+    def hold():
+        with pool.slot():
+            acquired.wait()
+            release.wait()
+    threads = [threading.Thread(target=hold) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    acquired.wait()
+    return release, threads
+
+def test_slot_waits_for_a_free_slot():
+    pool = ElasticPool("test", 1, 2)
+    release, threads = hold_slots(pool, 1)
+    threading.Timer(0.1, release.set).start()
+    with pool.slot(timeout=5):
+        assert pool.in_use == 1
+    for thread in threads:
+        thread.join()
+    assert pool.in_use == 0
+
+def test_slot_gives_up_after_the_timeout():
+    pool = ElasticPool("test", 1, 2)
+    release, threads = hold_slots(pool, 1)
+    start = time.monotonic()
+    with pytest.raises(PoolBusy) as busy:
+        with pool.slot(timeout=0.1):
+            pass
+    assert 0.1 <= time.monotonic() - start < 2
+    assert busy.value.retry_after >= 1
+    assert pool.waiting == 0 and pool.timeouts == 1
+    release.set()
+    for thread in threads:
+        thread.join()
+
+def test_resize_wakes_waiters():
+    pool = ElasticPool("test", 1, 2)
+    release, threads = hold_slots(pool, 1)
+    threading.Timer(0.1, pool.resize, args=(2,)).start()
+    with pool.slot(timeout=5):
+        assert pool.in_use == 2
+    release.set()
+    for thread in threads:
+        thread.join()
+
+def test_pool_limits():
+    assert pool_limits(1, 8, None) == (1, 8)
+    assert pool_limits(1, 8, "2:32") == (2, 32)
+    with pytest.raises(ValueError):
+        pool_limits(1, 8, "4:2")
+
+def test_grows_when_callers_wait_and_the_host_is_ok():
+    pool = ElasticPool("test", 1, 8)
+    pool.waiting = 3
+    resized = []
+    Autoscaler({"test": pool}, lambda: ("ok", None, 0), on_resize=lambda: resized.append(True)).evaluate()
+    assert pool.size == 4 and resized
+
+def test_does_not_grow_under_pressure_or_without_memory():
+    pool = ElasticPool("test", 1, 8)
+    pool.waiting = 3
+    Autoscaler({"test": pool}, lambda: ("busy", None, 0)).evaluate()
+    assert pool.size == 1
+    Autoscaler({"test": pool}, lambda: ("ok", autoscaler.SLOT_MEMORY_BYTES, 0)).evaluate()
+    assert pool.size == 2
+
+def test_counts_requests_queued_upstream_while_every_slot_is_busy():
+    pool = ElasticPool("test", 1, 8)
+    pool.in_use = 1
+    Autoscaler({"test": pool}, lambda: ("ok", None, 2)).evaluate()
+    assert pool.size == 3
+
+def test_shrinks_to_recent_peak_after_the_scale_down_delay(monkeypatch):
+    monkeypatch.setattr(autoscaler, "SCALE_DOWN_DELAY", 0.2)
+    monkeypatch.setattr(autoscaler, "AUTOSCALE_INTERVAL", 0.05)
+    pool = ElasticPool("test", 1, 8)
+    pool.resize(6)
+    pool.in_use = 2  # Steady demand for two slots
+    scaler = Autoscaler({"test": pool}, lambda: ("ok", None, 0))
+    scaler.evaluate()
+    assert pool.size == 6  # The window is not full yet
+    for _ in range(6):
+        time.sleep(0.05)
+        scaler.evaluate()
+    assert pool.size == 2
+    pool.in_use = 0
+    for _ in range(8):
+        time.sleep(0.05)
+        scaler.evaluate()
+    assert pool.size == 1
+    assert scaler.get_stats()["events"][-1]["to"] == 1
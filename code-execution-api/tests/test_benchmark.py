@@ -0,0 +1,63 @@
+import subprocess
+import sys
+
+import pytest
+
+import benchmark
+from benchmark import (PYTHON_HARNESS, run_in_process_benchmark, run_process_benchmark, scaling_exponent, summarize,
+                       validate_benchmark_options)
+
+def test_options_are_validated():
+    validate_benchmark_options("python", "Solution.solve", "make_input", 10, 2, [10, 100])
+    validate_benchmark_options("cpp", None, None, 10, 2, [10, 100])  # Whole program, size in argv
+    for options in [("python", None, None, 0, 2, []), ("python", None, None, 10, -1, []),
+                    ("python", "solve(); evil", None, 10, 2, []), ("python", None, "make_input", 10, 2, []),
+                    ("python", "solve", None, 10, 2, [10]), ("cpp", "solve", None, 10, 2, []),
+                    ("python", None, None, 10, 2, list(range(benchmark.MAX_INPUT_SIZES + 1)))]:
+        with pytest.raises(ValueError):
+            validate_benchmark_options(*options)
+
+def test_summarize_and_scaling_exponent():
+    summary = summarize({"size": 10, "wall": [1.0, 3.0, 2.0], "cpu": [0.5, None, 1.5]})
+    assert summary["median"] == 2.0 and summary["stddev"] == 1.0 and summary["cpu_mean"] == 1.0
+    assert summarize({"size": None, "wall": [1.0], "cpu": [None]})["cpu_median"] is None
+    quadratic = [{"size": n, "median": n * n * 1e-6} for n in (10, 100, 1000)]
+    assert scaling_exponent(quadratic) == 2.0
+    assert scaling_exponent(quadratic[:1]) is None
+
+def test_python_harness_times_a_function_over_generated_inputs(tmp_path):
+    (tmp_path / "main.py").write_text(
+        "def make_input(n):\n"
+        "    return list(range(n))\n"
+        "class Solution:\n"
+        "    def total(self, values):\n"
+        "        print('ignored')\n"
+        "        return sum(values)\n"
+    )
+    config = {"entry": str(tmp_path / "main.py"), "function": "Solution.total", "generator": "make_input",
+              "sizes": [10, 1000], "iterations": 3, "warmup": 1}
+    results = run_in_process_benchmark([sys.executable], PYTHON_HARNESS, "__benchmark_harness__.py", config,
+                                       str(tmp_path), cwd=str(tmp_path))
+    assert [result["size"] for result in results] == [10, 1000]
+    assert all(len(result["wall"]) == len(result["cpu"]) == 3 for result in results)
+
+def test_python_harness_reports_a_crash(tmp_path):
+    (tmp_path / "main.py").write_text("raise ValueError('broken')\n")
+    config = {"entry": str(tmp_path / "main.py"), "function": "solve", "generator": None, "sizes": [],
+              "iterations": 1, "warmup": 0}
+    with pytest.raises(RuntimeError, match="broken"):
+        run_in_process_benchmark([sys.executable], PYTHON_HARNESS, "__benchmark_harness__.py", config,
+                                 str(tmp_path), cwd=str(tmp_path))
+
+def test_process_benchmark_runs_the_program_per_iteration(tmp_path):
+    results = run_process_benchmark(["/bin/sh", "-c", "test $0 -gt 0"], iterations=2, warmup=1, sizes=[1, 2],
+                                    cwd=str(tmp_path))
+    assert [(result["size"], len(result["wall"])) for result in results] == [(1, 2), (2, 2)]
+    assert all(cpu is not None for result in results for cpu in result["cpu"])
+    with pytest.raises(RuntimeError, match="exited with code 1"):
+        run_process_benchmark(["/bin/sh", "-c", "exit 1"], iterations=1, warmup=0, sizes=[], cwd=str(tmp_path))
+
+def test_process_benchmark_stops_at_the_deadline(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, "BENCHMARK_TIMEOUT", 0.3)
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_process_benchmark(["/bin/sh", "-c", "sleep 5"], iterations=1, warmup=0, sizes=[], cwd=str(tmp_path))
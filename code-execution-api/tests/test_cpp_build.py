@@ -0,0 +1,74 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from cpp_build import compile_project, check_syntax
+
+pytestmark = pytest.mark.skipif(shutil.which("g++") is None, reason="g++ is not installed")
+
+MAIN = '#include <iostream>\n#include "util.h"\nint main() { std::cout << twice(21) << std::endl; }\n'
+UTIL_H = "int twice(int x);\n"
+UTIL = '#include "util.h"\nint twice(int x) { return 2 * x; }\n'
+
+@pytest.fixture
+def project(tmp_path):
+    src_dir = tmp_path / "src"
+    (src_dir / "lib").mkdir(parents=True)
+    (src_dir / "main.cpp").write_text(MAIN)
+    (src_dir / "util.h").write_text(UTIL_H)
+    (src_dir / "lib" / "util.cpp").write_text(UTIL.replace('"util.h"', '"../util.h"'))
+    return src_dir
+
+def build(project, profile="debug"):
+    cache_dir = project.parent / "objects"
+    output = str(project.parent / "program")
+    return compile_project(str(project), str(cache_dir), output, profile), output
+
+def test_links_every_translation_unit(project):
+    result, output = build(project)
+    assert result == {"success": True, "stderr": "", "compiled": 2, "reused": 0}
+    assert subprocess.run([output], capture_output=True, text=True).stdout == "42\n"
+
+def test_unchanged_units_are_reused(project):
+    build(project)
+    result, _ = build(project)
+    assert (result["compiled"], result["reused"]) == (0, 2)
+    (project / "main.cpp").write_text(MAIN.replace("21", "5"))
+    result, output = build(project)
+    assert (result["compiled"], result["reused"]) == (1, 1)
+    assert subprocess.run([output], capture_output=True, text=True).stdout == "10\n"
+
+def test_a_header_change_recompiles_everything(project):
+    build(project)
+    (project / "util.h").write_text(UTIL_H + "// changed\n")
+    assert build(project)[0]["compiled"] == 2
+
+def test_profiles_get_their_own_objects(project):
+    build(project)
+    assert build(project, "release")[0]["compiled"] == 2
+    with pytest.raises(ValueError):
+        build(project, "turbo")
+
+def test_compile_errors_leave_no_partial_objects(project):
+    (project / "main.cpp").write_text("int main() { return missing; }\n")
+    result, _ = build(project)
+    assert not result["success"] and "missing" in result["stderr"]
+    assert not [name for name in os.listdir(project.parent / "objects") if name.endswith(".tmp")]
+
+def test_check_syntax_reports_diagnostics_only(project):
+    assert check_syntax(str(project)) == ""
+    assert not os.path.exists(project.parent / "program")
+    (project / "main.cpp").write_text("int main() { return missing; }\n")
+    assert "missing" in check_syntax(str(project))
+
+def test_check_syntax_with_the_precompiled_header(tmp_path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    # No #include <vector>: the force-included precompiled header provides it
+    (src_dir / "main.cpp").write_text("int main() { std::vector<int> v; return v.size(); }\n")
+    assert "vector" in check_syntax(str(src_dir))
+    pch_dir = tmp_path / "pch"
+    assert check_syntax(str(src_dir), str(pch_dir)) == ""
+    assert os.path.exists(pch_dir / "common.h.gch")
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cpu_budget
+from cpu_budget import CoreAllocator, limit_threads, pinned
+
+@pytest.fixture
+def four_cores(monkeypatch):
+    monkeypatch.setattr(cpu_budget, "_available_cores", lambda: [0, 1, 2, 3])
+
+def test_executions_get_separate_cores_until_they_run_out(four_cores):
+    allocator = CoreAllocator(cores_per_execution=2)
+    with allocator.reserve() as first, allocator.reserve() as second:
+        assert len(first) == len(second) == 2 and not set(first) & set(second)
+        with allocator.reserve() as third:
+            assert len(third) == 2
+            assert allocator.get_stats() == {"cores": 4, "cores_per_execution": 2, "busy_cores": 4,
+                                             "oversubscribed_cores": 2}
+    assert allocator.get_stats()["busy_cores"] == 0
+
+def test_budget_is_capped_by_the_available_cores(four_cores):
+    assert CoreAllocator(cores_per_execution=16).cores_per_execution == 4
+
+def test_limit_threads_sizes_every_pool():
+    env = limit_threads({"PATH": "/usr/bin"}, 2)
+    assert all(env[variable] == "2" for variable in cpu_budget.THREAD_COUNT_VARIABLES)
+    assert env["TF_NUM_INTEROP_THREADS"] == "1" and env["PATH"] == "/usr/bin"
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="CPU affinity is not supported here")
+def test_pinned_processes_inherit_the_cores():
+    core = min(os.sched_getaffinity(0))
+    before = os.sched_getaffinity(0)
+    with pinned([core]):
+        output = subprocess.run([sys.executable, "-c", "import os; print(sorted(os.sched_getaffinity(0)))"],
+                                capture_output=True, text=True, check=True).stdout
+    assert output.strip() == str([core])
+    assert os.sched_getaffinity(0) == before
@@ -0,0 +1,91 @@
+import json
+import os
+import time
+
+import environment_store
+from environment_store import EnvironmentStore, disk_usage
+
+def make_environment(base_dir, name, size=0, last_used=None):
+    assignment_dir = base_dir / name
+    assignment_dir.mkdir()
+    (assignment_dir / "metadata.json").write_text(json.dumps({"language": "python", "fingerprint": "abc"}))
+    (assignment_dir / "venv.bin").write_bytes(b"x" * size)
+    if last_used is not None:
+        (assignment_dir / environment_store.LAST_USED_FILE).touch()
+        os.utime(assignment_dir / environment_store.LAST_USED_FILE, (last_used, last_used))
+    return assignment_dir
+
+def test_disk_usage_counts_hard_links_once(tmp_path):
+    (tmp_path / "a").write_bytes(b"x" * 100000)
+    os.link(tmp_path / "a", tmp_path / "b")
+    single = disk_usage(str(tmp_path))
+    (tmp_path / "c").write_bytes(b"x" * 100000)
+    assert 100000 <= single < disk_usage(str(tmp_path))
+
+def test_touch_and_last_used(tmp_path):
+    store = EnvironmentStore(str(tmp_path))
+    assignment_dir = make_environment(tmp_path, "a")
+    os.utime(assignment_dir / "metadata.json", (1000, 1000))
+    assert store.last_used(str(assignment_dir)) == 1000  # Never used: falls back to the metadata
+    store.touch(str(assignment_dir))
+    assert store.last_used(str(assignment_dir)) > time.time() - 5
+
+def test_remove_moves_to_the_trash_for_background_deletion(tmp_path):
+    store = EnvironmentStore(str(tmp_path))
+    assignment_dir = make_environment(tmp_path, "a")
+    store.remove(str(assignment_dir))
+    assert not assignment_dir.exists()
+    trash_path = store.deletions.get_nowait()
+    assert os.path.dirname(trash_path) == store.trash_dir and os.path.isdir(trash_path)
+
+def test_evict_keeps_metadata_without_the_fingerprint(tmp_path):
+    store = EnvironmentStore(str(tmp_path))
+    make_environment(tmp_path, "a", size=1000)
+    store.evict("a")
+    assert os.listdir(tmp_path / "a") == ["metadata.json"]
+    metadata = json.loads((tmp_path / "a" / "metadata.json").read_text())
+    assert metadata["language"] == "python" and "fingerprint" not in metadata and "evicted_at" in metadata
+    assert store.usage()[0]["evicted"]
+
+def test_quota_evicts_least_recently_used_idle_environments(tmp_path, monkeypatch):
+    monkeypatch.setattr(environment_store, "ENVIRONMENT_QUOTA_BYTES", 300000)
+    monkeypatch.setattr(environment_store, "EVICTION_MIN_IDLE_SECONDS", 3600)
+    store = EnvironmentStore(str(tmp_path))
+    day_ago = time.time() - 86400
+    make_environment(tmp_path, "oldest", 200000, last_used=day_ago)
+    make_environment(tmp_path, "busy", 200000, last_used=day_ago - 10)
+    make_environment(tmp_path, "older", 200000, last_used=day_ago + 10)
+    make_environment(tmp_path, "recent", 200000, last_used=time.time())
+    store.enforce_quota(lambda name: name == "busy")
+    evicted = {entry["name"] for entry in store.usage() if entry["evicted"]}
+    # Recently used and busy environments stay even though the store is still over quota
+    assert evicted == {"oldest", "older"}
+    assert store.evictions == 2
+
+def test_object_cache_is_pruned_least_recently_used_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(environment_store, "OBJECT_CACHE_QUOTA_BYTES", 150000)
+    store = EnvironmentStore(str(tmp_path))
+    assignment_dir = make_environment(tmp_path, "a")
+    cache_dir = assignment_dir / environment_store.OBJECT_CACHE_DIR
+    cache_dir.mkdir(parents=True)
+    hour_ago = time.time() - 3600
+    for index, name in enumerate(["old.o", "newer.o", "partial.o.tmp"]):
+        (cache_dir / name).write_bytes(b"x" * 100000)
+        os.utime(cache_dir / name, (hour_ago + index, hour_ago + index))
+    (cache_dir / "building.o").write_bytes(b"x" * 10)  # Just written: may be about to be linked
+    store.prune_object_cache(str(assignment_dir))
+    assert sorted(os.listdir(cache_dir)) == ["building.o", "newer.o"]
+    assert store.objects_pruned == 1
+
+def test_start_purges_leftovers_from_earlier_runs(tmp_path):
+    store = EnvironmentStore(str(tmp_path))
+    (tmp_path / ".evicting-a-123").mkdir()
+    (tmp_path / ".trash").mkdir()
+    (tmp_path / ".trash" / "b-456").mkdir()
+    make_environment(tmp_path, "c")
+    store.start(lambda name: False)
+    deadline = time.time() + 5
+    while time.time() < deadline and (os.listdir(tmp_path / ".trash") or (tmp_path / ".evicting-a-123").exists()):
+        time.sleep(0.05)
+    assert sorted(os.listdir(tmp_path)) == [".trash", "c"]
+    assert os.listdir(tmp_path / ".trash") == []
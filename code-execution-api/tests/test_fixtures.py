@@ -0,0 +1,99 @@
+import os
+import stat
+
+import pytest
+
+import process_manager
+from fixtures import FixtureStore, normalize_fixture_path
+from workspace import WorkspaceManager
+
+@pytest.fixture
+def store(tmp_path):
+    store = FixtureStore(str(tmp_path / "environments"))
+    store.start()
+    return store
+
+def add(store, assignment_name, rel_path, data):
+    upload = store.begin_upload()
+    upload.write(data)
+    return store.commit(assignment_name, rel_path, upload)
+
+def test_fixtures_are_linked_read_only_into_workspaces(store, tmp_path):
+    add(store, "a", "data/train.csv", b"x,y\n1,2\n")
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    store.link_into("a", str(work_dir))
+    linked = work_dir / "data" / "train.csv"
+    assert linked.read_bytes() == b"x,y\n1,2\n"
+    st = os.stat(linked)
+    assert stat.S_IMODE(st.st_mode) == 0o444
+    assert (st.st_dev, st.st_ino) in store.blob_inodes()
+
+def test_identical_content_is_stored_once(store):
+    first = add(store, "a", "in.txt", b"same")
+    second = add(store, "b", "other.txt", b"same")
+    assert first["sha256"] == second["sha256"]
+    assert store.usage() == 4
+    assert store.remove("a")
+    assert store.usage() == 4  # Still used by 'b'
+    assert store.remove("b", "other.txt")
+    assert store.usage() == 0
+    assert not store.remove("b")
+
+def test_paths_must_stay_inside_the_working_directory():
+    assert normalize_fixture_path("data/./in.txt") == os.path.join("data", "in.txt")
+    for path in ["../in.txt", "/etc/passwd", ".", "__pycache__/x"]:
+        with pytest.raises(ValueError):
+            normalize_fixture_path(path)
+
+def test_submission_files_may_not_shadow_fixtures(store, tmp_path):
+    add(store, "a", "in.txt", b"data")
+    (tmp_path / "in.txt").write_text("mine")
+    with pytest.raises(ValueError):
+        store.link_into("a", str(tmp_path))
+
+def test_a_damaged_blob_is_not_linked_or_opened(store, tmp_path):
+    entry = add(store, "a", "in.txt", b"data")
+    blob_path = os.path.join(store.blob_dir, entry["sha256"])
+    os.chmod(blob_path, 0o644)
+    with open(blob_path, "ab") as f:
+        f.write(b"!")
+    with pytest.raises(ValueError):
+        store.link_into("a", str(tmp_path))
+    with pytest.raises(ValueError):
+        store.open_fixture("a", "in.txt")
+
+def test_uploading_again_replaces_a_blob_whose_content_changed(store, tmp_path):
+    # Same size and mtime restored, which the cheap link-time check cannot see
+    entry = add(store, "a", "in.txt", b"data")
+    blob_path = os.path.join(store.blob_dir, entry["sha256"])
+    os.chmod(blob_path, 0o644)
+    with open(blob_path, "r+b") as f:
+        f.write(b"DATA")
+    os.utime(blob_path, ns=(0, 0))
+    add(store, "a", "in.txt", b"data")
+    with store.open_fixture("a", "in.txt") as f:
+        assert f.read() == b"data"
+
+@pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() != 0, reason="running as another user needs root")
+def test_submissions_running_as_the_run_user_cannot_modify_fixtures(store, tmp_path, monkeypatch):
+    import pwd
+    try:
+        nobody = pwd.getpwnam("nobody")
+    except KeyError:
+        pytest.skip("no 'nobody' user")
+    monkeypatch.setattr(process_manager, "RUN_USER", (nobody.pw_uid, nobody.pw_gid))
+    entry = add(store, "a", "in.txt", b"data")
+    workspaces = WorkspaceManager(str(tmp_path / "workspaces"), pool_size=0, owner=(nobody.pw_uid, nobody.pw_gid))
+    with workspaces.workspace() as work_dir:
+        store.link_into("a", work_dir)
+        # A shell rather than this interpreter, which the run user may not be able to reach
+        program = ("for attempt in 'printf DATA 1<>in.txt' 'chmod 666 in.txt' 'touch -d @0 in.txt'; do "
+                   "if (eval \"$attempt\") 2>/dev/null; then echo allowed; else echo denied; fi; done; "
+                   "echo results > output.txt")
+        result = process_manager.run_process_group(["/bin/sh", "-c", program], 10, cwd=work_dir)
+        assert result.stdout.split() == ["denied"] * 3, result.stderr
+        assert os.stat(os.path.join(work_dir, "output.txt")).st_uid == nobody.pw_uid
+    with store.open_fixture("a", "in.txt") as f:
+        assert f.read() == b"data"
+    assert os.stat(os.path.join(store.blob_dir, entry["sha256"])).st_uid == os.geteuid()
@@ -0,0 +1,20 @@
+from contextlib import ExitStack
+
+from starlette.testclient import TestClient
+
+import admission
+import main
+
+def test_idle_interactive_sessions_do_not_block_executions(monkeypatch):
+    # Three execution slots, as with one slot per language pool at their floor
+    monkeypatch.setattr(main.admission, "max_in_flight", 3)
+    monkeypatch.setitem(admission.QUEUE_TIMEOUT, "interactive", 0.5)
+    client = TestClient(main.app)
+    with ExitStack() as stack:
+        # Students who opened a session and have not sent anything yet
+        for _ in range(3):
+            stack.enter_context(client.websocket_connect("/execute/interactive"))
+        response = client.post("/execute/code", json={"assignment_name": "no_such_assignment", "code": "print(1)"})
+        assert response.status_code == 404  # Admitted, rather than shed with 503
+        assert main.interactive_sessions.active == 3
+    assert main.admission.in_flight == 0
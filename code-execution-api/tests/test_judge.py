@@ -0,0 +1,87 @@
+import sys
+
+import pytest
+
+from judge import PYTHON_JUDGE_HARNESS, values_equal, grade_cases, run_judge, validate_judge_options
+
+def test_integers_compare_exactly():
+    assert values_equal(3, 3)
+    assert not values_equal(3, 4)
+    assert not values_equal(10 ** 20 + 1, 10 ** 20)
+
+def test_floats_compare_within_tolerance():
+    assert values_equal(0.1 + 0.2, 0.3)
+    assert values_equal(1e12 + 1, 1e12)  # Relative tolerance
+    assert values_equal(1e-9, 0.0)  # Absolute tolerance
+    assert not values_equal(0.31, 0.3)
+    assert values_equal(0.31, 0.3, float_tolerance=0.1)
+    assert values_equal(2, 2.0)
+
+def test_booleans_are_not_numbers():
+    assert values_equal(True, True)
+    assert not values_equal(True, 1)
+    assert not values_equal(0, False)
+
+def test_types_must_match():
+    assert not values_equal("1", 1)
+    assert not values_equal(None, 0)
+    assert not values_equal([1], {"0": 1})
+    assert values_equal(None, None)
+
+def test_lists_compare_in_order_unless_unordered():
+    assert values_equal([1, [2.0, 3]], [1, [2, 3]])
+    assert not values_equal([1, 2], [2, 1])
+    assert not values_equal([1, 2], [1, 2, 3])
+    assert values_equal([[2, 1], [3]], [[3], [1, 2]], unordered=True)
+
+def test_unordered_lists_are_multisets():
+    assert not values_equal([1, 1, 2], [1, 2, 2], unordered=True)
+    assert values_equal([1, 2, 1], [1, 1, 2], unordered=True)
+
+def test_dicts_need_the_same_keys():
+    assert values_equal({"a": 1, "b": [0.5]}, {"b": [0.5], "a": 1})
+    assert not values_equal({"a": 1}, {"a": 1, "b": 2})
+
+def test_grade_cases_marks_errors_and_missing_records():
+    records = [
+        {"actual": 2, "error": None, "time": 0.0012345678, "output": ""},
+        {"actual": None, "error": "ZeroDivisionError", "time": 0.001, "output": ""}
+    ]
+    verdicts = grade_cases([2, 5, 7], records, timed_out=True)
+    assert [verdict["passed"] for verdict in verdicts] == [True, False, False]
+    assert verdicts[0]["time"] == 0.001235
+    assert verdicts[2]["error"] == "Timed out"
+    assert grade_cases([1], [], timed_out=False)[0]["error"] == "Not run"
+
+def test_grade_cases_fails_cases_over_their_time_limit():
+    records = [
+        {"actual": 1, "error": None, "time": 0.5, "output": ""},
+        {"actual": 1, "error": None, "time": 2.5, "output": ""}
+    ]
+    verdicts = grade_cases([1, 1], records, timed_out=False, time_limits=[1.0, 1.0])
+    assert [verdict["passed"] for verdict in verdicts] == [True, False]
+    assert verdicts[1]["error"] == "Time limit of 1 seconds exceeded"
+    assert grade_cases([1, 1], records, timed_out=False, time_limits=[None, None])[1]["passed"]
+
+def test_case_time_limits_must_fit_in_the_timeout():
+    validate_judge_options("python", "solve", 2, 10, [1.0, None])
+    with pytest.raises(ValueError):
+        validate_judge_options("python", "solve", 1, 10, [20.0])
+
+def test_python_harness_limits_each_case_but_not_loading(tmp_path):
+    (tmp_path / "main.py").write_text(
+        "import time\n"
+        "time.sleep(1.5)  # A slow import, e.g. torch\n"
+        "def solve(n):\n"
+        "    while n < 0:\n"
+        "        pass\n"
+        "    return n * 2\n"
+    )
+    config = {"entry": str(tmp_path / "main.py"), "function": "solve", "cases": [[1], [-1], [3]],
+              "time_limits": [1.0, 0.2, 1.0]}
+    records, _, timed_out = run_judge([sys.executable], PYTHON_JUDGE_HARNESS, "__judge_harness__.py", config,
+                                      str(tmp_path), cwd=str(tmp_path), timeout=10)
+    assert not timed_out
+    verdicts = grade_cases([2, -2, 6], records, timed_out, time_limits=config["time_limits"])
+    assert [verdict["passed"] for verdict in verdicts] == [True, False, True]
+    assert verdicts[1]["error"] == "Time limit of 0.2 seconds exceeded"
@@ -0,0 +1,72 @@
+import sys
+import subprocess
+
+import pytest
+
+from output_compare import OutputComparator, run_compared
+
+def verdict(expected, chunks, mode="exact", tolerance=1e-6):
+    comparator = OutputComparator(expected, mode, tolerance)
+    for chunk in chunks:
+        if not comparator.feed(chunk):
+            break
+    return comparator.finish()
+
+def test_exact_match_across_chunk_boundaries():
+    result = verdict("1\n2\n3\n", ["1\n", "2", "\n3", "\n"])
+    assert result["passed"] and result["first_difference"] is None
+
+def test_trailing_blank_lines_and_carriage_returns_are_ignored():
+    assert verdict("a\nb\n\n\n", ["a\r\nb\r\n"])["passed"]
+    assert verdict("a\nb", ["a\nb\n\n"])["passed"]
+
+def test_first_mismatch_is_reported():
+    difference = verdict("1\n2\n3\n", ["1\n5\n3\n"])["first_difference"]
+    assert difference == {"line": 2, "reason": "mismatch", "expected": "2", "actual": "5"}
+
+def test_missing_and_extra_output():
+    assert verdict("1\n2\n", ["1\n"])["first_difference"]["reason"] == "missing output"
+    assert verdict("1\n", ["1\n2\n"])["first_difference"]["reason"] == "extra output"
+
+def test_whitespace_mode_compares_tokens():
+    assert verdict("1 2  3\n", ["1   2 3 \n"], mode="whitespace")["passed"]
+    assert not verdict("1 2 3\n", ["1 23\n"], mode="whitespace")["passed"]
+
+def test_float_mode_uses_tolerance():
+    assert verdict("0.3333333\n", ["0.33333331\n"], mode="float")["passed"]
+    assert not verdict("0.33\n", ["0.34\n"], mode="float")["passed"]
+    assert not verdict("abc 1.0\n", ["abd 1.0\n"], mode="float")["passed"]
+
+def test_feed_stops_at_an_unfinished_line_that_cannot_match():
+    comparator = OutputComparator("abc\n")
+    assert comparator.feed("ab")
+    assert not comparator.feed("x")
+    assert comparator.finish()["first_difference"]["reason"] == "mismatch"
+
+def test_unterminated_flood_after_expected_output_fails_early():
+    comparator = OutputComparator("done\n")
+    assert comparator.feed("done\n")
+    assert not comparator.feed("y" * 100)
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        OutputComparator("", "fuzzy")
+
+def test_run_compared_stops_a_program_at_the_first_wrong_line():
+    program = "import itertools\nfor i in itertools.count():\n    print(i, flush=True)\n"
+    result, comparison = run_compared([sys.executable, "-c", program], 10, OutputComparator("0\n1\n2\n"))
+    assert not comparison["passed"]
+    assert comparison["terminated_early"]
+    assert comparison["first_difference"]["line"] == 4
+    assert result.returncode != 0
+
+def test_run_compared_reports_stderr_and_exit_code():
+    program = "import sys\nprint('ok')\nprint('warning', file=sys.stderr)\nsys.exit(3)\n"
+    result, comparison = run_compared([sys.executable, "-c", program], 10, OutputComparator("ok\n"))
+    assert comparison["passed"] and not comparison["terminated_early"]
+    assert result.returncode == 3
+    assert result.stderr == "warning\n"
+
+def test_run_compared_times_out():
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_compared([sys.executable, "-c", "import time; time.sleep(30)"], 0.5, OutputComparator(""))
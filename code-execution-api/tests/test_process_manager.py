@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import subprocess
+import textwrap
+
+import pytest
+
+import process_manager
+from process_manager import run_process_group, _read_proc_stat
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc"), reason="process tracking reads /proc")
+
+def gone(pid):
+    info = _read_proc_stat(pid)
+    return info is None or info[0] == "Z"
+
+def wait_until_gone(pid, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not gone(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return gone(pid)
+
+def read_pid(path, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(path) and open(path).read().strip():
+            return int(open(path).read())
+        time.sleep(0.02)
+    raise AssertionError(f"{path} was never written")
+
+# Forks a child that records its pid and sleeps; with setsid it leaves the group and session
+FORK_PROGRAM = textwrap.dedent("""
+    import os, sys, time
+    pid_file, setsid, parent_sleep = sys.argv[1], sys.argv[2] == "1", float(sys.argv[3])
+    if os.fork() == 0:
+        if setsid:
+            os.setsid()
+        with open(pid_file + ".tmp", "w") as f:
+            f.write(str(os.getpid()))
+        os.rename(pid_file + ".tmp", pid_file)
+        time.sleep(60)
+        os._exit(0)
+    time.sleep(parent_sleep)
+""")
+
+def test_captures_output_and_exit_code():
+    result = run_process_group([sys.executable, "-c", "import sys; print('out'); sys.exit(3)"], 10)
+    assert result.returncode == 3 and result.stdout == "out\n"
+
+@pytest.mark.parametrize("setsid", ["0", "1"])
+def test_timeout_kills_the_whole_tree(tmp_path, setsid):
+    pid_file = str(tmp_path / "child.pid")
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_process_group([sys.executable, "-c", FORK_PROGRAM, pid_file, setsid, "60"], 1)
+    assert time.monotonic() - start < 5
+    assert wait_until_gone(read_pid(pid_file))
+
+def test_escaped_grandchild_holding_the_pipes_does_not_block(tmp_path):
+    # The parent exits at once, so the setsid() grandchild is no longer its descendant when the
+    # timeout fires, but it still holds stdout and stderr open
+    pid_file = str(tmp_path / "child.pid")
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_process_group([sys.executable, "-c", FORK_PROGRAM, pid_file, "1", "0"], 1)
+    assert time.monotonic() - start < 1 + process_manager.PIPE_DRAIN_TIMEOUT + 3
+    assert wait_until_gone(read_pid(pid_file))
+
+def test_reaper_kills_processes_that_left_their_session(tmp_path):
+    # Run in a separate interpreter: becoming a child subreaper would outlast this test
+    script = textwrap.dedent(f"""
+        import subprocess, sys, time
+        sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})
+        import process_manager
+        process_manager.ORPHAN_GRACE = 0
+        assert process_manager._become_subreaper()
+        pid_file = {str(tmp_path / "child.pid")!r}
+        process = subprocess.Popen([sys.executable, "-c", {FORK_PROGRAM!r}, pid_file, "1", "0"],
+                                   **process_manager.session_kwargs())
+        process_manager.register_group(process.pid, ["python"])
+        process.wait()
+        process_manager.release_group(process.pid)
+        while True:
+            try:
+                pid = int(open(pid_file).read())
+                break
+            except (OSError, ValueError):
+                time.sleep(0.02)
+        assert process_manager._read_proc_stat(pid)[1] == process_manager.os.getpid()  # Re-parented to us
+        process_manager.reap_once()  # Kills it
+        time.sleep(0.2)
+        process_manager.reap_once()  # Reaps the zombie
+        assert process_manager._read_proc_stat(pid) is None
+        print(process_manager.stats["leaked_processes_killed"], process_manager.stats["zombies_reaped"])
+    """)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["1", "1"]
+
+def test_files_are_capped_at_the_quota_unless_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(process_manager, "WORKSPACE_QUOTA_BYTES", 1024 * 1024)
+    program = "open('big', 'wb').write(b'x' * (2 * 1024 * 1024))"
+    result = run_process_group([sys.executable, "-c", program], 10, cwd=str(tmp_path))
+    assert result.returncode != 0 and "File too large" in result.stderr
+    assert os.path.getsize(tmp_path / "big") == 1024 * 1024
+    result = run_process_group([sys.executable, "-c", program], 10, cwd=str(tmp_path), limit_file_size=False)
+    assert result.returncode == 0 and os.path.getsize(tmp_path / "big") == 2 * 1024 * 1024
+
+def test_spawns_without_a_preexec_fn():
+    assert "preexec_fn" not in process_manager.session_kwargs()
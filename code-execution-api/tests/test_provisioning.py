@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+import httpx
+
+import main
+
+def test_coalesced_creates_do_not_hold_worker_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "BASE_DIR", str(tmp_path))
+    finish = threading.Event()
+    builds = []
+    def provision(assignment_name, assignment_dir, language, requirements, build_profile, fingerprint):
+        builds.append(requirements)
+        finish.wait(10)
+        return {"assignment_name": assignment_name, "requirements": requirements}
+    monkeypatch.setattr(main, "provision_assignment", provision)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # More callers than the server's worker threads (40), all waiting on one build
+            creates = [asyncio.ensure_future(client.post("/create/assignment", json={
+                "assignment_name": "coalesced", "language": "python", "requirements": ["numpy"]
+            })) for _ in range(50)]
+            changed = asyncio.ensure_future(client.post("/create/assignment", json={
+                "assignment_name": "coalesced", "language": "python", "requirements": ["scipy"]
+            }))
+            await asyncio.sleep(0.2)
+            # A synchronous endpoint still gets a worker thread while they wait
+            response = await asyncio.wait_for(client.get("/"), 5)
+            assert response.status_code == 200
+            finish.set()
+            responses = await asyncio.gather(*creates)
+            assert {response.json()["requirements"][0] for response in responses} == {"numpy"}
+            assert (await changed).json()["requirements"] == ["scipy"]
+
+    asyncio.run(scenario())
+    assert builds == [["numpy"], ["scipy"]]  # One shared build, then the other spec's own
+    assert main.provisioning == {}
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+import pytest
+
+import repl_session
+from repl_session import SessionLimitReached, SessionManager, PYTHON_REPL_HARNESS
+from workspace import WorkspaceManager
+
+@pytest.fixture
+def workspaces(tmp_path, monkeypatch):
+    manager = WorkspaceManager(str(tmp_path / "workspaces"), pool_size=0)
+    monkeypatch.setattr(repl_session, "workspaces", manager)
+    return manager
+
+@pytest.fixture
+def sessions(workspaces):
+    manager = SessionManager(max_sessions=2)
+    yield manager
+    for session_id in list(manager.sessions):
+        manager.close(session_id)
+
+def open_python(sessions, workspaces, owner="alice", assignment_name="a"):
+    work_dir = workspaces.acquire()
+    harness_path = os.path.join(work_dir, "__repl_kernel__.py")
+    with open(harness_path, "w") as f:
+        f.write(PYTHON_REPL_HARNESS)
+    return sessions.open(owner, assignment_name, "python", [sys.executable, harness_path], dict(os.environ), work_dir)
+
+def test_state_persists_between_cells(sessions, workspaces):
+    session = open_python(sessions, workspaces)
+    assert sessions.execute(session.id, "x = 20\nprint('set')", 5)["output"] == "set\n"
+    result = sessions.execute(session.id, "x * 2 + 2", 5)
+    assert result["output"] == "42\n" and result["status"] == "ok" and result["execution_count"] == 2
+
+def test_errors_are_reported_without_kernel_frames(sessions, workspaces):
+    session = open_python(sessions, workspaces)
+    result = sessions.execute(session.id, "1 / 0", 5)
+    assert result["status"] == "error"
+    assert "ZeroDivisionError" in result["error"] and "__repl_kernel__" not in result["error"]
+    assert sessions.execute(session.id, "'still alive'", 5)["output"] == "'still alive'\n"
+
+def test_a_cell_that_times_out_is_interrupted_and_the_state_kept(sessions, workspaces):
+    session = open_python(sessions, workspaces)
+    sessions.execute(session.id, "kept = 1", 5)
+    result = sessions.execute(session.id, "while True:\n    pass", 0.5)
+    assert result["status"] == "timeout" and "state was kept" in result["error"]
+    assert sessions.execute(session.id, "kept", 5)["output"] == "1\n"
+
+def test_an_exiting_interpreter_ends_the_session(sessions, workspaces):
+    session = open_python(sessions, workspaces)
+    result = sessions.execute(session.id, "import os\nos._exit(3)", 5)
+    assert result["status"] == "ended" and "state was lost" in result["error"]
+    assert sessions.get(session.id) is None
+    assert not os.path.exists(session.work_dir)  # The workspace was released
+
+def test_owners_get_their_own_session_back(sessions, workspaces):
+    session = open_python(sessions, workspaces)
+    assert sessions.find("a", "alice") is session
+    assert sessions.find("a", "bob") is None
+    replacement = open_python(sessions, workspaces)
+    assert sessions.find("a", "alice") is replacement and sessions.get(session.id) is None
+
+def test_the_least_recently_used_idle_session_makes_room(sessions, workspaces):
+    first = open_python(sessions, workspaces, owner="alice")
+    second = open_python(sessions, workspaces, owner="bob")
+    sessions.execute(first.id, "1", 5)  # Used after bob's
+    third = open_python(sessions, workspaces, owner="carol")
+    assert set(sessions.sessions) == {first.id, third.id}
+    assert sessions.stats["evicted_limit"] == 1
+    first.busy = third.busy = True
+    try:
+        with pytest.raises(SessionLimitReached):
+            open_python(sessions, workspaces, owner="dave")
+    finally:
+        first.busy = third.busy = False
+
+def test_sweep_ends_idle_sessions_and_enforces_the_memory_budget(sessions, workspaces):
+    idle = open_python(sessions, workspaces, owner="alice")
+    recent = open_python(sessions, workspaces, owner="bob")
+    idle.last_used = time.monotonic() - sessions.idle_timeout - 1
+    sessions.sweep()
+    assert set(sessions.sessions) == {recent.id} and sessions.stats["expired_idle"] == 1
+    assert recent.memory > 0  # Resident memory of the interpreter
+    sessions.memory_budget = 1
+    sessions.sweep()
+    assert sessions.sessions == {} and sessions.stats["evicted_memory"] == 1
@@ -0,0 +1,31 @@
+import shutil
+
+import pytest
+
+import syntax_check
+from syntax_check import check_javascript_syntax, check_python_syntax
+
+def test_valid_python_passes_without_running_it():
+    assert check_python_syntax({"main.py": "import os\nos._exit(1)\n", "util.py": "x = 1\n"}) == ""
+
+def test_python_errors_name_the_file_and_line():
+    error = check_python_syntax({"main.py": "x = 1\n", "util.py": "def f(:\n    pass\n"})
+    assert 'File "util.py", line 1' in error and "def f(:" in error and "SyntaxError" in error
+
+def test_pathologically_nested_python_is_an_error_not_a_crash():
+    error = check_python_syntax({"main.py": "x = " + "+".join(["1"] * 200000) + "\n"})
+    assert 'File "main.py"' in error and "too deeply nested or too complex" in error
+
+def test_oversized_sources_are_rejected(monkeypatch):
+    monkeypatch.setattr(syntax_check, "MAX_SOURCE_BYTES", 10)
+    with pytest.raises(ValueError):
+        check_python_syntax({"main.py": "x = 1\n", "util.py": "y = 2\n"})
+    with pytest.raises(ValueError):
+        check_javascript_syntax({"main.js": "let x = 12345;\n"})
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js is not installed")
+def test_javascript_is_parsed_as_a_module_without_running_it():
+    assert check_javascript_syntax({"main.js": "#!/usr/bin/env node\nreturn process.exit(1);\n"}) == ""
+    error = check_javascript_syntax({"main.js": "let x = 1;\n", "util.js": "function f( {\n"})
+    assert "util.js" in error and "SyntaxError" in error and "main.js" not in error
+    assert check_javascript_syntax({"main.js": "const ok = true;\n"}) == ""  # The checker survives errors
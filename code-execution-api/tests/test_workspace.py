@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import subprocess
+
+import pytest
+
+import workspace
+from workspace import WorkspaceManager, WorkspaceQuotaExceeded, check_quota
+from process_manager import session_kwargs, register_group, release_group, kill_groups_using
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = WorkspaceManager(str(tmp_path / "workspaces"), pool_size=2)
+    manager.start()
+    return manager
+
+def test_workspaces_are_emptied_and_reused(manager):
+    path = manager.acquire()
+    os.makedirs(os.path.join(path, "sub"))
+    with open(os.path.join(path, "sub", "file"), "w") as f:
+        f.write("data")
+    manager.release(path)
+    assert os.listdir(path) == []
+    assert manager.acquire() == path
+
+def test_workspaces_beyond_the_pool_are_deleted(manager):
+    paths = [manager.acquire() for _ in range(3)]
+    for path in paths:
+        manager.release(path)
+    assert len(manager.pool) == 2
+    assert not os.path.exists(paths[2])
+
+def test_start_removes_workspaces_of_dead_processes(tmp_path):
+    root = tmp_path / "workspaces"
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    (root / f"ws-{process.pid}-1").mkdir(parents=True)
+    (root / f"ws-{os.getpid()}-999").mkdir()
+    WorkspaceManager(str(root), pool_size=0).start()
+    assert os.listdir(root) == [f"ws-{os.getpid()}-999"]
+
+def test_check_quota(monkeypatch):
+    monkeypatch.setattr(workspace, "WORKSPACE_QUOTA_BYTES", 100)
+    check_quota(100)
+    with pytest.raises(WorkspaceQuotaExceeded):
+        check_quota(101)
+
+def test_enforce_quota_skips_shared_files(manager, monkeypatch):
+    monkeypatch.setattr(workspace, "WORKSPACE_QUOTA_BYTES", 64 * 1024)
+    path = manager.acquire()
+    with open(os.path.join(path, "fixture"), "wb") as f:
+        f.write(os.urandom(128 * 1024))
+    st = os.stat(os.path.join(path, "fixture"))
+    killed = []
+    manager.enforce_quota(lambda: {(st.st_dev, st.st_ino)}, killed.append)
+    assert killed == [] and not manager.exceeded_quota(path)
+    manager.enforce_quota(set, killed.append)
+    assert killed == [path] and manager.exceeded_quota(path)
+    manager.release(path)
+    assert not manager.exceeded_quota(path)
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="finding the programs in a workspace reads /proc")
+def test_programs_writing_past_the_quota_are_killed_while_running(manager, monkeypatch):
+    monkeypatch.setattr(workspace, "WORKSPACE_QUOTA_BYTES", 1024 * 1024)
+    path = manager.acquire()
+    # Many files, each under any per-file limit, that together pass the quota
+    program = ("import time\nfor i in range(8):\n    open(f'part{i}', 'wb').write(b'x' * 256 * 1024)\n"
+               "time.sleep(60)\n")
+    command = [sys.executable, "-c", program]
+    process = subprocess.Popen(command, cwd=path, **session_kwargs())
+    register_group(process.pid, command)
+    try:
+        deadline = time.monotonic() + 10
+        while process.poll() is None and time.monotonic() < deadline:
+            manager.enforce_quota(set, kill_groups_using)
+            time.sleep(0.1)
+        assert process.returncode == -9
+        assert manager.exceeded_quota(path)
+    finally:
+        release_group(process.pid)
+        process.kill()
+        process.wait()
+        manager.release(path)
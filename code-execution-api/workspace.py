@@ -0,0 +1,204 @@
+# workspace.py
+import os
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import pwd
+except ImportError:  # Windows
+    pwd = None
+
+logger = logging.getLogger("code_execution_api")
+
+def _usable_ram_filesystem(path):
+    """True if path is a writable directory that allows executing compiled programs"""
+    if not (os.path.isdir(path) and os.access(path, os.W_OK)):
+        return False
+    return not (os.statvfs(path).f_flag & getattr(os, "ST_NOEXEC", 0))
+
+# Prefer a RAM-backed filesystem so submissions never touch the disk
+if os.environ.get("WORKSPACE_ROOT"):
+    WORKSPACE_ROOT = os.environ["WORKSPACE_ROOT"]
+elif hasattr(os, "statvfs") and _usable_ram_filesystem("/dev/shm"):
+    WORKSPACE_ROOT = "/dev/shm"
+else:
+    WORKSPACE_ROOT = tempfile.gettempdir()
+
+WORKSPACE_DIR = os.path.join(WORKSPACE_ROOT, "code-execution-workspaces")
+WORKSPACE_POOL_SIZE = int(os.environ.get("WORKSPACE_POOL_SIZE", "16"))
+WORKSPACE_QUOTA_BYTES = int(os.environ.get("WORKSPACE_QUOTA_BYTES", str(16 * 1024 * 1024)))
+QUOTA_CHECK_INTERVAL = 1.0  # Seconds between measurements of the workspaces in use
+# Submissions run as this unprivileged user when set (the API itself must then run as root). They own
+# their workspace but cannot write to anything shared between executions, such as fixtures and artifacts
+RUN_AS_USER = os.environ.get("RUN_AS_USER")
+
+def _run_user(name):
+    """(uid, gid) of the user submissions run as, or None to run them as the API's own user"""
+    if not name or pwd is None:
+        return None
+    entry = pwd.getpwnam(name)  # KeyError: an unknown user is a misconfiguration, fail at startup
+    return entry.pw_uid, entry.pw_gid
+
+RUN_USER = _run_user(RUN_AS_USER)
+
+class WorkspaceQuotaExceeded(ValueError):
+    pass
+
+class WorkspaceManager:
+    """Hands out empty per-execution directories from a pool of pre-created ones"""
+
+    def __init__(self, root=WORKSPACE_DIR, pool_size=WORKSPACE_POOL_SIZE, owner=RUN_USER):
+        self.root = root
+        self.pool_size = pool_size
+        self.owner = owner  # (uid, gid) that programs run as, given the workspace directories
+        self.lock = threading.Lock()
+        self.pool = []
+        self.counter = 0
+        self.in_use = set()
+        self.over_quota = set()  # Workspaces whose programs were killed for exceeding the quota
+
+    def _create(self):
+        with self.lock:
+            self.counter += 1
+            name = f"ws-{os.getpid()}-{self.counter}"
+        path = os.path.join(self.root, name)
+        os.makedirs(path)
+        if self.owner is not None:
+            os.chown(path, *self.owner)
+        return path
+
+    def start(self):
+        """Remove workspaces leaked by dead processes and pre-create the pool"""
+        os.makedirs(self.root, exist_ok=True)
+        for name in os.listdir(self.root):
+            owner = name.split("-")[1] if name.startswith("ws-") else None
+            if owner and owner.isdigit() and not _pid_alive(int(owner)):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+                logger.info(f"Removed stale workspace {name}")
+        while len(self.pool) < self.pool_size:
+            path = self._create()
+            with self.lock:
+                self.pool.append(path)
+        logger.info(f"Workspace pool ready: {self.pool_size} directories in {self.root}")
+
+    def acquire(self):
+        """Return an empty workspace directory, reusing a pooled one when available"""
+        with self.lock:
+            if self.pool:
+                path = self.pool.pop()
+                self.in_use.add(path)
+                return path
+        os.makedirs(self.root, exist_ok=True)
+        path = self._create()
+        with self.lock:
+            self.in_use.add(path)
+        return path
+
+    def release(self, path):
+        """Empty a workspace and return it to the pool (or delete it if the pool is full)"""
+        with self.lock:
+            self.in_use.discard(path)
+            self.over_quota.discard(path)
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.unlink(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not clean workspace {path}, discarding it: {str(e)}")
+            shutil.rmtree(path, ignore_errors=True)
+            return
+
+        with self.lock:
+            if len(self.pool) < self.pool_size:
+                self.pool.append(path)
+                return
+        shutil.rmtree(path, ignore_errors=True)
+
+    def exceeded_quota(self, path):
+        """True if programs running in this workspace were killed for writing past the quota"""
+        with self.lock:
+            return path in self.over_quota
+
+    def enforce_quota(self, shared_files, kill):
+        """Measure every workspace in use; kill(path) the programs of those over the quota.
+
+        shared_files() returns the (device, inode) pairs of files linked in by the service
+        (e.g. fixtures), which do not count.
+        """
+        with self.lock:
+            paths = list(self.in_use)
+        shared = shared_files()
+        for path in paths:
+            usage = _disk_usage(path, shared)
+            if usage > WORKSPACE_QUOTA_BYTES:
+                with self.lock:
+                    if path not in self.in_use:
+                        continue  # Released meanwhile
+                    self.over_quota.add(path)
+                logger.warning(f"Workspace {path} uses {usage} bytes, over the quota of "
+                               f"{WORKSPACE_QUOTA_BYTES}; killing its programs")
+                kill(path)
+
+    def _quota_loop(self, shared_files, kill):
+        while True:
+            time.sleep(QUOTA_CHECK_INTERVAL)
+            try:
+                self.enforce_quota(shared_files, kill)
+            except Exception as e:
+                logger.error(f"Workspace quota check error: {str(e)}")
+
+    def start_quota_monitor(self, shared_files, kill):
+        """Keep enforcing the quota while programs run, not only on the submitted files"""
+        threading.Thread(target=self._quota_loop, args=(shared_files, kill), name="workspace-quota",
+                         daemon=True).start()
+
+    @contextmanager
+    def workspace(self):
+        """Context manager yielding a workspace that is always cleaned up afterwards"""
+        path = self.acquire()
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+def _disk_usage(path, shared):
+    # Allocated bytes under path, each inode counted once; sparse files count only what they use
+    seen = set()
+    total = 0
+    for root, dirs, names in os.walk(path):
+        for name in names:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            if key in seen or key in shared:
+                continue
+            seen.add(key)
+            total += st.st_blocks * 512 if hasattr(st, "st_blocks") else st.st_size
+    return total
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def check_quota(total_bytes):
+    """Raise WorkspaceQuotaExceeded if total_bytes does not fit in one workspace"""
+    if total_bytes > WORKSPACE_QUOTA_BYTES:
+        raise WorkspaceQuotaExceeded(
+            f"Submission is {total_bytes} bytes, exceeding the workspace quota of {WORKSPACE_QUOTA_BYTES} bytes"
+        )
+
+workspaces = WorkspaceManager()